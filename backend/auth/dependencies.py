@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 
 from backend import crud, models
 from backend.auth import jwt_utils
+from backend.auth.token_cache import claims_cache, user_cache
 from backend.settings import settings
 from backend.database import get_db
 
@@ -18,10 +19,13 @@ def get_current_user(db: Session = Depends(get_db), credentials: HTTPAuthorizati
     if credentials is None or credentials.scheme.lower() != "bearer":
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
     token = credentials.credentials
-    try:
-        payload = jwt_utils.decode_token(token)
-    except Exception:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalid or expired")
+    payload = claims_cache.lookup(token)
+    if payload is None:
+        try:
+            payload = jwt_utils.decode_token(token)
+        except Exception:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalid or expired")
+        claims_cache.store(token, payload)
 
     if payload.get("type") != "access":
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token type")
@@ -30,7 +34,12 @@ def get_current_user(db: Session = Depends(get_db), credentials: HTTPAuthorizati
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
 
-    user = crud.get_user_by_id(db, user_id)
+    user = user_cache.lookup(db, user_id)
+    if user is None:
+        generation = user_cache.generation()
+        user = crud.get_user_by_id(db, user_id)
+        if user is not None:
+            user_cache.store(user, generation)
     if not user or not user.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or inactive")
 
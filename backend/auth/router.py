@@ -206,7 +206,11 @@ def reset_password(payload: ResetPasswordRequest, request: Request, db: Session
     """
     Authenticated user changes password (requires providing old password).
     """
+    # current_user may come from the auth cache; verify and write against the stored row
     user = current_user
+    db.refresh(user)
+    if not user.is_active:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or inactive")
     ip = request.client.host if request.client else None
     ua = request.headers.get("user-agent", "")
 
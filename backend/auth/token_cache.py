@@ -0,0 +1,127 @@
+# backend/auth/token_cache.py
+"""
+Per-worker caches behind get_current_user
+
+claims_cache keeps the verified claims of an access token under its jti, so a
+repeat request skips the RS256 signature check. An entry is only used for the
+exact token it was verified from (a digest of the token is stored alongside) and
+never past the token's exp.
+
+user_cache keeps a copy of a user's columns under the user id, so a repeat request
+skips the users query. A hit is rebuilt into an instance attached to the request's
+session without a query (merge(load=False)); relationships still lazy-load. crud
+calls user_cache.invalidate(user.id) after committing a change to a user; other
+workers pick the change up once their entry expires.
+"""
+import copy
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from jose import jwt
+
+from backend import models
+from backend.settings import settings
+
+
+class _TTLCache:
+    def __init__(self, ttl: int, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def _digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+class ClaimsCache(_TTLCache):
+    def lookup(self, token: str) -> Optional[Dict[str, Any]]:
+        """Claims of an already verified, unexpired token; None if it has to be verified"""
+        try:
+            jti = jwt.get_unverified_claims(token).get("jti")
+        except Exception:
+            return None
+        entry = self.get(jti) if isinstance(jti, str) else None
+        if entry is None:
+            return None
+        digest, claims = entry
+        if not hmac.compare_digest(digest, _digest(token)) or claims["exp"] <= time.time():
+            return None
+        return dict(claims)
+
+    def store(self, token: str, claims: Dict[str, Any]) -> None:
+        """Remember claims returned by jwt_utils.decode_token for this token"""
+        jti, exp = claims.get("jti"), claims.get("exp")
+        if not isinstance(jti, str) or not isinstance(exp, (int, float)):
+            return
+        self.set(jti, (_digest(token), dict(claims)), ttl=exp - time.time())
+
+
+_USER_COLUMNS = tuple(attr.key for attr in inspect(models.User).column_attrs)
+
+
+class UserCache(_TTLCache):
+    def __init__(self, ttl: int, max_entries: int):
+        super().__init__(ttl, max_entries)
+        self._generation = 0
+
+    def generation(self) -> int:
+        """Take before loading a user and pass to store(), so a load that raced an invalidation is not cached"""
+        with self._lock:
+            return self._generation
+
+    def lookup(self, db: Session, user_id: Any) -> Optional[models.User]:
+        values = self.get(str(user_id))
+        if values is None:
+            return None
+        user = models.User(**copy.deepcopy(values))
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    def store(self, user: models.User, generation: int) -> None:
+        values = {key: copy.deepcopy(getattr(user, key)) for key in _USER_COLUMNS}
+        with self._lock:
+            if generation == self._generation:
+                self.set(str(user.id), values)
+
+    def invalidate(self, user_id: Any) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(str(user_id), None)
+
+
+claims_cache = ClaimsCache(settings.AUTH_CACHE_TTL_SECONDS, settings.AUTH_CACHE_MAX_ENTRIES)
+user_cache = UserCache(settings.AUTH_CACHE_TTL_SECONDS, settings.AUTH_CACHE_MAX_ENTRIES)
@@ -0,0 +1,154 @@
+"""
+EXPLAIN-based benchmark for the hot query paths (exam start, submission, grading, proctoring)
+
+Run it against a populated database before and after an index change:
+
+    python -m backend.benchmarks.explain_access_paths --save before.json
+    python -m backend.migrate
+    python -m backend.benchmarks.explain_access_paths --save after.json
+    python -m backend.benchmarks.explain_access_paths --compare before.json after.json
+"""
+import argparse
+import json
+import statistics
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+
+from backend.database import engine
+
+# name -> (SQL, sample parameter query). The sample query picks real ids so the
+# planner sees representative selectivity.
+QUERIES = {
+    "student_paper": (
+        """
+        SELECT * FROM student_exam_questions
+        WHERE exam_id = :exam_id AND student_id = :student_id
+        ORDER BY question_order
+        """,
+        """
+        SELECT exam_id, student_id FROM student_exam_questions
+        GROUP BY exam_id, student_id ORDER BY count(*) DESC LIMIT 1
+        """,
+    ),
+    "session_for_submission": (
+        """
+        SELECT * FROM exam_sessions
+        WHERE exam_id = :exam_id AND student_id = :student_id
+        LIMIT 1
+        """,
+        """
+        SELECT exam_id, student_id FROM exam_sessions
+        GROUP BY exam_id, student_id ORDER BY count(*) DESC LIMIT 1
+        """,
+    ),
+    "latest_submissions_for_grading": (
+        """
+        SELECT DISTINCT ON (question_id, student_id) id, question_id, student_id, submitted_at
+        FROM submissions
+        WHERE exam_id = :exam_id
+        ORDER BY question_id, student_id, submitted_at DESC
+        """,
+        """
+        SELECT exam_id FROM submissions GROUP BY exam_id ORDER BY count(*) DESC LIMIT 1
+        """,
+    ),
+    "session_event_timeline": (
+        """
+        SELECT event_type, created_at FROM exam_events
+        WHERE exam_session_id = :exam_session_id
+        ORDER BY created_at DESC
+        LIMIT 100
+        """,
+        """
+        SELECT exam_session_id FROM exam_events
+        GROUP BY exam_session_id ORDER BY count(*) DESC LIMIT 1
+        """,
+    ),
+}
+
+
+def _walk(node: Dict[str, Any], out: List[str]) -> None:
+    label = node["Node Type"]
+    if node.get("Index Name"):
+        label += f" using {node['Index Name']}"
+    elif node.get("Relation Name"):
+        label += f" on {node['Relation Name']}"
+    out.append(label)
+    for child in node.get("Plans", []):
+        _walk(child, out)
+
+
+def explain(name: str, repeat: int) -> Optional[Dict[str, Any]]:
+    sql, sample_sql = QUERIES[name]
+    with engine.connect() as conn:
+        sample = conn.execute(text(sample_sql)).mappings().first()
+        if sample is None:
+            return None
+        timings = []
+        plan = None
+        for _ in range(repeat):
+            row = conn.execute(
+                text("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql), dict(sample)
+            ).scalar()
+            plan = row[0] if isinstance(row, list) else json.loads(row)[0]
+            timings.append(plan["Execution Time"])
+    nodes: List[str] = []
+    _walk(plan["Plan"], nodes)
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "shared_hit": plan["Plan"].get("Shared Hit Blocks", 0),
+        "shared_read": plan["Plan"].get("Shared Read Blocks", 0),
+        "plan": nodes,
+    }
+
+
+def run(repeat: int) -> Dict[str, Any]:
+    results = {}
+    for name in QUERIES:
+        result = explain(name, repeat)
+        results[name] = result
+        if result is None:
+            print(f"{name}: no sample data, skipped")
+            continue
+        print(f"{name}: {result['median_ms']} ms (hit={result['shared_hit']} read={result['shared_read']})")
+        for node in result["plan"]:
+            print(f"    {node}")
+    return results
+
+
+def compare(before_path: str, after_path: str) -> None:
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"{'query':<34}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for name in QUERIES:
+        b, a = before.get(name), after.get(name)
+        if not b or not a:
+            continue
+        speedup = b["median_ms"] / a["median_ms"] if a["median_ms"] else float("inf")
+        print(f"{name:<34}{b['median_ms']:>12}{a['median_ms']:>12}{speedup:>9.1f}x")
+        print(f"    before: {b['plan'][0] if b['plan'] else '-'}")
+        print(f"    after:  {a['plan'][0] if a['plan'] else '-'}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="EXPLAIN ANALYZE runs per query")
+    parser.add_argument("--save", help="write results as JSON to this path")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two saved runs")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = run(args.repeat)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
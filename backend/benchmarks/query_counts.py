@@ -0,0 +1,133 @@
+"""
+Query-count checks for the exam-start read paths
+
+Runs each endpoint's crud loader and its response serialization against the
+configured database and fails when they take more statements than the budget,
+listing every statement, so a lazy load that slips past the eager loading (an
+N+1 per assigned question) is caught. The (exam, student) pair with the most
+assigned questions is used unless one is given:
+
+    python -m backend.benchmarks.query_counts
+    python -m backend.benchmarks.query_counts --exam-id <uuid> --student-id <uuid>
+
+Exits non-zero if any check fails.
+"""
+import argparse
+import asyncio
+import sys
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import Session
+
+from backend import crud, models, schemas
+from backend.database import SessionLocal, engine
+
+
+@contextmanager
+def count_queries(bind: Engine = engine) -> Iterator[List[str]]:
+    """Collect the SQL statements executed on `bind` inside the block"""
+    statements: List[str] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(bind, "before_cursor_execute", _record)
+    try:
+        yield statements
+    finally:
+        event.remove(bind, "before_cursor_execute", _record)
+
+
+@contextmanager
+def assert_max_queries(limit: int, bind: Engine = engine) -> Iterator[List[str]]:
+    """Fail if the block runs more than `limit` statements"""
+    with count_queries(bind) as statements:
+        yield statements
+    if len(statements) > limit:
+        listing = "\n".join(f"  {i + 1}. {sql}" for i, sql in enumerate(statements))
+        raise AssertionError(f"Expected at most {limit} queries, got {len(statements)}:\n{listing}")
+
+
+def _serialize(response_model: Any, content: Any) -> Any:
+    """What FastAPI does with a route's return value: validate against response_model, encode"""
+    field = create_response_field(name="response", type_=response_model)
+    return asyncio.run(serialize_response(field=field, response_content=content, is_coroutine=True))
+
+
+def _questions_with_details(db: Session, user: models.User, exam_id: UUID) -> int:
+    questions = crud.get_exam_questions_for_student(db, student_id=user.id, exam_id=exam_id)
+    _serialize(List[schemas.StudentExamQuestionWithQuestion], questions)
+    return len(questions)
+
+
+def _bootstrap(db: Session, user: models.User, exam_id: UUID) -> int:
+    bootstrap = crud.get_exam_bootstrap(db, exam_id=exam_id, student_id=user.id)
+    if bootstrap is None:
+        raise LookupError(f"Exam {exam_id} not found")
+    _serialize(schemas.ExamBootstrap, {"user": user, **bootstrap})
+    return len(bootstrap["questions"])
+
+
+# name -> (statement budget, check). Each check runs in a fresh session and gets
+# the caller already loaded, as the route does from get_current_user.
+CHECKS: Dict[str, Tuple[int, Callable[[Session, models.User, UUID], int]]] = {
+    "GET /exams/{id}/questions-with-details/": (1, _questions_with_details),
+    "GET /exams/{id}/bootstrap": (2, _bootstrap),
+}
+
+
+def _sample_pair() -> Optional[Tuple[UUID, UUID]]:
+    with engine.connect() as conn:
+        row = conn.execute(text(
+            "SELECT exam_id, student_id FROM student_exam_questions "
+            "GROUP BY exam_id, student_id ORDER BY count(*) DESC LIMIT 1"
+        )).first()
+    return (row.exam_id, row.student_id) if row else None
+
+
+def run(exam_id: UUID, student_id: UUID) -> bool:
+    ok = True
+    for name, (budget, check) in CHECKS.items():
+        db = SessionLocal()
+        try:
+            user = crud.get_user_by_id(db, student_id)
+            if user is None:
+                raise LookupError(f"User {student_id} not found")
+            with assert_max_queries(budget) as statements:
+                rows = check(db, user, exam_id)
+        except (AssertionError, InvalidRequestError) as e:
+            # InvalidRequestError: a lazy load hit raiseload("*")
+            ok = False
+            print(f"FAIL {name}: {e}")
+        else:
+            print(f"ok   {name}: {len(statements)} queries for {rows} questions (budget {budget})")
+        finally:
+            db.close()
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--exam-id", type=UUID)
+    parser.add_argument("--student-id", type=UUID)
+    args = parser.parse_args()
+
+    if args.exam_id and args.student_id:
+        pair = (args.exam_id, args.student_id)
+    else:
+        pair = _sample_pair()
+        if pair is None:
+            print("No assigned questions in the database; nothing to check")
+            return
+    sys.exit(0 if run(*pair) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+CPU cost of serializing large list responses
+
+Compares, per 1,000 rows, FastAPI's default path for ORM rows (response_model
+validation + jsonable_encoder + json.dumps), the same path rendered with orjson,
+and services.fast_json.list_response (row -> dict -> orjson). Rows are transient
+ORM objects, so no database is needed; the outputs are checked to be identical.
+
+    python -m backend.benchmarks.serialization
+    python -m backend.benchmarks.serialization --rows 5000 --repeat 10
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Type
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic import BaseModel
+
+from backend import models, schemas
+from backend.services.fast_json import list_response
+
+
+def _submission_results(count: int) -> List[models.SubmissionResult]:
+    now = datetime.utcnow()
+    return [
+        models.SubmissionResult(
+            id=uuid.uuid4(),
+            submission_id=uuid.uuid4(),
+            judge0_token=uuid.uuid4().hex,
+            status=random.choice(list(models.ExecutionStatus)),
+            stdout="42\n",
+            stderr="",
+            compile_output="",
+            exit_code=0,
+            execution_time=random.random() * 100,
+            memory_used=random.randint(1000, 50000),
+            score=random.randint(0, 10),
+            max_score=10,
+            test_results={
+                "total_tests": 3,
+                "passed_tests": 2,
+                "details": [{"test_case_id": str(uuid.uuid4()), "passed": i != 1, "time": "0.01"} for i in range(3)],
+            },
+            evaluated_at=now,
+            created_at=now,
+            updated_at=now,
+            extra_data={},
+        )
+        for _ in range(count)
+    ]
+
+
+def _exam_events(count: int) -> List[models.ExamEvent]:
+    start = datetime.utcnow()
+    session_id = uuid.uuid4()
+    return [
+        models.ExamEvent(
+            id=uuid.uuid4(),
+            exam_session_id=session_id,
+            event_type=random.choice(list(models.EventType)),
+            event_data={"visible": False, "duration_ms": random.randint(0, 5000)},
+            extra_data={},
+            created_at=start + timedelta(seconds=i),
+        )
+        for i in range(count)
+    ]
+
+
+def _student_exam_questions(count: int) -> List[models.StudentExamQuestion]:
+    now = datetime.utcnow()
+    exam_id = uuid.uuid4()
+    return [
+        models.StudentExamQuestion(
+            id=uuid.uuid4(),
+            exam_id=exam_id,
+            student_id=uuid.uuid4(),
+            question_id=uuid.uuid4(),
+            question_order=i % 5 + 1,
+            points=10,
+            extra_data={},
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+DATASETS: Dict[str, tuple] = {
+    "submission_results": (_submission_results, schemas.SubmissionResult),
+    "exam_events": (_exam_events, schemas.ExamEvent),
+    "student_exam_questions": (_student_exam_questions, schemas.StudentExamQuestion),
+}
+
+
+def _default_path(rows: List[Any], schema: Type[BaseModel], response_class=JSONResponse) -> bytes:
+    field = create_response_field(name="response", type_=List[schema])
+    content = asyncio.run(serialize_response(field=field, response_content=rows, is_coroutine=True))
+    return response_class(content=content).body
+
+
+def _cpu_ms(fn: Callable[[], bytes], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        fn()
+        best = min(best, time.process_time() - start)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    per_thousand = 1000 / args.rows
+    print(f"CPU ms per 1,000 rows (best of {args.repeat}, {args.rows} rows)")
+    print(f"{'dataset':<24}{'default':>10}{'orjson':>10}{'fast path':>11}{'saved':>8}")
+    for name, (make, schema) in DATASETS.items():
+        rows = make(args.rows)
+        assert json.loads(_default_path(rows, schema)) == json.loads(list_response(rows, schema).body), name
+        default = _cpu_ms(lambda: _default_path(rows, schema), args.repeat) * per_thousand
+        orjson_only = _cpu_ms(lambda: _default_path(rows, schema, ORJSONResponse), args.repeat) * per_thousand
+        fast = _cpu_ms(lambda: list_response(rows, schema).body, args.repeat) * per_thousand
+        print(f"{name:<24}{default:>10.1f}{orjson_only:>10.1f}{fast:>11.1f}{1 - fast / default:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,32 @@ CRUD operations for Online Exam System
 Generated from SQLAlchemy models
 """
 
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import and_, delete, func, insert, literal_column, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, contains_eager, joinedload, raiseload
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from typing import Iterator, List, Optional, Sequence
 from uuid import UUID
+from datetime import datetime, timedelta
+import gzip
+import random
 import uuid
 from . import models
 from . import schemas
 from backend.auth.passwords import hash_password
+from backend.auth.token_cache import user_cache
+from backend.services.write_behind import write_behind
+from backend.services.event_counters import record_exam_events
+
+from backend.services.assignment_engine import Candidate, Pool, generate_assignments
+from backend.services.drafts import DraftConflict, apply_ops, diff_ops
+from backend.services.proctoring_stream import proctoring_broker, exam_event_message, session_status_message
+from backend.services.leaderboard import after_cursor, keys_for_submissions, refresh_scores
+from backend.services.question_analytics import analytics_cache
+from backend.services.response_cache import response_cache
+from backend.services.sparse_fields import narrow
+
+write_behind.on_insert(models.ExamEvent, record_exam_events)
 
 # User CRUD operations
 def get_user(db: Session, id: UUID) -> Optional[models.User]:
@@ -37,6 +56,7 @@ def update_user(db: Session, db_obj: models.User, obj_in: schemas.UserUpdate) ->
         setattr(db_obj, field, value)
     db.add(db_obj)
     db.commit()
+    user_cache.invalidate(db_obj.id)
     db.refresh(db_obj)
     return db_obj
 
@@ -45,6 +65,7 @@ def delete_user(db: Session, id: UUID) -> Optional[models.User]:
     if db_obj:
         db.delete(db_obj)
         db.commit()
+        user_cache.invalidate(id)
     return db_obj
 
 # UserSession CRUD operations
@@ -147,16 +168,23 @@ def get_student_exam_questions(db: Session, skip: int = 0, limit: int = 100) ->
 def create_student_exam_question(db: Session, obj_in: schemas.StudentExamQuestionCreate) -> models.StudentExamQuestion:
     db_obj = models.StudentExamQuestion(**obj_in.dict())
     db.add(db_obj)
+    invalidate_exam_papers(db, exam_id=db_obj.exam_id, student_ids=[db_obj.student_id])
     db.commit()
+    analytics_cache.invalidate(db_obj.exam_id)
     db.refresh(db_obj)
     return db_obj
 
 def update_student_exam_question(db: Session, db_obj: models.StudentExamQuestion, obj_in: schemas.StudentExamQuestionUpdate) -> models.StudentExamQuestion:
+    # The assignment may move to another student or exam; both papers change
+    previous = (db_obj.exam_id, db_obj.student_id)
     update_data = obj_in.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_obj, field, value)
     db.add(db_obj)
+    for exam_id, student_id in {previous, (db_obj.exam_id, db_obj.student_id)}:
+        invalidate_exam_papers(db, exam_id=exam_id, student_ids=[student_id])
     db.commit()
+    analytics_cache.invalidate(previous[0], db_obj.exam_id)
     db.refresh(db_obj)
     return db_obj
 
@@ -164,7 +192,9 @@ def delete_student_exam_question(db: Session, id: UUID) -> Optional[models.Stude
     db_obj = db.query(models.StudentExamQuestion).filter(models.StudentExamQuestion.id == id).first()
     if db_obj:
         db.delete(db_obj)
+        invalidate_exam_papers(db, exam_id=db_obj.exam_id, student_ids=[db_obj.student_id])
         db.commit()
+        analytics_cache.invalidate(db_obj.exam_id)
     return db_obj
 
 # TeacherProfile CRUD operations
@@ -208,6 +238,7 @@ def create_question_category(db: Session, obj_in: schemas.QuestionCategoryCreate
     db_obj = models.QuestionCategory(**obj_in.dict())
     db.add(db_obj)
     db.commit()
+    response_cache.invalidate("question-categories")
     db.refresh(db_obj)
     return db_obj
 
@@ -217,27 +248,41 @@ def update_question_category(db: Session, db_obj: models.QuestionCategory, obj_i
         setattr(db_obj, field, value)
     db.add(db_obj)
     db.commit()
+    response_cache.invalidate("question-categories")
     db.refresh(db_obj)
     return db_obj
 
 def delete_question_category(db: Session, id: UUID) -> Optional[models.QuestionCategory]:
     db_obj = db.query(models.QuestionCategory).filter(models.QuestionCategory.id == id).first()
     if db_obj:
+        # The category's questions and their test cases are deleted with it, so
+        # clean up after them as delete_question does
+        invalidate_exam_papers(db, category_id=db_obj.id)
+        score_keys = db.query(
+            models.ExamQuestionScore.exam_id, models.ExamQuestionScore.student_id, models.ExamQuestionScore.question_id,
+        ).join(models.Question, models.Question.id == models.ExamQuestionScore.question_id).filter(
+            models.Question.category_id == id
+        ).all()
         db.delete(db_obj)
+        db.flush()
+        refresh_scores(db, [tuple(key) for key in score_keys])
         db.commit()
+        response_cache.invalidate("question-categories", "questions", "question-test-cases")
+        analytics_cache.invalidate(*{key.exam_id for key in score_keys})
     return db_obj
 
 # Question CRUD operations
-def get_question(db: Session, id: UUID) -> Optional[models.Question]:
-    return db.query(models.Question).filter(models.Question.id == id).first()
+def get_question(db: Session, id: UUID, fields: Optional[Sequence[str]] = None) -> Optional[models.Question]:
+    return narrow(db.query(models.Question), models.Question, fields).filter(models.Question.id == id).first()
 
-def get_questions(db: Session, skip: int = 0, limit: int = 100) -> List[models.Question]:
-    return db.query(models.Question).offset(skip).limit(limit).all()
+def get_questions(db: Session, skip: int = 0, limit: int = 100, fields: Optional[Sequence[str]] = None) -> List[models.Question]:
+    return narrow(db.query(models.Question), models.Question, fields).offset(skip).limit(limit).all()
 
 def create_question(db: Session, obj_in: schemas.QuestionCreate, user_id: UUID) -> models.Question:
     db_obj = models.Question(**obj_in.dict(), created_by=user_id)
     db.add(db_obj)
     db.commit()
+    response_cache.invalidate("questions")
     db.refresh(db_obj)
     return db_obj
 
@@ -246,15 +291,27 @@ def update_question(db: Session, db_obj: models.Question, obj_in: schemas.Questi
     for field, value in update_data.items():
         setattr(db_obj, field, value)
     db.add(db_obj)
+    invalidate_exam_papers(db, question_id=db_obj.id)
     db.commit()
+    response_cache.invalidate("questions")
     db.refresh(db_obj)
     return db_obj
 
 def delete_question(db: Session, id: UUID) -> Optional[models.Question]:
     db_obj = db.query(models.Question).filter(models.Question.id == id).first()
     if db_obj:
+        invalidate_exam_papers(db, question_id=db_obj.id)
+        score_keys = db.query(
+            models.ExamQuestionScore.exam_id, models.ExamQuestionScore.student_id, models.ExamQuestionScore.question_id,
+        ).filter(models.ExamQuestionScore.question_id == id).all()
         db.delete(db_obj)
+        db.flush()
+        # The question's score rows go with it (ON DELETE CASCADE); the exam totals
+        # that included them are recomputed from the remaining questions
+        refresh_scores(db, [tuple(key) for key in score_keys])
         db.commit()
+        response_cache.invalidate("questions", "question-test-cases")
+        analytics_cache.invalidate(*{key.exam_id for key in score_keys})
     return db_obj
 
 # QuestionTestCase CRUD operations
@@ -296,7 +353,9 @@ def get_question_test_case(db: Session, id: UUID):
 def create_question_test_case(db: Session, obj_in: schemas.QuestionTestCaseCreate):
     db_obj = models.QuestionTestCase(**obj_in.dict())
     db.add(db_obj)
+    invalidate_exam_papers(db, question_id=db_obj.question_id)
     db.commit()
+    response_cache.invalidate("question-test-cases")
     db.refresh(db_obj)
     return db_obj
 
@@ -304,7 +363,9 @@ def update_question_test_case(db: Session, db_obj: models.QuestionTestCase, obj_
     for field, value in obj_in.dict(exclude_unset=True).items():
         setattr(db_obj, field, value)
     db.add(db_obj)
+    invalidate_exam_papers(db, question_id=db_obj.question_id)
     db.commit()
+    response_cache.invalidate("question-test-cases")
     db.refresh(db_obj)
     return db_obj
 
@@ -312,7 +373,9 @@ def delete_question_test_case(db: Session, id: UUID):
     db_obj = db.query(models.QuestionTestCase).filter(models.QuestionTestCase.id == id).first()
     if db_obj:
         db.delete(db_obj)
+        invalidate_exam_papers(db, question_id=db_obj.question_id)
         db.commit()
+        response_cache.invalidate("question-test-cases")
     return db_obj
 
 def delete_test_cases_by_question(db: Session, question_id: UUID):
@@ -321,31 +384,41 @@ def delete_test_cases_by_question(db: Session, question_id: UUID):
         return None
     for tc in test_cases:
         db.delete(tc)
+    invalidate_exam_papers(db, question_id=question_id)
     db.commit()
+    response_cache.invalidate("question-test-cases")
     return test_cases
 
 
 # Exam CRUD operations
-def get_exam(db: Session, id: UUID) -> Optional[models.Exam]:
-    return db.query(models.Exam).filter(models.Exam.id == id).first()
+def get_exam(db: Session, id: UUID, fields: Optional[Sequence[str]] = None) -> Optional[models.Exam]:
+    return narrow(db.query(models.Exam), models.Exam, fields).filter(models.Exam.id == id).first()
 
-def get_exams(db: Session, skip: int = 0, limit: int = 100) -> List[models.Exam]:
-    return db.query(models.Exam).offset(skip).limit(limit).all()
+def get_exams(db: Session, skip: int = 0, limit: int = 100, fields: Optional[Sequence[str]] = None) -> List[models.Exam]:
+    return narrow(db.query(models.Exam), models.Exam, fields).offset(skip).limit(limit).all()
 
 def create_exam(db: Session, obj_in: schemas.ExamCreate, user_id: UUID) -> models.Exam:
     db_obj = models.Exam(**obj_in.dict(), created_by=user_id)
     db.add(db_obj)
     db.commit()
+    response_cache.invalidate("exams")
     db.refresh(db_obj)
     return db_obj
 
 def update_exam(db: Session, db_obj: models.Exam, obj_in: schemas.ExamUpdate) -> models.Exam:
     update_data = obj_in.dict(exclude_unset=True)
+    publishing = (
+        update_data.get("status") in PUBLISHED_EXAM_STATUSES
+        and db_obj.status not in PUBLISHED_EXAM_STATUSES
+    )
     for field, value in update_data.items():
         setattr(db_obj, field, value)
     db.add(db_obj)
     db.commit()
+    response_cache.invalidate("exams")
     db.refresh(db_obj)
+    if publishing:
+        materialize_exam_papers(db, exam_id=db_obj.id)
     return db_obj
 
 def delete_exam(db: Session, id: UUID) -> Optional[models.Exam]:
@@ -353,6 +426,7 @@ def delete_exam(db: Session, id: UUID) -> Optional[models.Exam]:
     if db_obj:
         db.delete(db_obj)
         db.commit()
+        response_cache.invalidate("exams")
     return db_obj
 
 # ExamQuestion CRUD operations
@@ -389,8 +463,29 @@ def delete_exam_question(db: Session, id: UUID) -> Optional[models.ExamQuestion]
 def get_exam_registration(db: Session, id: UUID) -> Optional[models.ExamRegistration]:
     return db.query(models.ExamRegistration).filter(models.ExamRegistration.id == id).first()
 
-def get_exam_registrations(db: Session, skip: int = 0, limit: int = 100) -> List[models.ExamRegistration]:
-    return db.query(models.ExamRegistration).offset(skip).limit(limit).all()
+def get_exam_registrations(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    exam_id: Optional[UUID] = None,
+    student_id: Optional[UUID] = None,
+    status: Optional[models.RegistrationStatus] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> List[models.ExamRegistration]:
+    """List registrations, optionally filtered by exam, student, status and registered_at range [since, until)"""
+    query = db.query(models.ExamRegistration)
+    if exam_id is not None:
+        query = query.filter(models.ExamRegistration.exam_id == exam_id)
+    if student_id is not None:
+        query = query.filter(models.ExamRegistration.student_id == student_id)
+    if status is not None:
+        query = query.filter(models.ExamRegistration.status == status)
+    if since is not None:
+        query = query.filter(models.ExamRegistration.registered_at >= since)
+    if until is not None:
+        query = query.filter(models.ExamRegistration.registered_at < until)
+    return query.offset(skip).limit(limit).all()
 
 def create_exam_registration(db: Session, obj_in: schemas.ExamRegistrationCreate) -> models.ExamRegistration:
     db_obj = models.ExamRegistration(**obj_in.dict())
@@ -419,14 +514,36 @@ def delete_exam_registration(db: Session, id: UUID) -> Optional[models.ExamRegis
 def get_exam_session(db: Session, id: UUID) -> Optional[models.ExamSession]:
     return db.query(models.ExamSession).filter(models.ExamSession.id == id).first()
 
-def get_exam_sessions(db: Session, skip: int = 0, limit: int = 100) -> List[models.ExamSession]:
-    return db.query(models.ExamSession).offset(skip).limit(limit).all()
+def get_exam_sessions(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    exam_id: Optional[UUID] = None,
+    student_id: Optional[UUID] = None,
+    status: Optional[models.SessionStatus] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> List[models.ExamSession]:
+    """List exam sessions, optionally filtered by exam, student, status and created_at range [since, until)"""
+    query = db.query(models.ExamSession)
+    if exam_id is not None:
+        query = query.filter(models.ExamSession.exam_id == exam_id)
+    if student_id is not None:
+        query = query.filter(models.ExamSession.student_id == student_id)
+    if status is not None:
+        query = query.filter(models.ExamSession.status == status)
+    if since is not None:
+        query = query.filter(models.ExamSession.created_at >= since)
+    if until is not None:
+        query = query.filter(models.ExamSession.created_at < until)
+    return query.offset(skip).limit(limit).all()
 
 def create_exam_session(db: Session, obj_in: schemas.ExamSessionCreate, student_id: UUID) -> models.ExamSession:
     db_obj = models.ExamSession(exam_id=obj_in.exam_id, student_id=student_id)
     db.add(db_obj)
     db.commit()
     db.refresh(db_obj)
+    proctoring_broker.publish(session_status_message(db_obj))
     return db_obj
 
 def update_exam_session(db: Session, db_obj: models.ExamSession, obj_in: schemas.ExamSessionUpdate) -> models.ExamSession:
@@ -436,8 +553,38 @@ def update_exam_session(db: Session, db_obj: models.ExamSession, obj_in: schemas
     db.add(db_obj)
     db.commit()
     db.refresh(db_obj)
+    if "status" in update_data:
+        proctoring_broker.publish(session_status_message(db_obj))
     return db_obj
 
+def touch_exam_session(db: Session, session_token: UUID, min_interval: float) -> Optional[bool]:
+    """
+    Heartbeat: set last_activity_at on the active session with this token, in one
+    UPDATE that skips rows touched within min_interval seconds and leaves updated_at alone.
+    Returns True if written, False if skipped as recent, None if no active session matches.
+    """
+    active = (
+        models.ExamSession.session_token == session_token,
+        models.ExamSession.status == models.SessionStatus.ACTIVE,
+    )
+    stmt = (
+        update(models.ExamSession)
+        .where(
+            *active,
+            or_(
+                models.ExamSession.last_activity_at.is_(None),
+                models.ExamSession.last_activity_at < func.now() - timedelta(seconds=min_interval),
+            ),
+        )
+        .values(last_activity_at=func.now(), updated_at=models.ExamSession.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    result = db.execute(stmt)
+    db.commit()
+    if result.rowcount:
+        return True
+    return False if db.query(models.ExamSession.id).filter(*active).first() else None
+
 def delete_exam_session(db: Session, id: UUID) -> Optional[models.ExamSession]:
     db_obj = db.query(models.ExamSession).filter(models.ExamSession.id == id).first()
     if db_obj:
@@ -445,12 +592,113 @@ def delete_exam_session(db: Session, id: UUID) -> Optional[models.ExamSession]:
         db.commit()
     return db_obj
 
+# CodeDraft CRUD operations
+def get_code_draft(db: Session, exam_session_id: UUID, question_id: UUID) -> Optional[models.CodeDraft]:
+    return db.query(models.CodeDraft).filter(
+        models.CodeDraft.exam_session_id == exam_session_id,
+        models.CodeDraft.question_id == question_id,
+    ).first()
+
+def save_code_draft(
+    db: Session, exam_session_id: UUID, question_id: UUID, obj_in: schemas.CodeDraftSave
+) -> models.CodeDraft:
+    """
+    Store a new draft version from full content or splice ops. The change is kept as a
+    delta in the draft's history. Raises DraftConflict if base_version is stale and
+    ValueError if the ops do not fit the stored content.
+    """
+    draft_filter = (models.CodeDraft.exam_session_id == exam_session_id, models.CodeDraft.question_id == question_id)
+    diffed = None
+    if obj_in.ops is None:
+        # Diff full content against an unlocked read, so the row lock below is
+        # not held while diffing; it is redone under the lock only if the
+        # version moved in between
+        snapshot = db.query(models.CodeDraft.content, models.CodeDraft.version).filter(*draft_filter).first()
+        diffed = (snapshot.version, diff_ops(snapshot.content, obj_in.content)) if snapshot else (0, diff_ops("", obj_in.content))
+
+    db_obj = db.query(models.CodeDraft).filter(*draft_filter).with_for_update().first()
+    current_version = db_obj.version if db_obj else 0
+    if obj_in.base_version is not None and obj_in.base_version != current_version:
+        db.rollback()
+        raise DraftConflict(current_version)
+
+    old_content = db_obj.content if db_obj else ""
+    if obj_in.ops is not None:
+        ops = [op.dict() for op in obj_in.ops]
+        try:
+            new_content = apply_ops(old_content, ops)
+        except ValueError:
+            db.rollback()
+            raise
+    else:
+        new_content = obj_in.content
+        diffed_version, ops = diffed
+        if diffed_version != current_version:
+            ops = diff_ops(old_content, new_content)
+
+    if db_obj is None:
+        db_obj = models.CodeDraft(
+            exam_session_id=exam_session_id,
+            question_id=question_id,
+            language=obj_in.language,
+            content=new_content,
+            version=1,
+            base_content="",
+            base_version=0,
+            history=[{"version": 1, "ops": ops}],
+        )
+        db.add(db_obj)
+    elif ops or (obj_in.language and obj_in.language != db_obj.language):
+        db_obj.content = new_content
+        db_obj.version += 1
+        db_obj.history = list(db_obj.history or []) + [{"version": db_obj.version, "ops": ops}]
+        if obj_in.language:
+            db_obj.language = obj_in.language
+    else:
+        # Nothing changed: no new version, no write
+        db.rollback()
+        return db_obj
+
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another request created the draft first
+        db.rollback()
+        existing = get_code_draft(db, exam_session_id, question_id)
+        raise DraftConflict(existing.version if existing else 0)
+    db.refresh(db_obj)
+    return db_obj
+
 # Submission CRUD operations
 def get_submission(db: Session, id: UUID) -> Optional[models.Submission]:
     return db.query(models.Submission).filter(models.Submission.id == id).first()
 
-def get_submissions(db: Session, skip: int = 0, limit: int = 100) -> List[models.Submission]:
-    return db.query(models.Submission).offset(skip).limit(limit).all()
+def get_submissions(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    exam_id: Optional[UUID] = None,
+    student_id: Optional[UUID] = None,
+    question_id: Optional[UUID] = None,
+    status: Optional[models.SubmissionStatus] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> List[models.Submission]:
+    """List submissions, optionally filtered by exam, student, question, status and submitted_at range [since, until)"""
+    query = db.query(models.Submission)
+    if exam_id is not None:
+        query = query.filter(models.Submission.exam_id == exam_id)
+    if student_id is not None:
+        query = query.filter(models.Submission.student_id == student_id)
+    if question_id is not None:
+        query = query.filter(models.Submission.question_id == question_id)
+    if status is not None:
+        query = query.filter(models.Submission.status == status)
+    if since is not None:
+        query = query.filter(models.Submission.submitted_at >= since)
+    if until is not None:
+        query = query.filter(models.Submission.submitted_at < until)
+    return query.offset(skip).limit(limit).all()
 
 # exam_session_id: UUID
 def create_submission(db: Session, obj_in: schemas.SubmissionCreate, student_id: UUID) -> models.Submission:
@@ -463,55 +711,106 @@ def create_submission(db: Session, obj_in: schemas.SubmissionCreate, student_id:
     db_obj = models.Submission(**obj_in.dict(exclude={"student_id"}), student_id=student_id)
     db.add(db_obj)
     db.commit()
+    analytics_cache.invalidate(db_obj.exam_id)
     db.refresh(db_obj)
     return db_obj
 
 def update_submission(db: Session, db_obj: models.Submission, obj_in: schemas.SubmissionUpdate) -> models.Submission:
+    exam_ids = {db_obj.exam_id}
     update_data = obj_in.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_obj, field, value)
+    exam_ids.add(db_obj.exam_id)
     db.add(db_obj)
     db.commit()
+    analytics_cache.invalidate(*exam_ids)
     db.refresh(db_obj)
     return db_obj
 
 def delete_submission(db: Session, id: UUID) -> Optional[models.Submission]:
     db_obj = db.query(models.Submission).filter(models.Submission.id == id).first()
     if db_obj:
+        score_key = (db_obj.exam_id, db_obj.student_id, db_obj.question_id)
         db.delete(db_obj)
+        db.flush()
+        refresh_scores(db, [score_key])
         db.commit()
+        analytics_cache.invalidate(score_key[0])
     return db_obj
 
 # SubmissionResult CRUD operations
 def get_submission_result(db: Session, id: UUID) -> Optional[models.SubmissionResult]:
     return db.query(models.SubmissionResult).filter(models.SubmissionResult.id == id).first()
 
-def get_submission_results(db: Session, skip: int = 0, limit: int = 100) -> List[models.SubmissionResult]:
-    return db.query(models.SubmissionResult).offset(skip).limit(limit).all()
-
-def get_submissions_by_exam_id(db: Session, exam_id: UUID, skip: int = 0, limit: int = 100) -> List[models.Submission]:
-    return (
-        db.query(models.Submission)
-        .filter(models.ExamSession.exam_id == exam_id)
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+def get_submission_results(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    submission_id: Optional[UUID] = None,
+    status: Optional[models.ExecutionStatus] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    fields: Optional[Sequence[str]] = None,
+) -> List[models.SubmissionResult]:
+    """List submission results, optionally filtered by submission, status and evaluated_at range [since, until)"""
+    query = narrow(db.query(models.SubmissionResult), models.SubmissionResult, fields)
+    if submission_id is not None:
+        query = query.filter(models.SubmissionResult.submission_id == submission_id)
+    if status is not None:
+        query = query.filter(models.SubmissionResult.status == status)
+    if since is not None:
+        query = query.filter(models.SubmissionResult.evaluated_at >= since)
+    if until is not None:
+        query = query.filter(models.SubmissionResult.evaluated_at < until)
+    return query.offset(skip).limit(limit).all()
+
+def _submissions_by_exam_query(db: Session, exam_id: UUID, latest_only: bool = False):
+    query = db.query(models.Submission).filter(models.Submission.exam_id == exam_id)
+    if latest_only:
+        # DISTINCT ON keeps the first row of each (question, student) group,
+        # so ordering by submitted_at DESC within the group yields the latest attempt
+        return query.distinct(
+            models.Submission.question_id, models.Submission.student_id
+        ).order_by(
+            models.Submission.question_id,
+            models.Submission.student_id,
+            models.Submission.submitted_at.desc(),
+            models.Submission.attempt_number.desc(),
+        )
+    return query.order_by(models.Submission.submitted_at, models.Submission.id)
+
+def get_submissions_by_exam_id(db: Session, exam_id: UUID, skip: int = 0, limit: int = 100, latest_only: bool = False) -> List[models.Submission]:
+    """Get a page of submissions for an exam, optionally only the latest attempt per (student, question)"""
+    return _submissions_by_exam_query(db, exam_id, latest_only=latest_only).offset(skip).limit(limit).all()
+
+def iter_submissions_by_exam_id(db: Session, exam_id: UUID, latest_only: bool = False, batch_size: int = 500) -> Iterator[models.Submission]:
+    """Stream all submissions for an exam in batches instead of materializing one large list"""
+    yield from _submissions_by_exam_query(db, exam_id, latest_only=latest_only).yield_per(batch_size)
 
 
 def create_submission_result(db: Session, obj_in: schemas.SubmissionResultCreate) -> models.SubmissionResult:
     db_obj = models.SubmissionResult(**obj_in.dict())
     db.add(db_obj)
+    db.flush()
+    score_keys = keys_for_submissions(db, [db_obj.submission_id])
+    refresh_scores(db, score_keys)
     db.commit()
+    analytics_cache.invalidate(*{key[0] for key in score_keys})
     db.refresh(db_obj)
     return db_obj
 
 def update_submission_result(db: Session, db_obj: models.SubmissionResult, obj_in: schemas.SubmissionResultUpdate) -> models.SubmissionResult:
+    submission_ids = {db_obj.submission_id}
     update_data = obj_in.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_obj, field, value)
     db.add(db_obj)
+    db.flush()
+    submission_ids.add(db_obj.submission_id)
+    score_keys = keys_for_submissions(db, submission_ids)
+    refresh_scores(db, score_keys)
     db.commit()
+    analytics_cache.invalidate(*{key[0] for key in score_keys})
     db.refresh(db_obj)
     return db_obj
 
@@ -519,7 +818,11 @@ def delete_submission_result(db: Session, id: UUID) -> Optional[models.Submissio
     db_obj = db.query(models.SubmissionResult).filter(models.SubmissionResult.id == id).first()
     if db_obj:
         db.delete(db_obj)
+        db.flush()
+        score_keys = keys_for_submissions(db, [db_obj.submission_id])
+        refresh_scores(db, score_keys)
         db.commit()
+        analytics_cache.invalidate(*{key[0] for key in score_keys})
     return db_obj
 
 # SubmissionEvent CRUD operations
@@ -530,6 +833,9 @@ def get_submission_events(db: Session, skip: int = 0, limit: int = 100) -> List[
     return db.query(models.SubmissionEvent).offset(skip).limit(limit).all()
 
 def create_submission_event(db: Session, obj_in: schemas.SubmissionEventCreate) -> models.SubmissionEvent:
+    """Append-only: queued on the write-behind buffer when it is running"""
+    if write_behind.running:
+        return write_behind.submit(models.SubmissionEvent, obj_in.dict())
     db_obj = models.SubmissionEvent(**obj_in.dict())
     db.add(db_obj)
     db.commit()
@@ -556,16 +862,95 @@ def delete_submission_event(db: Session, id: UUID) -> Optional[models.Submission
 def get_exam_event(db: Session, id: UUID) -> Optional[models.ExamEvent]:
     return db.query(models.ExamEvent).filter(models.ExamEvent.id == id).first()
 
-def get_exam_events(db: Session, skip: int = 0, limit: int = 100) -> List[models.ExamEvent]:
-    return db.query(models.ExamEvent).offset(skip).limit(limit).all()
+def get_exam_events(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    exam_session_id: Optional[UUID] = None,
+    event_type: Optional[models.EventType] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> List[models.ExamEvent]:
+    """List exam events, optionally filtered by session, event type and created_at range [since, until)"""
+    query = db.query(models.ExamEvent)
+    if exam_session_id is not None:
+        query = query.filter(models.ExamEvent.exam_session_id == exam_session_id)
+    if event_type is not None:
+        query = query.filter(models.ExamEvent.event_type == event_type)
+    if since is not None:
+        query = query.filter(models.ExamEvent.created_at >= since)
+    if until is not None:
+        query = query.filter(models.ExamEvent.created_at < until)
+    return query.offset(skip).limit(limit).all()
 
 def create_exam_event(db: Session, obj_in: schemas.ExamEventCreate) -> models.ExamEvent:
-    db_obj = models.ExamEvent(**obj_in.dict())
-    db.add(db_obj)
-    db.commit()
-    db.refresh(db_obj)
+    """Append-only: queued on the write-behind buffer when it is running"""
+    if write_behind.running:
+        db_obj = write_behind.submit(models.ExamEvent, obj_in.dict())
+    else:
+        db_obj = models.ExamEvent(**obj_in.dict())
+        db.add(db_obj)
+        db.flush()
+        record_exam_events(db, [{
+            "exam_session_id": db_obj.exam_session_id,
+            "event_type": db_obj.event_type,
+            "created_at": db_obj.created_at,
+        }])
+        db.commit()
+        db.refresh(db_obj)
+    _publish_exam_events(db, [db_obj])
     return db_obj
 
+def _publish_exam_events(db: Session, events: List[models.ExamEvent]) -> None:
+    if not proctoring_broker.active:
+        return
+    for event in events:
+        exam_id = proctoring_broker.exam_id_for_session(db, event.exam_session_id)
+        if exam_id is not None:
+            proctoring_broker.publish(exam_event_message(exam_id, event))
+
+def create_exam_events_batch(
+    db: Session, exam_session_id: UUID, events: List[schemas.ExamEventBatchItem]
+) -> List[UUID]:
+    """
+    Insert events in one multi-row statement; returns the ids that were new (already stored ids are skipped).
+    created_at is the client's occurred_at, clamped to the server clock so a fast client
+    clock cannot date events into the future; the client value is kept in
+    event_data["client_occurred_at"].
+    """
+    now = datetime.utcnow()
+    rows = {}
+    for event in events:
+        rows.setdefault(event.id, {
+            "id": event.id,
+            "exam_session_id": exam_session_id,
+            "event_type": event.event_type,
+            "event_data": {**(event.event_data or {}), "client_occurred_at": event.occurred_at.isoformat()},
+            "extra_data": event.extra_data or {},
+            "created_at": min(event.occurred_at, now),
+        })
+    # A clamped created_at differs between retries, so the (id, created_at) conflict
+    # target alone would not catch a resent event; skip ids already stored
+    stored = db.query(models.ExamEvent.id).filter(
+        models.ExamEvent.exam_session_id == exam_session_id,
+        models.ExamEvent.id.in_(list(rows)),
+    ).all()
+    for (event_id,) in stored:
+        rows.pop(event_id, None)
+    if not rows:
+        return []
+    stmt = (
+        pg_insert(models.ExamEvent)
+        .values(list(rows.values()))
+        .on_conflict_do_nothing(index_elements=["id", "created_at"])
+        .returning(models.ExamEvent.exam_session_id, models.ExamEvent.event_type, models.ExamEvent.created_at, models.ExamEvent.id)
+    )
+    inserted = db.execute(stmt).mappings().all()
+    record_exam_events(db, inserted)
+    db.commit()
+    _publish_exam_events(db, [models.ExamEvent(**rows[row["id"]]) for row in inserted])
+    return [row["id"] for row in inserted]
+
 def update_exam_event(db: Session, db_obj: models.ExamEvent, obj_in: schemas.ExamEventUpdate) -> models.ExamEvent:
     update_data = obj_in.dict(exclude_unset=True)
     for field, value in update_data.items():
@@ -582,6 +967,17 @@ def delete_exam_event(db: Session, id: UUID) -> Optional[models.ExamEvent]:
         db.commit()
     return db_obj
 
+# Proctoring summary
+def get_exam_event_counters(db: Session, exam_id: UUID) -> List[tuple]:
+    """Per-session event counters for an exam as (counter, student_id) rows, ordered by session"""
+    return (
+        db.query(models.ExamSessionEventCounter, models.ExamSession.student_id)
+        .join(models.ExamSession, models.ExamSession.id == models.ExamSessionEventCounter.exam_session_id)
+        .filter(models.ExamSessionEventCounter.exam_id == exam_id)
+        .order_by(models.ExamSessionEventCounter.exam_session_id, models.ExamSessionEventCounter.event_type)
+        .all()
+    )
+
 # AuditLog CRUD operations
 def get_audit_log(db: Session, id: UUID) -> Optional[models.AuditLog]:
     return db.query(models.AuditLog).filter(models.AuditLog.id == id).first()
@@ -590,6 +986,7 @@ def get_audit_logs(db: Session, skip: int = 0, limit: int = 100) -> List[models.
     return db.query(models.AuditLog).offset(skip).limit(limit).all()
 
 def create_audit_log(db: Session, obj_in: schemas.AuditLogCreate) -> models.AuditLog:
+    """Always written synchronously: an audit entry must not be lost after the action it records"""
     db_obj = models.AuditLog(**obj_in.dict())
     db.add(db_obj)
     db.commit()
@@ -627,13 +1024,198 @@ def get_students_for_exam(db: Session, exam_id: UUID) -> List[models.StudentExam
 
 def get_exam_questions_for_student(db: Session, student_id: UUID, exam_id: UUID) -> List[models.StudentExamQuestion]:
     """Get questions assigned to a student for a specific exam with full question details"""
+    # The joined Question populates .question directly; any other lazy load raises
+    # instead of silently issuing one query per row during serialization
     return db.query(models.StudentExamQuestion).join(
         models.Question
+    ).options(
+        contains_eager(models.StudentExamQuestion.question),
+        raiseload("*"),
     ).filter(
         models.StudentExamQuestion.student_id == student_id,
         models.StudentExamQuestion.exam_id == exam_id
     ).order_by(models.StudentExamQuestion.question_order).all()
 
+def _assignments_with_samples(
+    db: Session, exam_id: UUID, student_id: Optional[UUID] = None
+) -> List[models.StudentExamQuestion]:
+    """Assignments with their question and sample (non-hidden) test cases joined-eager-loaded"""
+    query = (
+        db.query(models.StudentExamQuestion)
+        .options(
+            joinedload(models.StudentExamQuestion.question, innerjoin=True).joinedload(
+                models.Question.test_cases.and_(
+                    models.QuestionTestCase.is_sample.is_(True),
+                    models.QuestionTestCase.is_hidden.is_(False),
+                )
+            ),
+            raiseload("*"),
+        )
+        .filter(models.StudentExamQuestion.exam_id == exam_id)
+    )
+    if student_id is not None:
+        query = query.filter(models.StudentExamQuestion.student_id == student_id)
+    return query.order_by(models.StudentExamQuestion.student_id, models.StudentExamQuestion.question_order).all()
+
+def get_exam_bootstrap(db: Session, exam_id: UUID, student_id: UUID) -> Optional[dict]:
+    """
+    Everything a student needs to open an exam, in two queries: the exam with the
+    student's registration and latest session (outer joins), then the assigned
+    questions with their sample test cases eager-loaded.
+    """
+    row = (
+        db.query(models.Exam, models.ExamRegistration, models.ExamSession)
+        .outerjoin(
+            models.ExamRegistration,
+            and_(models.ExamRegistration.exam_id == models.Exam.id, models.ExamRegistration.student_id == student_id),
+        )
+        .outerjoin(
+            models.ExamSession,
+            and_(models.ExamSession.exam_id == models.Exam.id, models.ExamSession.student_id == student_id),
+        )
+        .filter(models.Exam.id == exam_id)
+        .order_by(models.ExamSession.created_at.desc().nullslast())
+        .first()
+    )
+    if row is None:
+        return None
+    exam, registration, session = row
+
+    questions = _assignments_with_samples(db, exam_id=exam_id, student_id=student_id)
+    return {"exam": exam, "registration": registration, "session": session, "questions": questions}
+
+# Leaderboard operations
+def get_exam_leaderboard(
+    db: Session,
+    exam_id: UUID,
+    limit: int = 50,
+    after: Optional[tuple] = None,
+) -> List[tuple]:
+    """
+    One leaderboard page of (ExamScore, StudentProfile or None) rows in rank order,
+    starting after the (total_score, last_accepted_at, student_id) of a previous page
+    """
+    query = (
+        db.query(models.ExamScore, models.StudentProfile)
+        .outerjoin(models.StudentProfile, models.StudentProfile.user_id == models.ExamScore.student_id)
+        .filter(models.ExamScore.exam_id == exam_id)
+    )
+    if after is not None:
+        query = query.filter(after_cursor(*after))
+    return query.order_by(
+        models.ExamScore.total_score.desc(),
+        models.ExamScore.last_accepted_at,
+        models.ExamScore.student_id,
+    ).limit(limit).all()
+
+def get_exam_question_scores(db: Session, exam_id: UUID, student_ids: List[UUID]) -> List[models.ExamQuestionScore]:
+    """Per-question best scores for the students on one leaderboard page"""
+    if not student_ids:
+        return []
+    return db.query(models.ExamQuestionScore).filter(
+        models.ExamQuestionScore.exam_id == exam_id,
+        models.ExamQuestionScore.student_id.in_(student_ids),
+    ).order_by(models.ExamQuestionScore.student_id, models.ExamQuestionScore.question_id).all()
+
+# ExamPaper operations
+# Statuses in which an exam counts as published; papers are materialized on entering them
+PUBLISHED_EXAM_STATUSES = (models.ExamStatus.SCHEDULED, models.ExamStatus.ACTIVE)
+
+def materialize_exam_papers(db: Session, exam_id: UUID, student_id: Optional[UUID] = None, chunk_size: int = 200) -> int:
+    """Build and store the gzip-compressed JSON paper of every (or one) assigned student; returns papers written"""
+    # Taken before reading the assignments: an invalidation committed earlier is
+    # seen by the read, and one still in flight waits for this upsert and then
+    # clears it, so a stale paper is never left in place
+    _lock_exam_papers(db, exam_id, shared=True)
+    by_student = {}
+    for assignment in _assignments_with_samples(db, exam_id=exam_id, student_id=student_id):
+        by_student.setdefault(assignment.student_id, []).append(assignment)
+    if not by_student:
+        return 0
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            "exam_id": exam_id,
+            "student_id": paper_student_id,
+            "version": 1,
+            "payload": gzip.compress(
+                schemas.ExamPaperContent(exam_id=exam_id, student_id=paper_student_id, questions=assignments)
+                .json(separators=(",", ":"))
+                .encode(),
+                mtime=0,
+            ),
+            "materialized_at": now,
+        }
+        for paper_student_id, assignments in by_student.items()
+    ]
+    table = models.ExamPaper.__table__
+    for start in range(0, len(rows), chunk_size):
+        stmt = pg_insert(table).values(rows[start:start + chunk_size])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.exam_id, table.c.student_id],
+            set_={
+                "version": table.c.version + 1,
+                "payload": stmt.excluded.payload,
+                "materialized_at": stmt.excluded.materialized_at,
+            },
+        ))
+    db.commit()
+    return len(rows)
+
+def get_exam_paper(db: Session, exam_id: UUID, student_id: UUID) -> Optional[models.ExamPaper]:
+    """Stored paper for a student, rebuilt first if it is missing or was invalidated"""
+    query = db.query(models.ExamPaper).filter(
+        models.ExamPaper.exam_id == exam_id,
+        models.ExamPaper.student_id == student_id,
+    )
+    paper = query.first()
+    if paper is None or paper.payload is None:
+        if not materialize_exam_papers(db, exam_id=exam_id, student_id=student_id):
+            return None
+        paper = query.populate_existing().first()
+    return paper
+
+def _lock_exam_papers(db: Session, exam_id: Optional[UUID], shared: bool = False) -> None:
+    """
+    Transaction-scoped advisory lock ordering paper rebuilds (shared) against
+    invalidations (exclusive). Invalidations not scoped to one exam, such as a
+    question edit, take the lock that covers every exam.
+    """
+    keys = ["exam-papers"] if exam_id is None else [f"exam-papers:{exam_id}"]
+    if shared:
+        keys = ["exam-papers", f"exam-papers:{exam_id}"]
+    lock = func.pg_advisory_xact_lock_shared if shared else func.pg_advisory_xact_lock
+    for key in keys:
+        db.execute(select(lock(func.hashtextextended(key, 0))))
+
+def invalidate_exam_papers(
+    db: Session,
+    exam_id: Optional[UUID] = None,
+    student_ids: Optional[List[UUID]] = None,
+    question_id: Optional[UUID] = None,
+    category_id: Optional[UUID] = None,
+) -> None:
+    """Clear the stored papers affected by an assignment, question or category change, in the caller's transaction"""
+    _lock_exam_papers(db, exam_id)
+    stmt = update(models.ExamPaper).values(payload=None).execution_options(synchronize_session=False)
+    if question_id is not None or category_id is not None:
+        stmt = stmt.where(
+            models.ExamPaper.exam_id == models.StudentExamQuestion.exam_id,
+            models.ExamPaper.student_id == models.StudentExamQuestion.student_id,
+        )
+    if question_id is not None:
+        stmt = stmt.where(models.StudentExamQuestion.question_id == question_id)
+    if category_id is not None:
+        stmt = stmt.where(models.StudentExamQuestion.question_id.in_(
+            select(models.Question.id).where(models.Question.category_id == category_id)
+        ))
+    if exam_id is not None:
+        stmt = stmt.where(models.ExamPaper.exam_id == exam_id)
+    if student_ids is not None:
+        stmt = stmt.where(models.ExamPaper.student_id.in_(student_ids))
+    db.execute(stmt)
+
 def get_student_exam_questions_by_exam(db: Session, exam_id: UUID) -> List[models.StudentExamQuestion]:
     """Get all question assignments for a specific exam"""
     return db.query(models.StudentExamQuestion).filter(
@@ -643,6 +1225,75 @@ def get_student_exam_questions_by_exam(db: Session, exam_id: UUID) -> List[model
         models.StudentExamQuestion.question_order
     ).all()
 
+def generate_exam_assignments(db: Session, exam: models.Exam, obj_in: schemas.GenerateAssignmentsRequest) -> dict:
+    """
+    Draw questions for each student from the requested pools (see services.assignment_engine)
+    and write all rows in one bulk insert. Candidates are the exam's own questions when it
+    has any, otherwise every active question. Students who already have assignments are
+    skipped unless replace_existing is set. Raises AssignmentError if a pool is too small.
+    """
+    seed = obj_in.seed if obj_in.seed is not None else random.SystemRandom().randrange(2 ** 31)
+
+    # Concurrent runs for the same exam would both see a student as unassigned and
+    # draw two question sets; the second run waits here and then skips them
+    db.execute(select(func.pg_advisory_xact_lock(func.hashtextextended(f"exam-assignments:{exam.id}", 0))))
+
+    if obj_in.student_ids is not None:
+        student_ids = list(dict.fromkeys(obj_in.student_ids))
+    else:
+        student_ids = [row.student_id for row in db.query(models.ExamRegistration.student_id).filter(
+            models.ExamRegistration.exam_id == exam.id,
+            models.ExamRegistration.status.notin_([models.RegistrationStatus.REJECTED, models.RegistrationStatus.CANCELLED]),
+        ).order_by(models.ExamRegistration.student_id)]
+
+    exam_questions = (
+        db.query(models.Question.id, models.Question.category_id, models.Question.difficulty, models.ExamQuestion.points)
+        .join(models.ExamQuestion, models.ExamQuestion.question_id == models.Question.id)
+        .filter(models.ExamQuestion.exam_id == exam.id)
+        .all()
+    )
+    rows = exam_questions or (
+        db.query(models.Question.id, models.Question.category_id, models.Question.difficulty, models.Question.max_score)
+        .filter(models.Question.is_active.is_(True))
+        .all()
+    )
+    candidates = [Candidate(question_id, category_id, difficulty, points) for question_id, category_id, difficulty, points in rows]
+
+    existing = {row.student_id for row in db.query(models.StudentExamQuestion.student_id).filter(
+        models.StudentExamQuestion.exam_id == exam.id,
+        models.StudentExamQuestion.student_id.in_(student_ids),
+    ).distinct()}
+    if obj_in.replace_existing:
+        targets = student_ids
+    else:
+        targets = [student_id for student_id in student_ids if student_id not in existing]
+
+    pools = [Pool(count=p.count, category_id=p.category_id, difficulty=p.difficulty, points=p.points) for p in obj_in.pools]
+    assignments = generate_assignments(exam.id, targets, pools, candidates, seed=seed, shuffle=bool(exam.shuffle_questions))
+
+    if obj_in.replace_existing and existing:
+        db.execute(
+            delete(models.StudentExamQuestion)
+            .where(
+                models.StudentExamQuestion.exam_id == exam.id,
+                models.StudentExamQuestion.student_id.in_(existing),
+            )
+            .execution_options(synchronize_session=False)
+        )
+    if assignments:
+        db.execute(insert(models.StudentExamQuestion), assignments)
+    if targets:
+        invalidate_exam_papers(db, exam_id=exam.id, student_ids=targets)
+    db.commit()
+    analytics_cache.invalidate(exam.id)
+    return {
+        "exam_id": exam.id,
+        "seed": seed,
+        "students_assigned": len(targets),
+        "students_skipped": len(student_ids) - len(targets),
+        "assignments_created": len(assignments),
+    }
+
 def assign_question_to_student(db: Session, exam_id: UUID, student_id: UUID, question_id: UUID, question_order: int, points: int = 0) -> models.StudentExamQuestion:
     """Assign a question to a student for an exam"""
     db_obj = models.StudentExamQuestion(
@@ -653,25 +1304,81 @@ def assign_question_to_student(db: Session, exam_id: UUID, student_id: UUID, que
         points=points
     )
     db.add(db_obj)
+    invalidate_exam_papers(db, exam_id=exam_id, student_ids=[student_id])
     db.commit()
+    analytics_cache.invalidate(exam_id)
     db.refresh(db_obj)
     return db_obj
 
-def bulk_assign_questions_to_students(db: Session, assignments: List[dict]) -> List[models.StudentExamQuestion]:
+def bulk_assign_questions_to_students(
+    db: Session, assignments: List[dict], on_conflict: str = "skip", chunk_size: int = 1000
+) -> dict:
     """Bulk assign questions to students
     assignments format: [{'exam_id': UUID, 'student_id': UUID, 'question_id': UUID, 'question_order': int, 'points': int}, ...]
+    Rows go in chunked INSERT ... ON CONFLICT ON CONSTRAINT uq_student_exam_question RETURNING.
+    With on_conflict="skip" existing assignments are left alone; with "update" their order and points
+    are overwritten. Returns inserted/updated/skipped counts and the written rows.
     """
-    db_objects = []
+    # Last occurrence wins for repeated (exam, student, question) keys; a single
+    # statement may not upsert the same row twice
+    unique = {}
     for assignment in assignments:
-        db_obj = models.StudentExamQuestion(**assignment)
-        db.add(db_obj)
-        db_objects.append(db_obj)
-    
+        unique[(assignment["exam_id"], assignment["student_id"], assignment["question_id"])] = assignment
+
+    table = models.StudentExamQuestion.__table__
+    now = datetime.utcnow()
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "exam_id": assignment["exam_id"],
+            "student_id": assignment["student_id"],
+            "question_id": assignment["question_id"],
+            "question_order": assignment["question_order"],
+            "points": assignment.get("points") or 0,
+            "extra_data": {},
+            "created_at": now,
+            "updated_at": now,
+        }
+        for assignment in unique.values()
+    ]
+
+    inserted, updated, written = 0, 0, []
+    for start in range(0, len(rows), chunk_size):
+        stmt = pg_insert(table).values(rows[start:start + chunk_size])
+        if on_conflict == "update":
+            stmt = stmt.on_conflict_do_update(
+                constraint="uq_student_exam_question",
+                set_={
+                    "question_order": stmt.excluded.question_order,
+                    "points": stmt.excluded.points,
+                    "updated_at": func.now(),
+                },
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(constraint="uq_student_exam_question")
+        # xmax is 0 only for freshly inserted row versions
+        stmt = stmt.returning(*table.c, literal_column("xmax = 0").label("was_inserted"))
+        for row in db.execute(stmt).mappings():
+            if row["was_inserted"]:
+                inserted += 1
+            else:
+                updated += 1
+            written.append(row)
+
+    affected = {}
+    for row in written:
+        affected.setdefault(row["exam_id"], set()).add(row["student_id"])
+    for exam_id, student_ids in affected.items():
+        invalidate_exam_papers(db, exam_id=exam_id, student_ids=list(student_ids))
     db.commit()
-    for obj in db_objects:
-        db.refresh(obj)
-    
-    return db_objects
+    analytics_cache.invalidate(*affected)
+
+    return {
+        "inserted": inserted,
+        "updated": updated,
+        "skipped": len(assignments) - inserted - updated,
+        "assignments": written,
+    }
 
 # --- append these helper functions to backend/crud.py ---
 
@@ -695,6 +1402,7 @@ def update_user_password(db: Session, user: models.User, new_password_hash: str)
     user.password_hash = new_password_hash
     db.add(user)
     db.commit()
+    user_cache.invalidate(user.id)
     db.refresh(user)
     return user
 
@@ -706,6 +1414,7 @@ def set_user_refresh_jti(db: Session, user: models.User, jti: str):
     user.extra_data = d
     db.add(user)
     db.commit()
+    user_cache.invalidate(user.id)
     db.refresh(user)
     return user
 
@@ -721,6 +1430,7 @@ def set_user_csrf_token(db: Session, user: models.User, csrf: str):
     user.extra_data = d
     db.add(user)
     db.commit()
+    user_cache.invalidate(user.id)
     db.refresh(user)
     return user
 
@@ -737,5 +1447,6 @@ def clear_user_refresh_jti(db: Session, user: models.User):
     user.extra_data = d
     db.add(user)
     db.commit()
+    user_cache.invalidate(user.id)
     db.refresh(user)
     return user
@@ -2,20 +2,36 @@
 FastAPI main application for Online Exam System
 Generated routes for all models
 """
-from typing import List
+from typing import List, Optional
 from uuid import UUID
+from datetime import datetime, timedelta
 import os
+import asyncio
+import gzip
 
-from fastapi import FastAPI, Depends, HTTPException, status, Request, Response, Body
+from fastapi import FastAPI, Depends, HTTPException, status, Request, Response, Body, Query
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 
 #from backend.config import settings
-from backend.database import Base, engine, get_db, SessionLocal
+from backend.database import engine, get_db, SessionLocal
 from backend import crud, schemas
 from backend.wait_for_db import wait_for_db
+from backend.settings import settings
+from backend.services.maintenance import MaintenanceWorker
+from backend.services.partitions import run_partition_maintenance
+from backend.services.write_behind import write_behind
+from backend.services.proctoring_stream import proctoring_broker
+from backend.services.heartbeats import HeartbeatCoalescer
+from backend.services.drafts import DraftConflict, compact_drafts
+from backend.services.assignment_engine import AssignmentError
+from backend.services import conditional, leaderboard, question_analytics, results_export, sparse_fields
+from backend.services.response_cache import response_cache
+from backend.services.fast_json import FastJSONResponse, list_response, rows_to_dicts
+from backend.services.compression import CompressionMiddleware, choose_encoding
 from backend.auth.router import router as auth_router
-from .routers import submission_processing
+from .routers import submission_processing, proctoring
 
 
 from backend.auth.dependencies import require_role, get_current_user
@@ -53,6 +69,14 @@ async def set_security_headers(request: Request, call_next):
     
     return response
 
+# --- Response compression (gzip, or brotli when installed) ---
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    content_types=settings.COMPRESSION_CONTENT_TYPES,
+)
 
 base_origins = [
     "http://localhost:5173",   # Your main frontend
@@ -88,13 +112,53 @@ app.include_router(
     tags=["submission-processing"]
 )
 
-# --- Startup: wait for DB & create tables ---
+app.include_router(
+    proctoring.router,
+    prefix="",
+    tags=["proctoring"]
+)
+
+# --- Startup: wait for DB ---
+# Schema changes are applied by `python -m backend.migrate` (see backend/migrations),
+# which the container runs before starting uvicorn.
+maintenance = MaintenanceWorker(settings.MAINTENANCE_INTERVAL_SECONDS)
+maintenance.register(
+    "event partitions",
+    lambda: run_partition_maintenance(
+        engine, settings.PARTITION_MONTHS_AHEAD, settings.EVENT_RETENTION_MONTHS
+    ),
+)
+maintenance.register(
+    "code draft compaction",
+    lambda: compact_drafts(SessionLocal, keep=settings.DRAFT_HISTORY_KEEP),
+)
+
 @app.on_event("startup")
 def on_startup():
     wait_for_db(engine, timeout=60)
-    # Import models so Base is populated
-    import backend.models 
-    Base.metadata.create_all(bind=engine)
+    response_cache.configure(
+        backend=settings.RESPONSE_CACHE_BACKEND,
+        ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+        max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+        redis_url=settings.RESPONSE_CACHE_REDIS_URL,
+    )
+    maintenance.start()
+    proctoring_broker.start(asyncio.get_running_loop(), backend=settings.PROCTORING_STREAM_BACKEND, engine=engine)
+    if settings.WRITE_BEHIND_ENABLED:
+        write_behind.start(
+            max_rows=settings.WRITE_BEHIND_MAX_ROWS,
+            batch_rows=settings.WRITE_BEHIND_BATCH_ROWS,
+            flush_interval=settings.WRITE_BEHIND_FLUSH_INTERVAL_SECONDS,
+            put_timeout=settings.WRITE_BEHIND_PUT_TIMEOUT_SECONDS,
+            max_attempts=settings.WRITE_BEHIND_MAX_ATTEMPTS,
+            dead_letter_path=settings.WRITE_BEHIND_DEAD_LETTER_PATH,
+        )
+
+@app.on_event("shutdown")
+def on_shutdown():
+    write_behind.stop()
+    proctoring_broker.stop()
+    maintenance.stop()
 
 # --- Health check ---
 @app.get("/health", tags=["health"])
@@ -104,15 +168,17 @@ def health() -> dict:
 
 # User routes
 @app.get("/users/", response_model=List[schemas.User])
-def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_users(request: Request, response: Response, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    conditional.check_collection(request, response, db, models.User)
     users = crud.get_users(db, skip=skip, limit=limit)
     return users
 
 @app.get("/users/{user_id}", response_model=schemas.User)
-def read_user(user_id: UUID, db: Session = Depends(get_db)):
+def read_user(user_id: UUID, request: Request, response: Response, db: Session = Depends(get_db)):
     db_user = crud.get_user(db, id=user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
+    conditional.check_entity(request, response, db_user)
     return db_user
 
 @app.post("/users/", response_model=schemas.User)
@@ -135,15 +201,17 @@ def delete_user(user_id: UUID, db: Session = Depends(get_db)):
 
 # UserSession routes
 @app.get("/user-sessions/", response_model=List[schemas.UserSession])
-def read_user_sessions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_user_sessions(request: Request, response: Response, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    conditional.check_collection(request, response, db, models.UserSession)
     user_sessions = crud.get_user_sessions(db, skip=skip, limit=limit)
     return user_sessions
 
 @app.get("/user-sessions/{session_id}", response_model=schemas.UserSession)
-def read_user_session(session_id: UUID, db: Session = Depends(get_db)):
+def read_user_session(session_id: UUID, request: Request, response: Response, db: Session = Depends(get_db)):
     db_session = crud.get_user_session(db, id=session_id)
     if db_session is None:
         raise HTTPException(status_code=404, detail="User session not found")
+    conditional.check_entity(request, response, db_session)
     return db_session
 
 @app.post("/user-sessions/", response_model=schemas.UserSession)
@@ -197,15 +265,17 @@ def delete_user_token(token_id: UUID, db: Session = Depends(get_db)):
 
 # StudentProfile routes
 @app.get("/student-profiles/", response_model=List[schemas.StudentProfile])
-def read_student_profiles(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_student_profiles(request: Request, response: Response, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    conditional.check_collection(request, response, db, models.StudentProfile)
     student_profiles = crud.get_student_profiles(db, skip=skip, limit=limit)
     return student_profiles
 
 @app.get("/student-profiles/{profile_id}", response_model=schemas.StudentProfile)
-def read_student_profile(profile_id: UUID, db: Session = Depends(get_db)):
+def read_student_profile(profile_id: UUID, request: Request, response: Response, db: Session = Depends(get_db)):
     db_profile = crud.get_student_profile(db, id=profile_id)
     if db_profile is None:
         raise HTTPException(status_code=404, detail="Student profile not found")
+    conditional.check_entity(request, response, db_profile)
     return db_profile
 
 @app.post("/student-profiles/", response_model=schemas.StudentProfile)
@@ -228,15 +298,17 @@ def delete_student_profile(profile_id: UUID, db: Session = Depends(get_db)):
 
 # StudentExamQuestion routes
 @app.get("/student-exam-questions/", response_model=List[schemas.StudentExamQuestion])
-def read_student_exam_questions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_student_exam_questions(request: Request, response: Response, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    conditional.check_collection(request, response, db, models.StudentExamQuestion)
     student_exam_questions = crud.get_student_exam_questions(db, skip=skip, limit=limit)
     return student_exam_questions
 
 @app.get("/student-exam-questions/{question_id}", response_model=schemas.StudentExamQuestion)
-def read_student_exam_question(question_id: UUID, db: Session = Depends(get_db)):
+def read_student_exam_question(question_id: UUID, request: Request, response: Response, db: Session = Depends(get_db)):
     db_question = crud.get_student_exam_question(db, id=question_id)
     if db_question is None:
         raise HTTPException(status_code=404, detail="Student exam question not found")
+    conditional.check_entity(request, response, db_question)
     return db_question
 
 @app.post("/student-exam-questions/", response_model=schemas.StudentExamQuestion)
@@ -259,15 +331,17 @@ def delete_student_exam_question(question_id: UUID, db: Session = Depends(get_db
 
 # TeacherProfile routes
 @app.get("/teacher-profiles/", response_model=List[schemas.TeacherProfile])
-def read_teacher_profiles(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_teacher_profiles(request: Request, response: Response, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    conditional.check_collection(request, response, db, models.TeacherProfile)
     teacher_profiles = crud.get_teacher_profiles(db, skip=skip, limit=limit)
     return teacher_profiles
 
 @app.get("/teacher-profiles/{profile_id}", response_model=schemas.TeacherProfile)
-def read_teacher_profile(profile_id: UUID, db: Session = Depends(get_db)):
+def read_teacher_profile(profile_id: UUID, request: Request, response: Response, db: Session = Depends(get_db)):
     db_profile = crud.get_teacher_profile(db, id=profile_id)
     if db_profile is None:
         raise HTTPException(status_code=404, detail="Teacher profile not found")
+    conditional.check_entity(request, response, db_profile)
     return db_profile
 
 @app.post("/teacher-profiles/", response_model=schemas.TeacherProfile)
@@ -290,15 +364,18 @@ def delete_teacher_profile(profile_id: UUID, db: Session = Depends(get_db)):
 
 # QuestionCategory routes
 @app.get("/question-categories/", response_model=List[schemas.QuestionCategory])
-def read_question_categories(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    question_categories = crud.get_question_categories(db, skip=skip, limit=limit)
-    return question_categories
+def read_question_categories(request: Request, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    return response_cache.respond(request, "question-categories", lambda: [
+        schemas.QuestionCategory.from_orm(category)
+        for category in crud.get_question_categories(db, skip=skip, limit=limit)
+    ])
 
 @app.get("/question-categories/{category_id}", response_model=schemas.QuestionCategory)
-def read_question_category(category_id: UUID, db: Session = Depends(get_db)):
+def read_question_category(category_id: UUID, request: Request, response: Response, db: Session = Depends(get_db)):
     db_category = crud.get_question_category(db, id=category_id)
     if db_category is None:
         raise HTTPException(status_code=404, detail="Question category not found")
+    conditional.check_entity(request, response, db_category)
     return db_category
 
 @app.post("/question-categories/", response_model=schemas.QuestionCategory)
@@ -321,16 +398,35 @@ def delete_question_category(category_id: UUID, db: Session = Depends(get_db)):
 
 # Question routes
 @app.get("/questions/", response_model=List[schemas.Question], dependencies=[Depends(require_role(dbmodels.UserRole.ADMIN, dbmodels.UserRole.TEACHER))])
-def read_questions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    questions = crud.get_questions(db, skip=skip, limit=limit)
-    return questions
+def read_questions(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    fields: Optional[List[str]] = Depends(sparse_fields.fields_param(schemas.Question)),
+    db: Session = Depends(get_db),
+):
+    def build():
+        questions = crud.get_questions(db, skip=skip, limit=limit, fields=fields)
+        if fields is not None:
+            return rows_to_dicts(questions, schemas.Question, fields)
+        return [schemas.Question.from_orm(question) for question in questions]
+    return response_cache.respond(request, "questions", build)
 
 
 @app.get("/questions/{question_id}", response_model=schemas.Question)
-def read_question(question_id: UUID, db: Session = Depends(get_db)):
-    db_question = crud.get_question(db, id=question_id)
+def read_question(
+    question_id: UUID,
+    request: Request,
+    response: Response,
+    fields: Optional[List[str]] = Depends(sparse_fields.fields_param(schemas.Question)),
+    db: Session = Depends(get_db),
+):
+    db_question = crud.get_question(db, id=question_id, fields=fields)
     if db_question is None:
         raise HTTPException(status_code=404, detail="Question not found")
+    conditional.check_entity(request, response, db_question)
+    if fields is not None:
+        return FastJSONResponse(content=rows_to_dicts([db_question], schemas.Question, fields)[0], headers=response.headers)
     return db_question
 
 @app.post("/questions/", response_model=schemas.Question)
@@ -353,15 +449,17 @@ def delete_question(question_id: UUID, db: Session = Depends(get_db)):
 
 # QuestionTestCase routes
 @app.get("/question-test-cases/", response_model=List[schemas.QuestionTestCase])
-def read_question_test_cases(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_question_test_cases(request: Request, response: Response, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    conditional.check_collection(request, response, db, models.QuestionTestCase)
     test_cases = crud.get_question_test_cases(db, skip=skip, limit=limit)
     return test_cases
 
 @app.get("/question-test-cases/{test_case_id}", response_model=schemas.QuestionTestCase)
-def read_question_test_case(test_case_id: UUID, db: Session = Depends(get_db)):
+def read_question_test_case(test_case_id: UUID, request: Request, response: Response, db: Session = Depends(get_db)):
     db_test_case = crud.get_question_test_case(db, id=test_case_id)
     if db_test_case is None:
         raise HTTPException(status_code=404, detail="Question test case not found")
+    conditional.check_entity(request, response, db_test_case)
     return db_test_case
 
 @app.post("/question-test-cases/", response_model=schemas.QuestionTestCase)
@@ -384,11 +482,13 @@ def delete_question_test_case(test_case_id: UUID, db: Session = Depends(get_db))
 
 # Get all test cases for a specific question
 @app.get("/questions/{question_id}/test-cases/", response_model=List[schemas.QuestionTestCase])
-def read_test_cases_for_question(question_id: UUID, db: Session = Depends(get_db)):
-    test_cases = crud.get_test_cases_for_question(db, question_id=question_id)
-    if not test_cases:
-        raise HTTPException(status_code=404, detail="No test cases found for this question")
-    return test_cases
+def read_test_cases_for_question(question_id: UUID, request: Request, db: Session = Depends(get_db)):
+    def build():
+        test_cases = crud.get_test_cases_for_question(db, question_id=question_id)
+        if not test_cases:
+            raise HTTPException(status_code=404, detail="No test cases found for this question")
+        return [schemas.QuestionTestCase.from_orm(test_case) for test_case in test_cases]
+    return response_cache.respond(request, "question-test-cases", build)
 
 # Update a test case
 @app.put("/question-test-cases/{test_case_id}", response_model=schemas.QuestionTestCase)
@@ -420,16 +520,35 @@ def delete_all_test_cases_for_question(question_id: UUID, db: Session = Depends(
 
 # Exam routes
 @app.get("/exams/", response_model=List[schemas.Exam])
-def read_exams(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    exams = crud.get_exams(db, skip=skip, limit=limit)
-    return exams
+def read_exams(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    fields: Optional[List[str]] = Depends(sparse_fields.fields_param(schemas.Exam)),
+    db: Session = Depends(get_db),
+):
+    def build():
+        exams = crud.get_exams(db, skip=skip, limit=limit, fields=fields)
+        if fields is not None:
+            return rows_to_dicts(exams, schemas.Exam, fields)
+        return [schemas.Exam.from_orm(exam) for exam in exams]
+    return response_cache.respond(request, "exams", build)
 
 @app.get("/exams/{exam_id}", response_model=schemas.Exam)
-def read_exam(exam_id: UUID, db: Session = Depends(get_db)):
-    db_exam = crud.get_exam(db, id=exam_id)
-    if db_exam is None:
-        raise HTTPException(status_code=404, detail="Exam not found")
-    return db_exam
+def read_exam(
+    exam_id: UUID,
+    request: Request,
+    fields: Optional[List[str]] = Depends(sparse_fields.fields_param(schemas.Exam)),
+    db: Session = Depends(get_db),
+):
+    def build():
+        db_exam = crud.get_exam(db, id=exam_id, fields=fields)
+        if db_exam is None:
+            raise HTTPException(status_code=404, detail="Exam not found")
+        if fields is not None:
+            return rows_to_dicts([db_exam], schemas.Exam, fields)[0]
+        return schemas.Exam.from_orm(db_exam)
+    return response_cache.respond(request, "exams", build)
 
 @app.post("/exams/", response_model=schemas.Exam)
 def create_exam(exam: schemas.ExamCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user),):
@@ -451,15 +570,17 @@ def delete_exam(exam_id: UUID, db: Session = Depends(get_db)):
 
 # ExamQuestion routes
 @app.get("/exam-questions/", response_model=List[schemas.ExamQuestion])
-def read_exam_questions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_exam_questions(request: Request, response: Response, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    conditional.check_collection(request, response, db, models.ExamQuestion)
     exam_questions = crud.get_exam_questions(db, skip=skip, limit=limit)
     return exam_questions
 
 @app.get("/exam-questions/{exam_question_id}", response_model=schemas.ExamQuestion)
-def read_exam_question(exam_question_id: UUID, db: Session = Depends(get_db)):
+def read_exam_question(exam_question_id: UUID, request: Request, response: Response, db: Session = Depends(get_db)):
     db_exam_question = crud.get_exam_question(db, id=exam_question_id)
     if db_exam_question is None:
         raise HTTPException(status_code=404, detail="Exam question not found")
+    conditional.check_entity(request, response, db_exam_question)
     return db_exam_question
 
 @app.post("/exam-questions/", response_model=schemas.ExamQuestion)
@@ -482,15 +603,28 @@ def delete_exam_question(exam_question_id: UUID, db: Session = Depends(get_db)):
 
 # ExamRegistration routes
 @app.get("/exam-registrations/", response_model=List[schemas.ExamRegistration])
-def read_exam_registrations(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    exam_registrations = crud.get_exam_registrations(db, skip=skip, limit=limit)
+def read_exam_registrations(
+    skip: int = 0,
+    limit: int = 100,
+    exam_id: Optional[UUID] = None,
+    student_id: Optional[UUID] = None,
+    status: Optional[models.RegistrationStatus] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+):
+    exam_registrations = crud.get_exam_registrations(
+        db, skip=skip, limit=limit, exam_id=exam_id, student_id=student_id,
+        status=status, since=since, until=until,
+    )
     return exam_registrations
 
 @app.get("/exam-registrations/{registration_id}", response_model=schemas.ExamRegistration)
-def read_exam_registration(registration_id: UUID, db: Session = Depends(get_db)):
+def read_exam_registration(registration_id: UUID, request: Request, response: Response, db: Session = Depends(get_db)):
     db_registration = crud.get_exam_registration(db, id=registration_id)
     if db_registration is None:
         raise HTTPException(status_code=404, detail="Exam registration not found")
+    conditional.check_entity(request, response, db_registration)
     return db_registration
 
 @app.post("/exam-registrations/", response_model=schemas.ExamRegistration)
@@ -513,46 +647,178 @@ def delete_exam_registration(registration_id: UUID, db: Session = Depends(get_db
 
 # ExamSession routes
 @app.get("/exam-sessions/", response_model=List[schemas.ExamSession])
-def read_exam_sessions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    exam_sessions = crud.get_exam_sessions(db, skip=skip, limit=limit)
+def read_exam_sessions(
+    skip: int = 0,
+    limit: int = 100,
+    exam_id: Optional[UUID] = None,
+    student_id: Optional[UUID] = None,
+    status: Optional[models.SessionStatus] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+):
+    exam_sessions = crud.get_exam_sessions(
+        db, skip=skip, limit=limit, exam_id=exam_id, student_id=student_id,
+        status=status, since=since, until=until,
+    )
     return exam_sessions
 
 @app.get("/exam-sessions/{session_id}", response_model=schemas.ExamSession)
-def read_exam_session(session_id: UUID, db: Session = Depends(get_db)):
+def read_exam_session(session_id: UUID, request: Request, response: Response, db: Session = Depends(get_db)):
     db_session = crud.get_exam_session(db, id=session_id)
     if db_session is None:
         raise HTTPException(status_code=404, detail="Exam session not found")
+    # Heartbeats write last_activity_at without touching updated_at
+    conditional.check_entity(request, response, db_session, db_session.last_activity_at)
     return db_session
 
-@app.post("/exam-sessions/", response_model=schemas.ExamSession)
+@app.post("/exam-sessions/", response_model=schemas.ExamSessionStarted)
 def create_exam_session(session: schemas.ExamSessionCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user),):
     return crud.create_exam_session(db=db, obj_in=session, student_id=current_user.id)
 
+heartbeats = HeartbeatCoalescer(settings.HEARTBEAT_MIN_INTERVAL_SECONDS)
+
+@app.post("/exam-sessions/heartbeat", status_code=204)
+def exam_session_heartbeat(heartbeat: schemas.ExamSessionHeartbeat, db: Session = Depends(get_db)):
+    """
+    Liveness ping keyed by the session token returned when the session was created.
+    Pings inside HEARTBEAT_MIN_INTERVAL_SECONDS of the last write never touch the database.
+    """
+    if heartbeats.should_write(heartbeat.session_token):
+        if crud.touch_exam_session(
+            db, session_token=heartbeat.session_token, min_interval=settings.HEARTBEAT_MIN_INTERVAL_SECONDS
+        ) is None:
+            heartbeats.forget(heartbeat.session_token)
+            raise HTTPException(status_code=404, detail="No active exam session for this token")
+    return Response(status_code=204)
+
 @app.put("/exam-sessions/{session_id}", response_model=schemas.ExamSession)
 def update_exam_session(session_id: UUID, session: schemas.ExamSessionUpdate, db: Session = Depends(get_db)):
     db_session = crud.get_exam_session(db, id=session_id)
     if db_session is None:
         raise HTTPException(status_code=404, detail="Exam session not found")
-    return crud.update_exam_session(db=db, db_obj=db_session, obj_in=session)
+    session_token = db_session.session_token
+    db_session = crud.update_exam_session(db=db, db_obj=db_session, obj_in=session)
+    if db_session.status != models.SessionStatus.ACTIVE:
+        # Otherwise heartbeats for the ended session keep getting 204s until the window expires
+        heartbeats.forget(session_token)
+    return db_session
 
 @app.delete("/exam-sessions/{session_id}", response_model=schemas.ExamSession)
 def delete_exam_session(session_id: UUID, db: Session = Depends(get_db)):
     db_session = crud.delete_exam_session(db, id=session_id)
     if db_session is None:
         raise HTTPException(status_code=404, detail="Exam session not found")
+    heartbeats.forget(db_session.session_token)
     return db_session
 
+@app.post("/exam-sessions/{session_id}/events:batch", response_model=schemas.ExamEventBatchResult)
+def create_exam_events_batch(
+    session_id: UUID,
+    batch: schemas.ExamEventBatch,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Record a batch of proctoring events for the caller's session in one insert.
+    Events are keyed by their client-generated id and timestamp, so resending a
+    batch is safe; timestamps outside the accepted window are rejected.
+    """
+    db_session = crud.get_exam_session(db, id=session_id)
+    if db_session is None:
+        raise HTTPException(status_code=404, detail="Exam session not found")
+    if db_session.student_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not your exam session")
+
+    now = datetime.utcnow()
+    oldest = now - timedelta(seconds=settings.EVENT_BATCH_MAX_AGE_SECONDS)
+    newest = now + timedelta(seconds=settings.EVENT_BATCH_MAX_CLOCK_SKEW_SECONDS)
+    events, rejected = [], []
+    for event in batch.events:
+        if oldest <= event.occurred_at <= newest:
+            events.append(event)
+        else:
+            rejected.append(event.id)
+
+    inserted = crud.create_exam_events_batch(db, exam_session_id=session_id, events=events)
+    return schemas.ExamEventBatchResult(
+        accepted=len(inserted),
+        duplicates=len(events) - len(inserted),
+        rejected=rejected,
+    )
+
+# CodeDraft routes
+def _draft_session(db: Session, session_id: UUID, current_user: models.User, write: bool) -> models.ExamSession:
+    db_session = crud.get_exam_session(db, id=session_id)
+    if db_session is None:
+        raise HTTPException(status_code=404, detail="Exam session not found")
+    is_owner = db_session.student_id == current_user.id
+    is_staff = current_user.role in (models.UserRole.ADMIN, models.UserRole.TEACHER)
+    if not is_owner and (write or not is_staff):
+        raise HTTPException(status_code=403, detail="Not your exam session")
+    return db_session
+
+@app.get("/exam-sessions/{session_id}/drafts/{question_id}", response_model=schemas.CodeDraft)
+def read_code_draft(
+    session_id: UUID,
+    question_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    _draft_session(db, session_id, current_user, write=False)
+    db_draft = crud.get_code_draft(db, exam_session_id=session_id, question_id=question_id)
+    if db_draft is None:
+        raise HTTPException(status_code=404, detail="Draft not found")
+    return db_draft
+
+@app.put("/exam-sessions/{session_id}/drafts/{question_id}", response_model=schemas.CodeDraftSaved)
+def save_code_draft(
+    session_id: UUID,
+    question_id: UUID,
+    draft: schemas.CodeDraftSave,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Autosave. Send the full `content`, or `ops` against `base_version` to upload only the change.
+    A stale base_version returns 409 with the current version so the client can resync.
+    """
+    _draft_session(db, session_id, current_user, write=True)
+    try:
+        return crud.save_code_draft(db, exam_session_id=session_id, question_id=question_id, obj_in=draft)
+    except DraftConflict as e:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Draft version conflict", "current_version": e.current_version},
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
 # Submission routes
 @app.get("/submissions/", response_model=List[schemas.Submission])
-def read_submissions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    submissions = crud.get_submissions(db, skip=skip, limit=limit)
+def read_submissions(
+    skip: int = 0,
+    limit: int = 100,
+    exam_id: Optional[UUID] = None,
+    student_id: Optional[UUID] = None,
+    question_id: Optional[UUID] = None,
+    status: Optional[models.SubmissionStatus] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+):
+    submissions = crud.get_submissions(
+        db, skip=skip, limit=limit, exam_id=exam_id, student_id=student_id,
+        question_id=question_id, status=status, since=since, until=until,
+    )
     return submissions
 
 @app.get("/submissions/{submission_id}", response_model=schemas.Submission)
-def read_submission(submission_id: UUID, db: Session = Depends(get_db)):
+def read_submission(submission_id: UUID, request: Request, response: Response, db: Session = Depends(get_db)):
     db_submission = crud.get_submission(db, id=submission_id)
     if db_submission is None:
         raise HTTPException(status_code=404, detail="Submission not found")
+    conditional.check_entity(request, response, db_submission)
     return db_submission
 
 @app.post("/submissions/", response_model=schemas.Submission)
@@ -585,15 +851,28 @@ def delete_submission(submission_id: UUID, db: Session = Depends(get_db)):
 
 # SubmissionResult routes
 @app.get("/submission-results/", response_model=List[schemas.SubmissionResult])
-def read_submission_results(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    submission_results = crud.get_submission_results(db, skip=skip, limit=limit)
-    return submission_results
+def read_submission_results(
+    skip: int = 0,
+    limit: int = 100,
+    submission_id: Optional[UUID] = None,
+    status: Optional[models.ExecutionStatus] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    fields: Optional[List[str]] = Depends(sparse_fields.fields_param(schemas.SubmissionResult)),
+    db: Session = Depends(get_db),
+):
+    submission_results = crud.get_submission_results(
+        db, skip=skip, limit=limit, submission_id=submission_id,
+        status=status, since=since, until=until, fields=fields,
+    )
+    return list_response(submission_results, schemas.SubmissionResult, fields=fields)
 
 @app.get("/submission-results/{result_id}", response_model=schemas.SubmissionResult)
-def read_submission_result(result_id: UUID, db: Session = Depends(get_db)):
+def read_submission_result(result_id: UUID, request: Request, response: Response, db: Session = Depends(get_db)):
     db_result = crud.get_submission_result(db, id=result_id)
     if db_result is None:
         raise HTTPException(status_code=404, detail="Submission result not found")
+    conditional.check_entity(request, response, db_result)
     return db_result
 
 @app.post("/submission-results/", response_model=schemas.SubmissionResult)
@@ -629,6 +908,9 @@ def read_submission_event(event_id: UUID, db: Session = Depends(get_db)):
 
 @app.post("/submission-events/", response_model=schemas.SubmissionEvent)
 def create_submission_event(event: schemas.SubmissionEventCreate, db: Session = Depends(get_db)):
+    # Checked here because a queued row is only inserted after the response
+    if crud.get_submission(db, id=event.submission_id) is None:
+        raise HTTPException(status_code=404, detail="Submission not found")
     return crud.create_submission_event(db=db, obj_in=event)
 
 @app.put("/submission-events/{event_id}", response_model=schemas.SubmissionEvent)
@@ -647,9 +929,20 @@ def delete_submission_event(event_id: UUID, db: Session = Depends(get_db)):
 
 # ExamEvent routes
 @app.get("/exam-events/", response_model=List[schemas.ExamEvent])
-def read_exam_events(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    exam_events = crud.get_exam_events(db, skip=skip, limit=limit)
-    return exam_events
+def read_exam_events(
+    skip: int = 0,
+    limit: int = 100,
+    exam_session_id: Optional[UUID] = None,
+    event_type: Optional[models.EventType] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+):
+    exam_events = crud.get_exam_events(
+        db, skip=skip, limit=limit, exam_session_id=exam_session_id,
+        event_type=event_type, since=since, until=until,
+    )
+    return list_response(exam_events, schemas.ExamEvent)
 
 @app.get("/exam-events/{event_id}", response_model=schemas.ExamEvent)
 def read_exam_event(event_id: UUID, db: Session = Depends(get_db)):
@@ -660,6 +953,9 @@ def read_exam_event(event_id: UUID, db: Session = Depends(get_db)):
 
 @app.post("/exam-events/", response_model=schemas.ExamEvent)
 def create_exam_event(event: schemas.ExamEventCreate, db: Session = Depends(get_db)):
+    # Checked here because a queued row is only inserted after the response
+    if crud.get_exam_session(db, id=event.exam_session_id) is None:
+        raise HTTPException(status_code=404, detail="Exam session not found")
     return crud.create_exam_event(db=db, obj_in=event)
 
 @app.put("/exam-events/{event_id}", response_model=schemas.ExamEvent)
@@ -728,7 +1024,7 @@ def get_all_student_questions_for_exam(exam_id: UUID, db: Session = Depends(get_
     assignments = crud.get_student_exam_questions_by_exam(db, exam_id=exam_id)
     if not assignments:
         raise HTTPException(status_code=404, detail="No question assignments found for this exam")
-    return assignments
+    return list_response(assignments, schemas.StudentExamQuestion)
 
 # Get questions with full question details for a student in an exam
 @app.get(
@@ -789,16 +1085,40 @@ def assign_question_to_student(
     
     return crud.create_student_exam_question(db=db, obj_in=question_assignment)
 
+@app.post(
+    "/exams/{exam_id}/generate-assignments",
+    response_model=schemas.GenerateAssignmentsResult,
+    dependencies=[Depends(require_role(dbmodels.UserRole.ADMIN, dbmodels.UserRole.TEACHER))]
+)
+def generate_exam_assignments(
+    exam_id: UUID,
+    request: schemas.GenerateAssignmentsRequest,
+    db: Session = Depends(get_db),
+):
+    """
+    Draw every student's questions server-side from category/difficulty pools.
+    Pass the returned seed back to regenerate the same papers.
+    """
+    db_exam = crud.get_exam(db, id=exam_id)
+    if db_exam is None:
+        raise HTTPException(status_code=404, detail="Exam not found")
+    try:
+        return crud.generate_exam_assignments(db, exam=db_exam, obj_in=request)
+    except AssignmentError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
 # Bulk assign questions to students
-@app.post("/student-exam-questions/bulk-assign/", response_model=List[schemas.StudentExamQuestion])
+@app.post("/student-exam-questions/bulk-assign/", response_model=schemas.BulkStudentExamQuestionResult)
 def bulk_assign_questions(
     bulk_assignment: schemas.BulkStudentExamQuestionCreate, 
     db: Session = Depends(get_db)
 ):
-    """Bulk assign questions to students"""
+    """Bulk assign questions to students; existing assignments are skipped or updated per on_conflict"""
     try:
         assignments = [assignment.dict() for assignment in bulk_assignment.assignments]
-        return crud.bulk_assign_questions_to_students(db=db, assignments=assignments)
+        return crud.bulk_assign_questions_to_students(
+            db=db, assignments=assignments, on_conflict=bulk_assignment.on_conflict
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error in bulk assignment: {str(e)}")
 
@@ -842,11 +1162,155 @@ def check_student_has_questions(exam_id: UUID, student_id: UUID, db: Session = D
         "student_id": student_id
     }
 
+@app.get("/exams/{exam_id}/bootstrap", response_model=schemas.ExamBootstrap)
+def read_exam_bootstrap(
+    exam_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    One-shot payload for opening an exam: the caller, the exam, their registration and
+    latest session, and their assigned questions with starter code and sample test cases.
+    """
+    bootstrap = crud.get_exam_bootstrap(db, exam_id=exam_id, student_id=current_user.id)
+    if bootstrap is None:
+        raise HTTPException(status_code=404, detail="Exam not found")
+    return {"user": current_user, **bootstrap}
+
+@app.get("/exams/{exam_id}/paper", response_model=schemas.ExamPaperContent)
+def read_exam_paper(
+    exam_id: UUID,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    The caller's question paper, served from its pre-serialized copy. The stored gzip
+    bytes go out as-is to clients that accept gzip; X-Paper-Version changes whenever
+    the paper is rebuilt.
+    """
+    paper = crud.get_exam_paper(db, exam_id=exam_id, student_id=current_user.id)
+    if paper is None:
+        raise HTTPException(status_code=404, detail="No questions found for this student in this exam")
+    headers = {"X-Paper-Version": str(paper.version), "Vary": "Accept-Encoding"}
+    if choose_encoding(request.headers.get("accept-encoding", ""), brotli_available=False) == "gzip":
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=paper.payload, media_type="application/json", headers=headers)
+    return Response(content=gzip.decompress(paper.payload), media_type="application/json", headers=headers)
+
+@app.get(
+    "/exams/{exam_id}/proctoring-summary",
+    response_model=List[schemas.SessionProctoringSummary],
+    dependencies=[Depends(require_role(dbmodels.UserRole.ADMIN, dbmodels.UserRole.TEACHER))]
+)
+def read_exam_proctoring_summary(exam_id: UUID, db: Session = Depends(get_db)):
+    """Event counts by type per exam session, read from the incrementally maintained counters"""
+    summaries = {}
+    for counter, student_id in crud.get_exam_event_counters(db, exam_id=exam_id):
+        summary = summaries.get(counter.exam_session_id)
+        if summary is None:
+            summary = summaries[counter.exam_session_id] = schemas.SessionProctoringSummary(
+                exam_session_id=counter.exam_session_id,
+                student_id=student_id,
+                total_events=0,
+                counters=[],
+            )
+        summary.total_events += counter.count
+        summary.counters.append(schemas.ExamEventCounter.from_orm(counter))
+    return list(summaries.values())
+
+@app.get(
+    "/exams/{exam_id}/leaderboard",
+    response_model=schemas.LeaderboardPage,
+    dependencies=[Depends(require_role(dbmodels.UserRole.ADMIN, dbmodels.UserRole.TEACHER))]
+)
+def read_exam_leaderboard(
+    exam_id: UUID,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Students ranked by total score, ties going to whoever reached it first, with their
+    best score per question. Pass next_cursor back as `cursor` for the following page.
+    """
+    after, rank = None, 0
+    if cursor:
+        try:
+            total_score, last_accepted_at, student_id, rank = leaderboard.decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        after = (total_score, last_accepted_at, student_id)
+    rows = crud.get_exam_leaderboard(db, exam_id=exam_id, limit=limit, after=after)
+
+    question_scores = {}
+    for score in crud.get_exam_question_scores(db, exam_id=exam_id, student_ids=[row[0].student_id for row in rows]):
+        question_scores.setdefault(score.student_id, []).append(score)
+    entries = []
+    for score, profile in rows:
+        rank += 1
+        entries.append(schemas.LeaderboardEntry(
+            rank=rank,
+            student_id=score.student_id,
+            student_number=profile.student_id if profile else None,
+            first_name=profile.first_name if profile else None,
+            last_name=profile.last_name if profile else None,
+            total_score=score.total_score,
+            max_total_score=score.max_total_score,
+            questions_attempted=score.questions_attempted,
+            questions_accepted=score.questions_accepted,
+            last_accepted_at=score.last_accepted_at,
+            questions=[schemas.QuestionScore.from_orm(q) for q in question_scores.get(score.student_id, [])],
+        ))
+    next_cursor = leaderboard.encode_cursor(rows[-1][0], rank) if len(rows) == limit else None
+    return schemas.LeaderboardPage(exam_id=exam_id, entries=entries, next_cursor=next_cursor)
+
+@app.get(
+    "/exams/{exam_id}/question-analytics",
+    response_model=schemas.ExamQuestionAnalytics,
+    dependencies=[Depends(require_role(dbmodels.UserRole.ADMIN, dbmodels.UserRole.TEACHER))]
+)
+def read_exam_question_analytics(exam_id: UUID, db: Session = Depends(get_db)):
+    """
+    Per-question pass rate, score distribution, median runtime and memory, and
+    per-test-case failure rates; recomputed only after new results are written.
+    """
+    if crud.get_exam(db, id=exam_id) is None:
+        raise HTTPException(status_code=404, detail="Exam not found")
+    return question_analytics.get_question_analytics(db, exam_id)
+
+@app.get(
+    "/exams/{exam_id}/results/export",
+    dependencies=[Depends(require_role(dbmodels.UserRole.ADMIN, dbmodels.UserRole.TEACHER))]
+)
+def export_exam_results(
+    exam_id: UUID,
+    format: str = Query("csv", regex="^(csv|jsonl|parquet)$"),
+    compress: bool = Query(False, alias="gzip"),
+    db: Session = Depends(get_db),
+):
+    """
+    Every submission of the exam with its results, student and question, streamed as
+    CSV, JSON lines or parquet. gzip=true compresses CSV and JSONL on the fly.
+    """
+    exam = crud.get_exam(db, id=exam_id)
+    if exam is None:
+        raise HTTPException(status_code=404, detail="Exam not found")
+    try:
+        body = results_export.stream_export(SessionLocal, exam_id, format, compress=compress)
+    except results_export.ExportUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(e))
+    media_type, extension = results_export.FORMATS[format]
+    if compress and format != "parquet":
+        media_type, extension = "application/gzip", f"{extension}.gz"
+    headers = {"Content-Disposition": f'attachment; filename="exam-{exam_id}-results.{extension}"'}
+    return StreamingResponse(body, media_type=media_type, headers=headers)
+
 @app.get("/exams/{exam_id}/submissions", response_model=List[schemas.Submission])
 def read_submissions_by_exam(
-    exam_id: UUID, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
+    exam_id: UUID, skip: int = 0, limit: int = 100, latest_only: bool = False, db: Session = Depends(get_db)
 ):
-    submissions = crud.get_submissions_by_exam_id(db, exam_id=exam_id, skip=skip, limit=limit)
+    submissions = crud.get_submissions_by_exam_id(db, exam_id=exam_id, skip=skip, limit=limit, latest_only=latest_only)
     return submissions
 
 
@@ -887,6 +1351,7 @@ def import_leetcode_jsonl(payload: dict = Body(...), db: Session = Depends(get_d
     
     try:
         result = import_from_jsonl_files(db, file_paths, overwrite=overwrite)
+        response_cache.invalidate("questions", "question-categories", "question-test-cases")
         return {"status": "ok", **result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,61 @@
+"""
+Schema migrations entry point
+
+    python -m backend.migrate            # upgrade to head
+    python -m backend.migrate <revision> # upgrade to a specific revision
+
+Downgrades go through alembic directly:
+    alembic -c backend/alembic.ini downgrade -1
+
+Databases created by the old create_all startup hook have tables but no
+alembic_version; they are stamped at the baseline revision first so only the
+later revisions run against them.
+"""
+import os
+import sys
+from typing import List
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+
+from backend.database import engine
+from backend.wait_for_db import wait_for_db
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+ALEMBIC_INI = os.path.join(BACKEND_DIR, "alembic.ini")
+SQL_DIR = os.path.join(BACKEND_DIR, "migrations", "sql")
+BASELINE_REVISION = "0001_baseline"
+
+
+def alembic_config() -> Config:
+    return Config(ALEMBIC_INI)
+
+
+def sql_statements(filename: str) -> List[str]:
+    """Split a migrations/sql/ script into statements (line comments stripped)"""
+    with open(os.path.join(SQL_DIR, filename), "r", encoding="utf-8") as f:
+        lines = [line for line in f if not line.lstrip().startswith("--")]
+    return [stmt.strip() for stmt in "".join(lines).split(";") if stmt.strip()]
+
+
+def stamp_legacy_database(db_engine: Engine, config: Config) -> bool:
+    """Stamp a create_all-built database at the baseline; returns True if stamped"""
+    tables = set(inspect(db_engine).get_table_names())
+    if "alembic_version" in tables or "users" not in tables:
+        return False
+    command.stamp(config, BASELINE_REVISION)
+    return True
+
+
+def run_migrations(revision: str = "head", db_engine: Engine = engine) -> None:
+    config = alembic_config()
+    if stamp_legacy_database(db_engine, config):
+        print(f"Existing schema detected, stamped at {BASELINE_REVISION}")
+    command.upgrade(config, revision)
+
+
+if __name__ == "__main__":
+    wait_for_db(engine, timeout=60)
+    run_migrations(sys.argv[1] if len(sys.argv) > 1 else "head")
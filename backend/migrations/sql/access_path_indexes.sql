@@ -0,0 +1,41 @@
+-- Composite / covering indexes for the hot access paths, and removal of
+-- indexes that duplicate a UNIQUE constraint or the leading column of a
+-- composite index.
+--
+-- Applied by revision 0002_access_path_indexes. Every statement is
+-- CONCURRENTLY and idempotent, so it runs outside a transaction block.
+
+-- student_exam_questions: WHERE exam_id = ? AND student_id = ? ORDER BY question_order
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_student_exam_questions_exam_student_order
+    ON student_exam_questions (exam_id, student_id, question_order)
+    INCLUDE (question_id, points);
+
+-- exam_sessions: WHERE exam_id = ? AND student_id = ? (create_submission, session lookup)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_exam_sessions_exam_student
+    ON exam_sessions (exam_id, student_id)
+    INCLUDE (status);
+
+-- submissions: WHERE exam_id = ? ORDER BY question_id, student_id, submitted_at (grading, DISTINCT ON)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_submissions_exam_question_student_submitted
+    ON submissions (exam_id, question_id, student_id, submitted_at);
+
+-- exam_events: WHERE exam_session_id = ? ORDER BY created_at
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_exam_events_session_created
+    ON exam_events (exam_session_id, created_at)
+    INCLUDE (event_type);
+
+-- Duplicates of UNIQUE constraints
+DROP INDEX CONCURRENTLY IF EXISTS idx_users_email;
+DROP INDEX CONCURRENTLY IF EXISTS idx_user_sessions_token;
+DROP INDEX CONCURRENTLY IF EXISTS idx_exam_sessions_token;
+DROP INDEX CONCURRENTLY IF EXISTS idx_student_profiles_student_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_teacher_profiles_employee_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_question_categories_name;
+
+-- Leading column already served by a UNIQUE constraint or the composites above
+DROP INDEX CONCURRENTLY IF EXISTS idx_student_exam_questions_exam_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_exam_questions_exam_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_exam_registrations_exam_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_exam_sessions_exam_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_submissions_exam_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_exam_events_exam_session_id;
@@ -0,0 +1,392 @@
+"""Baseline schema
+
+The schema as previously created by Base.metadata.create_all at startup.
+Databases created that way are stamped at this revision by backend.migrate
+instead of running it.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Enum types are created once up front; eventtype is shared by two tables
+userrole = postgresql.ENUM('ADMIN', 'TEACHER', 'STUDENT', name='userrole', create_type=False)
+examtype = postgresql.ENUM('PRACTICE', 'ASSIGNMENT', 'MIDTERM', 'FINAL', 'QUIZ', name='examtype', create_type=False)
+examstatus = postgresql.ENUM('DRAFT', 'SCHEDULED', 'ACTIVE', 'COMPLETED', 'CANCELLED', name='examstatus', create_type=False)
+difficulty = postgresql.ENUM('EASY', 'MEDIUM', 'HARD', name='difficulty', create_type=False)
+registrationstatus = postgresql.ENUM('PENDING', 'SUBMITTED', 'REJECTED', 'CANCELLED', name='registrationstatus', create_type=False)
+sessionstatus = postgresql.ENUM('ACTIVE', 'PAUSED', 'COMPLETED', 'TERMINATED', name='sessionstatus', create_type=False)
+submissionstatus = postgresql.ENUM('PENDING', 'RUNNING', 'COMPLETED', 'ERROR', name='submissionstatus', create_type=False)
+eventtype = postgresql.ENUM('SESSION_START', 'SESSION_END', 'SUBMISSION_CREATE', 'SUBMISSION_UPDATE', 'TAB_SWITCH', 'WINDOW_BLUR', 'COPY_PASTE', 'BROWSER_REFRESH', name='eventtype', create_type=False)
+executionstatus = postgresql.ENUM('PENDING', 'RUNNING', 'ACCEPTED', 'WRONG_ANSWER', 'TIME_LIMIT_EXCEEDED', 'COMPILATION_ERROR', 'RUNTIME_ERROR', 'INTERNAL_ERROR', name='executionstatus', create_type=False)
+
+ENUMS = [userrole, examtype, examstatus, difficulty, registrationstatus, sessionstatus, submissionstatus, eventtype, executionstatus]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    for enum in ENUMS:
+        enum.create(bind, checkfirst=True)
+
+    op.create_table('question_categories',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('extra_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_index('idx_question_categories_is_active', 'question_categories', ['is_active'], unique=False)
+    op.create_index('idx_question_categories_name', 'question_categories', ['name'], unique=False)
+    op.create_table('users',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('password_hash', sa.String(length=255), nullable=False),
+    sa.Column('role', userrole, nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('extra_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email')
+    )
+    op.create_index('idx_users_email', 'users', ['email'], unique=False)
+    op.create_index('idx_users_is_active', 'users', ['is_active'], unique=False)
+    op.create_index('idx_users_role', 'users', ['role'], unique=False)
+    op.create_table('audit_logs',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=True),
+    sa.Column('action', sa.String(length=100), nullable=False),
+    sa.Column('resource_type', sa.String(length=100), nullable=False),
+    sa.Column('resource_id', sa.UUID(), nullable=True),
+    sa.Column('old_values', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('new_values', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('ip_address', postgresql.INET(), nullable=True),
+    sa.Column('user_agent', sa.String(length=500), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('extra_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_audit_logs_action', 'audit_logs', ['action'], unique=False)
+    op.create_index('idx_audit_logs_created_at', 'audit_logs', ['created_at'], unique=False)
+    op.create_index('idx_audit_logs_resource_type', 'audit_logs', ['resource_type'], unique=False)
+    op.create_index('idx_audit_logs_user_id', 'audit_logs', ['user_id'], unique=False)
+    op.create_table('exams',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_by', sa.UUID(), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('start_time', sa.DateTime(), nullable=False),
+    sa.Column('end_time', sa.DateTime(), nullable=False),
+    sa.Column('duration_minutes', sa.Integer(), nullable=False),
+    sa.Column('exam_type', examtype, nullable=False),
+    sa.Column('shuffle_questions', sa.Boolean(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('settings', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('status', examstatus, nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('extra_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_exams_created_by', 'exams', ['created_by'], unique=False)
+    op.create_index('idx_exams_end_time', 'exams', ['end_time'], unique=False)
+    op.create_index('idx_exams_exam_type', 'exams', ['exam_type'], unique=False)
+    op.create_index('idx_exams_start_time', 'exams', ['start_time'], unique=False)
+    op.create_index('idx_exams_status', 'exams', ['status'], unique=False)
+    op.create_table('questions',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('category_id', sa.UUID(), nullable=False),
+    sa.Column('created_by', sa.UUID(), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('problem_statement', sa.Text(), nullable=False),
+    sa.Column('difficulty', difficulty, nullable=False),
+    sa.Column('constraints', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('starter_code', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('max_score', sa.Integer(), nullable=False),
+    sa.Column('time_limit_seconds', sa.Integer(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('extra_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.ForeignKeyConstraint(['category_id'], ['question_categories.id'], ),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_questions_category_id', 'questions', ['category_id'], unique=False)
+    op.create_index('idx_questions_created_by', 'questions', ['created_by'], unique=False)
+    op.create_index('idx_questions_difficulty', 'questions', ['difficulty'], unique=False)
+    op.create_index('idx_questions_is_active', 'questions', ['is_active'], unique=False)
+    op.create_table('student_profiles',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('student_id', sa.String(length=50), nullable=False),
+    sa.Column('first_name', sa.String(length=100), nullable=False),
+    sa.Column('last_name', sa.String(length=100), nullable=False),
+    sa.Column('phone', sa.String(length=20), nullable=True),
+    sa.Column('emergency_contact', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('extra_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('student_id')
+    )
+    op.create_index('idx_student_profiles_student_id', 'student_profiles', ['student_id'], unique=False)
+    op.create_index('idx_student_profiles_user_id', 'student_profiles', ['user_id'], unique=False)
+    op.create_table('teacher_profiles',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('employee_id', sa.String(length=50), nullable=False),
+    sa.Column('first_name', sa.String(length=100), nullable=False),
+    sa.Column('last_name', sa.String(length=100), nullable=False),
+    sa.Column('department', sa.String(length=100), nullable=True),
+    sa.Column('designation', sa.String(length=100), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('extra_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('employee_id')
+    )
+    op.create_index('idx_teacher_profiles_employee_id', 'teacher_profiles', ['employee_id'], unique=False)
+    op.create_index('idx_teacher_profiles_user_id', 'teacher_profiles', ['user_id'], unique=False)
+    op.create_table('user_sessions',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('session_token', sa.String(length=255), nullable=False),
+    sa.Column('ip_address', postgresql.INET(), nullable=True),
+    sa.Column('user_agent', sa.String(length=500), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('extra_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('session_token')
+    )
+    op.create_index('idx_user_sessions_expires_at', 'user_sessions', ['expires_at'], unique=False)
+    op.create_index('idx_user_sessions_token', 'user_sessions', ['session_token'], unique=False)
+    op.create_index('idx_user_sessions_user_id', 'user_sessions', ['user_id'], unique=False)
+    op.create_table('user_tokens',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('token_type', sa.String(length=50), nullable=False),
+    sa.Column('token_hash', sa.String(length=255), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('is_revoked', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('extra_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('token_hash')
+    )
+    op.create_index('idx_user_tokens_expires_at', 'user_tokens', ['expires_at'], unique=False)
+    op.create_index('idx_user_tokens_type', 'user_tokens', ['token_type'], unique=False)
+    op.create_index('idx_user_tokens_user_id', 'user_tokens', ['user_id'], unique=False)
+    op.create_table('exam_questions',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('exam_id', sa.UUID(), nullable=False),
+    sa.Column('question_id', sa.UUID(), nullable=False),
+    sa.Column('question_order', sa.Integer(), nullable=False),
+    sa.Column('points', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('extra_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.ForeignKeyConstraint(['exam_id'], ['exams.id'], ),
+    sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('exam_id', 'question_id', name='uq_exam_questions_exam_question'),
+    sa.UniqueConstraint('exam_id', 'question_order', name='uq_exam_questions_exam_order')
+    )
+    op.create_index('idx_exam_questions_exam_id', 'exam_questions', ['exam_id'], unique=False)
+    op.create_index('idx_exam_questions_question_id', 'exam_questions', ['question_id'], unique=False)
+    op.create_table('exam_registrations',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('exam_id', sa.UUID(), nullable=False),
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.Column('status', registrationstatus, nullable=False),
+    sa.Column('registered_at', sa.DateTime(), nullable=False),
+    sa.Column('approved_at', sa.DateTime(), nullable=True),
+    sa.Column('approved_by', sa.UUID(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('extra_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.ForeignKeyConstraint(['approved_by'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['exam_id'], ['exams.id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('exam_id', 'student_id', name='uq_exam_registrations_exam_student')
+    )
+    op.create_index('idx_exam_registrations_exam_id', 'exam_registrations', ['exam_id'], unique=False)
+    op.create_index('idx_exam_registrations_status', 'exam_registrations', ['status'], unique=False)
+    op.create_index('idx_exam_registrations_student_id', 'exam_registrations', ['student_id'], unique=False)
+    op.create_table('exam_sessions',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('exam_id', sa.UUID(), nullable=False),
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.Column('session_token', sa.UUID(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('ended_at', sa.DateTime(), nullable=True),
+    sa.Column('last_activity_at', sa.DateTime(), nullable=True),
+    sa.Column('status', sessionstatus, nullable=False),
+    sa.Column('browser_info', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('ip_address', postgresql.INET(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('extra_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.ForeignKeyConstraint(['exam_id'], ['exams.id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('session_token')
+    )
+    op.create_index('idx_exam_sessions_exam_id', 'exam_sessions', ['exam_id'], unique=False)
+    op.create_index('idx_exam_sessions_status', 'exam_sessions', ['status'], unique=False)
+    op.create_index('idx_exam_sessions_student_id', 'exam_sessions', ['student_id'], unique=False)
+    op.create_index('idx_exam_sessions_token', 'exam_sessions', ['session_token'], unique=False)
+    op.create_table('question_test_cases',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('question_id', sa.UUID(), nullable=False),
+    sa.Column('input_data', sa.Text(), nullable=False),
+    sa.Column('expected_output', sa.Text(), nullable=False),
+    sa.Column('is_sample', sa.Boolean(), nullable=False),
+    sa.Column('is_hidden', sa.Boolean(), nullable=False),
+    sa.Column('weight', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('extra_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_question_test_cases_is_sample', 'question_test_cases', ['is_sample'], unique=False)
+    op.create_index('idx_question_test_cases_question_id', 'question_test_cases', ['question_id'], unique=False)
+    op.create_table('student_exam_questions',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('exam_id', sa.UUID(), nullable=False),
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.Column('question_id', sa.UUID(), nullable=False),
+    sa.Column('question_order', sa.Integer(), nullable=False),
+    sa.Column('points', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('extra_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.ForeignKeyConstraint(['exam_id'], ['exams.id'], ),
+    sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('exam_id', 'student_id', 'question_id', name='uq_student_exam_question')
+    )
+    op.create_index('idx_student_exam_questions_exam_id', 'student_exam_questions', ['exam_id'], unique=False)
+    op.create_index('idx_student_exam_questions_question_id', 'student_exam_questions', ['question_id'], unique=False)
+    op.create_index('idx_student_exam_questions_student_id', 'student_exam_questions', ['student_id'], unique=False)
+    op.create_table('submissions',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('exam_id', sa.UUID(), nullable=False),
+    sa.Column('question_id', sa.UUID(), nullable=False),
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.Column('source_code', sa.Text(), nullable=False),
+    sa.Column('language', sa.String(length=50), nullable=False),
+    sa.Column('status', submissionstatus, nullable=False),
+    sa.Column('submitted_at', sa.DateTime(), nullable=False),
+    sa.Column('attempt_number', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('extra_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.ForeignKeyConstraint(['exam_id'], ['exams.id'], ),
+    sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_submissions_exam_id', 'submissions', ['exam_id'], unique=False)
+    op.create_index('idx_submissions_question_id', 'submissions', ['question_id'], unique=False)
+    op.create_index('idx_submissions_status', 'submissions', ['status'], unique=False)
+    op.create_index('idx_submissions_student_id', 'submissions', ['student_id'], unique=False)
+    op.create_index('idx_submissions_submitted_at', 'submissions', ['submitted_at'], unique=False)
+    op.create_table('exam_events',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('exam_session_id', sa.UUID(), nullable=False),
+    sa.Column('event_type', eventtype, nullable=False),
+    sa.Column('event_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('extra_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.ForeignKeyConstraint(['exam_session_id'], ['exam_sessions.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_exam_events_created_at', 'exam_events', ['created_at'], unique=False)
+    op.create_index('idx_exam_events_event_type', 'exam_events', ['event_type'], unique=False)
+    op.create_index('idx_exam_events_exam_session_id', 'exam_events', ['exam_session_id'], unique=False)
+    op.create_table('submission_events',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('submission_id', sa.UUID(), nullable=False),
+    sa.Column('event_type', eventtype, nullable=False),
+    sa.Column('event_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('extra_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.ForeignKeyConstraint(['submission_id'], ['submissions.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_submission_events_created_at', 'submission_events', ['created_at'], unique=False)
+    op.create_index('idx_submission_events_event_type', 'submission_events', ['event_type'], unique=False)
+    op.create_index('idx_submission_events_submission_id', 'submission_events', ['submission_id'], unique=False)
+    op.create_table('submission_results',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('submission_id', sa.UUID(), nullable=False),
+    sa.Column('judge0_token', sa.String(length=255), nullable=True),
+    sa.Column('status', executionstatus, nullable=False),
+    sa.Column('stdout', sa.Text(), nullable=True),
+    sa.Column('stderr', sa.Text(), nullable=True),
+    sa.Column('compile_output', sa.Text(), nullable=True),
+    sa.Column('exit_code', sa.Integer(), nullable=True),
+    sa.Column('execution_time', sa.Float(), nullable=True),
+    sa.Column('memory_used', sa.Integer(), nullable=True),
+    sa.Column('score', sa.Integer(), nullable=False),
+    sa.Column('max_score', sa.Integer(), nullable=False),
+    sa.Column('test_results', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('evaluated_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('extra_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.ForeignKeyConstraint(['submission_id'], ['submissions.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_submission_results_evaluated_at', 'submission_results', ['evaluated_at'], unique=False)
+    op.create_index('idx_submission_results_status', 'submission_results', ['status'], unique=False)
+    op.create_index('idx_submission_results_submission_id', 'submission_results', ['submission_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_table('submission_results')
+    op.drop_table('submission_events')
+    op.drop_table('exam_events')
+    op.drop_table('submissions')
+    op.drop_table('student_exam_questions')
+    op.drop_table('question_test_cases')
+    op.drop_table('exam_sessions')
+    op.drop_table('exam_registrations')
+    op.drop_table('exam_questions')
+    op.drop_table('user_tokens')
+    op.drop_table('user_sessions')
+    op.drop_table('teacher_profiles')
+    op.drop_table('student_profiles')
+    op.drop_table('questions')
+    op.drop_table('exams')
+    op.drop_table('audit_logs')
+    op.drop_table('users')
+    op.drop_table('question_categories')
+    bind = op.get_bind()
+    for enum in ENUMS:
+        enum.drop(bind, checkfirst=True)
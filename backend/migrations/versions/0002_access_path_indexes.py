@@ -0,0 +1,55 @@
+"""Composite access-path indexes, drop redundant single-column indexes
+
+Runs migrations/sql/access_path_indexes.sql, which only uses
+CREATE/DROP INDEX CONCURRENTLY ... IF [NOT] EXISTS, so it is safe on a live
+database and on one where the script was already applied by hand.
+
+Revision ID: 0002_access_path_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+from backend.migrate import sql_statements
+
+revision = "0002_access_path_indexes"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+# (name, table, columns) of the indexes dropped by the upgrade
+DROPPED_INDEXES = [
+    ("idx_users_email", "users", "email"),
+    ("idx_user_sessions_token", "user_sessions", "session_token"),
+    ("idx_exam_sessions_token", "exam_sessions", "session_token"),
+    ("idx_student_profiles_student_id", "student_profiles", "student_id"),
+    ("idx_teacher_profiles_employee_id", "teacher_profiles", "employee_id"),
+    ("idx_question_categories_name", "question_categories", "name"),
+    ("idx_student_exam_questions_exam_id", "student_exam_questions", "exam_id"),
+    ("idx_exam_questions_exam_id", "exam_questions", "exam_id"),
+    ("idx_exam_registrations_exam_id", "exam_registrations", "exam_id"),
+    ("idx_exam_sessions_exam_id", "exam_sessions", "exam_id"),
+    ("idx_submissions_exam_id", "submissions", "exam_id"),
+    ("idx_exam_events_exam_session_id", "exam_events", "exam_session_id"),
+]
+
+CREATED_INDEXES = [
+    "idx_student_exam_questions_exam_student_order",
+    "idx_exam_sessions_exam_student",
+    "idx_submissions_exam_question_student_submitted",
+    "idx_exam_events_session_created",
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for statement in sql_statements("access_path_indexes.sql"):
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in DROPPED_INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns})")
+        for name in CREATED_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
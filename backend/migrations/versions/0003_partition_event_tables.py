@@ -0,0 +1,90 @@
+"""Range-partition exam_events, submission_events and audit_logs by created_at
+
+Each table is rebuilt as a partitioned parent with monthly partitions
+(<table>_pYYYY_MM) covering its existing rows through a few months ahead,
+plus a <table>_default catch-all. The primary key becomes (id, created_at)
+because Postgres requires the partition key in every unique constraint.
+Existing rows are copied inside the migration transaction, so on a large
+database run it in a maintenance window. Later months are created, and
+expired ones dropped, by services.partitions at runtime.
+
+Revision ID: 0003_partition_event_tables
+Revises: 0002_access_path_indexes
+Create Date: 2026-10-19
+"""
+from datetime import datetime
+
+from alembic import op
+from sqlalchemy import text
+
+from backend.services.partitions import create_default_partition, ensure_partitions, month_start
+
+revision = "0003_partition_event_tables"
+down_revision = "0002_access_path_indexes"
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+# table -> (foreign key column, referenced table, [(index name, index definition)])
+TABLES = {
+    "exam_events": ("exam_session_id", "exam_sessions", [
+        ("idx_exam_events_session_created", "(exam_session_id, created_at) INCLUDE (event_type)"),
+        ("idx_exam_events_event_type", "(event_type)"),
+        ("idx_exam_events_created_at", "(created_at)"),
+    ]),
+    "submission_events": ("submission_id", "submissions", [
+        ("idx_submission_events_submission_id", "(submission_id)"),
+        ("idx_submission_events_event_type", "(event_type)"),
+        ("idx_submission_events_created_at", "(created_at)"),
+    ]),
+    "audit_logs": ("user_id", "users", [
+        ("idx_audit_logs_user_id", "(user_id)"),
+        ("idx_audit_logs_action", "(action)"),
+        ("idx_audit_logs_resource_type", "(resource_type)"),
+        ("idx_audit_logs_created_at", "(created_at)"),
+    ]),
+}
+
+
+def _rebuild(table: str, old: str, partitioned: bool) -> None:
+    """Rename `table` to `old` and recreate it (partitioned or plain) from it, copying rows"""
+    fk_column, referenced, indexes = TABLES[table]
+    op.execute(f"ALTER TABLE {table} RENAME TO {old}")
+    op.execute(f"ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey")
+    for name, _ in indexes:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+    if partitioned:
+        op.execute(f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)")
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, created_at)")
+    else:
+        op.execute(f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS)")
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id)")
+    op.execute(
+        f"ALTER TABLE {table} ADD CONSTRAINT {table}_{fk_column}_fkey "
+        f"FOREIGN KEY ({fk_column}) REFERENCES {referenced} (id)"
+    )
+    for name, definition in indexes:
+        op.execute(f"CREATE INDEX {name} ON {table} {definition}")
+
+    if partitioned:
+        conn = op.get_bind()
+        oldest = None
+        if not op.get_context().as_sql:
+            oldest = conn.execute(text(f"SELECT min(created_at) FROM {old}")).scalar()
+        ensure_partitions(conn, table, month_start(oldest or datetime.utcnow()), MONTHS_AHEAD)
+        create_default_partition(conn, table)
+
+    op.execute(f"INSERT INTO {table} SELECT * FROM {old}")
+    op.execute(f"DROP TABLE {old} CASCADE")
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        _rebuild(table, f"{table}_unpartitioned", partitioned=True)
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        _rebuild(table, f"{table}_partitioned", partitioned=False)
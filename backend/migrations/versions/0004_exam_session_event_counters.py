@@ -0,0 +1,46 @@
+"""Per-session proctoring event counters
+
+Adds exam_session_event_counters, maintained on every exam_events insert, and
+backfills it from the existing events.
+
+Revision ID: 0004_exam_session_event_counters
+Revises: 0003_partition_event_tables
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0004_exam_session_event_counters"
+down_revision = "0003_partition_event_tables"
+branch_labels = None
+depends_on = None
+
+eventtype = postgresql.ENUM(name="eventtype", create_type=False)
+
+
+def upgrade() -> None:
+    op.create_table('exam_session_event_counters',
+    sa.Column('exam_session_id', sa.UUID(), nullable=False),
+    sa.Column('event_type', eventtype, nullable=False),
+    sa.Column('exam_id', sa.UUID(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('first_at', sa.DateTime(), nullable=False),
+    sa.Column('last_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['exam_id'], ['exams.id'], ),
+    sa.ForeignKeyConstraint(['exam_session_id'], ['exam_sessions.id'], ),
+    sa.PrimaryKeyConstraint('exam_session_id', 'event_type')
+    )
+    op.create_index('idx_exam_session_event_counters_exam_id', 'exam_session_event_counters', ['exam_id'], unique=False)
+    op.execute(
+        "INSERT INTO exam_session_event_counters "
+        "(exam_session_id, event_type, exam_id, count, first_at, last_at) "
+        "SELECT e.exam_session_id, e.event_type, s.exam_id, count(*), min(e.created_at), max(e.created_at) "
+        "FROM exam_events e JOIN exam_sessions s ON s.id = e.exam_session_id "
+        "GROUP BY e.exam_session_id, e.event_type, s.exam_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_exam_session_event_counters_exam_id', table_name='exam_session_event_counters')
+    op.drop_table('exam_session_event_counters')
@@ -0,0 +1,38 @@
+"""Code drafts autosave store
+
+Revision ID: 0005_code_drafts
+Revises: 0004_exam_session_event_counters
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0005_code_drafts"
+down_revision = "0004_exam_session_event_counters"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('code_drafts',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('exam_session_id', sa.UUID(), nullable=False),
+    sa.Column('question_id', sa.UUID(), nullable=False),
+    sa.Column('language', sa.String(length=50), nullable=True),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('base_content', sa.Text(), nullable=False),
+    sa.Column('base_version', sa.Integer(), nullable=False),
+    sa.Column('history', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['exam_session_id'], ['exam_sessions.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('exam_session_id', 'question_id', name='uq_code_draft_session_question')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('code_drafts')
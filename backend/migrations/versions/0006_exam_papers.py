@@ -0,0 +1,30 @@
+"""Materialized per-student exam papers
+
+Revision ID: 0006_exam_papers
+Revises: 0005_code_drafts
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_exam_papers"
+down_revision = "0005_code_drafts"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('exam_papers',
+    sa.Column('exam_id', sa.UUID(), nullable=False),
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.LargeBinary(), nullable=True),
+    sa.Column('materialized_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['exam_id'], ['exams.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['student_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('exam_id', 'student_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('exam_papers')
@@ -0,0 +1,68 @@
+"""Exam score summary tables
+
+Adds exam_question_scores (best result per student and question) and exam_scores
+(per-student exam totals), maintained on every submission_results write, and
+backfills both from the existing results.
+
+Revision ID: 0007_exam_scores
+Revises: 0006_exam_papers
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007_exam_scores"
+down_revision = "0006_exam_papers"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('exam_question_scores',
+    sa.Column('exam_id', sa.UUID(), nullable=False),
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.Column('question_id', sa.UUID(), nullable=False),
+    sa.Column('best_score', sa.Integer(), nullable=False),
+    sa.Column('max_score', sa.Integer(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_accepted_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['exam_id'], ['exams.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['student_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('exam_id', 'student_id', 'question_id')
+    )
+    op.create_table('exam_scores',
+    sa.Column('exam_id', sa.UUID(), nullable=False),
+    sa.Column('student_id', sa.UUID(), nullable=False),
+    sa.Column('total_score', sa.Integer(), nullable=False),
+    sa.Column('max_total_score', sa.Integer(), nullable=False),
+    sa.Column('questions_attempted', sa.Integer(), nullable=False),
+    sa.Column('questions_accepted', sa.Integer(), nullable=False),
+    sa.Column('last_accepted_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['exam_id'], ['exams.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['student_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('exam_id', 'student_id')
+    )
+    op.create_index('idx_exam_scores_rank', 'exam_scores', ['exam_id', sa.text('total_score DESC'), 'last_accepted_at', 'student_id'], unique=False)
+    op.execute(
+        "INSERT INTO exam_question_scores "
+        "(exam_id, student_id, question_id, best_score, max_score, attempts, last_accepted_at, updated_at) "
+        "SELECT s.exam_id, s.student_id, s.question_id, coalesce(max(r.score), 0), coalesce(max(r.max_score), 0), "
+        "count(DISTINCT s.id), max(r.evaluated_at) FILTER (WHERE r.status = 'ACCEPTED'), now() "
+        "FROM submissions s LEFT JOIN submission_results r ON r.submission_id = s.id "
+        "GROUP BY s.exam_id, s.student_id, s.question_id"
+    )
+    op.execute(
+        "INSERT INTO exam_scores "
+        "(exam_id, student_id, total_score, max_total_score, questions_attempted, questions_accepted, last_accepted_at, updated_at) "
+        "SELECT exam_id, student_id, sum(best_score), sum(max_score), count(*), count(last_accepted_at), max(last_accepted_at), now() "
+        "FROM exam_question_scores GROUP BY exam_id, student_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_exam_scores_rank', table_name='exam_scores')
+    op.drop_table('exam_scores')
+    op.drop_table('exam_question_scores')
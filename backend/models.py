@@ -4,7 +4,7 @@ Generated from Mermaid ER Diagram
 """
 
 from sqlalchemy import (
-    Column, String, Text, Boolean, Integer, Float, DateTime, JSON,
+    Column, String, Text, Boolean, Integer, Float, DateTime, JSON, LargeBinary,
     ForeignKey, UniqueConstraint, Index, Enum as SQLEnum
 )
 from sqlalchemy.dialects.postgresql import UUID, INET, JSONB
@@ -109,7 +109,6 @@ class User(Base):
     assigned_questions = relationship("StudentExamQuestion", back_populates="student")
 
     __table_args__ = (
-        Index("idx_users_email", "email"),
         Index("idx_users_role", "role"),
         Index("idx_users_is_active", "is_active"),
     )
@@ -133,7 +132,6 @@ class UserSession(Base):
     __table_args__ = (
         Index("idx_user_sessions_user_id", "user_id"),
         Index("idx_user_sessions_expires_at", "expires_at"),
-        Index("idx_user_sessions_token", "session_token"),
     )
 
 class UserToken(Base):
@@ -176,7 +174,6 @@ class StudentProfile(Base):
     
     __table_args__ = (
         Index("idx_student_profiles_user_id", "user_id"),
-        Index("idx_student_profiles_student_id", "student_id"),
     )
 
 class StudentExamQuestion(Base):
@@ -200,7 +197,12 @@ class StudentExamQuestion(Base):
 
     __table_args__ = (
         UniqueConstraint("exam_id", "student_id", "question_id", name="uq_student_exam_question"),
-        Index("idx_student_exam_questions_exam_id", "exam_id"),
+        # Student paper lookup: WHERE exam_id AND student_id ORDER BY question_order
+        Index(
+            "idx_student_exam_questions_exam_student_order",
+            "exam_id", "student_id", "question_order",
+            postgresql_include=["question_id", "points"],
+        ),
         Index("idx_student_exam_questions_student_id", "student_id"),
         Index("idx_student_exam_questions_question_id", "question_id"),
     )
@@ -224,7 +226,6 @@ class TeacherProfile(Base):
     
     __table_args__ = (
         Index("idx_teacher_profiles_user_id", "user_id"),
-        Index("idx_teacher_profiles_employee_id", "employee_id"),
     )
 
 # Question Bank Models
@@ -243,7 +244,6 @@ class QuestionCategory(Base):
     questions = relationship("Question", back_populates="category", cascade="all, delete-orphan")
     
     __table_args__ = (
-        Index("idx_question_categories_name", "name"),
         Index("idx_question_categories_is_active", "is_active"),
     )
 
@@ -358,7 +358,6 @@ class ExamQuestion(Base):
     __table_args__ = (
         UniqueConstraint("exam_id", "question_id", name="uq_exam_questions_exam_question"),
         UniqueConstraint("exam_id", "question_order", name="uq_exam_questions_exam_order"),
-        Index("idx_exam_questions_exam_id", "exam_id"),
         Index("idx_exam_questions_question_id", "question_id"),
     )
 
@@ -383,7 +382,6 @@ class ExamRegistration(Base):
     
     __table_args__ = (
         UniqueConstraint("exam_id", "student_id", name="uq_exam_registrations_exam_student"),
-        Index("idx_exam_registrations_exam_id", "exam_id"),
         Index("idx_exam_registrations_student_id", "student_id"),
         Index("idx_exam_registrations_status", "status"),
     )
@@ -409,12 +407,14 @@ class ExamSession(Base):
     exam = relationship("Exam", back_populates="exam_sessions")
     student = relationship("User", foreign_keys=[student_id])
     exam_events = relationship("ExamEvent", back_populates="exam_session", cascade="all, delete-orphan")
+    event_counters = relationship("ExamSessionEventCounter", back_populates="exam_session", cascade="all, delete-orphan")
+    code_drafts = relationship("CodeDraft", back_populates="exam_session", cascade="all, delete-orphan")
     
     __table_args__ = (
-        Index("idx_exam_sessions_exam_id", "exam_id"),
+        # Session lookup per (exam, student), e.g. in create_submission
+        Index("idx_exam_sessions_exam_student", "exam_id", "student_id", postgresql_include=["status"]),
         Index("idx_exam_sessions_student_id", "student_id"),
         Index("idx_exam_sessions_status", "status"),
-        Index("idx_exam_sessions_token", "session_token"),
     )
 
 # Submission Models
@@ -442,7 +442,11 @@ class Submission(Base):
     submission_events = relationship("SubmissionEvent", back_populates="submission", cascade="all, delete-orphan")
 
     __table_args__ = (
-        Index("idx_submissions_exam_id", "exam_id"),   # NEW index
+        # Exam grading / latest-attempt scans: WHERE exam_id ORDER BY question_id, student_id, submitted_at
+        Index(
+            "idx_submissions_exam_question_student_submitted",
+            "exam_id", "question_id", "student_id", "submitted_at",
+        ),
         Index("idx_submissions_question_id", "question_id"),
         Index("idx_submissions_student_id", "student_id"),
         Index("idx_submissions_status", "status"),
@@ -487,7 +491,8 @@ class SubmissionEvent(Base):
     submission_id = Column(UUID(as_uuid=True), ForeignKey("submissions.id"), nullable=False)
     event_type = Column(SQLEnum(EventType), nullable=False)
     event_data = Column(JSONB, default=dict)
-    created_at = Column(DateTime(timezone=False), default=func.now(), nullable=False)
+    # Part of the primary key: the table is range-partitioned by month on created_at
+    created_at = Column(DateTime(timezone=False), default=func.now(), primary_key=True)
     extra_data = Column(JSONB, default=dict)
     
     # Relationships
@@ -497,6 +502,7 @@ class SubmissionEvent(Base):
         Index("idx_submission_events_submission_id", "submission_id"),
         Index("idx_submission_events_event_type", "event_type"),
         Index("idx_submission_events_created_at", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
 
 class ExamEvent(Base):
@@ -506,16 +512,111 @@ class ExamEvent(Base):
     exam_session_id = Column(UUID(as_uuid=True), ForeignKey("exam_sessions.id"), nullable=False)
     event_type = Column(SQLEnum(EventType), nullable=False)
     event_data = Column(JSONB, default=dict)
-    created_at = Column(DateTime(timezone=False), default=func.now(), nullable=False)
+    # Part of the primary key: the table is range-partitioned by month on created_at
+    created_at = Column(DateTime(timezone=False), default=func.now(), primary_key=True)
     extra_data = Column(JSONB, default=dict)
     
     # Relationships
     exam_session = relationship("ExamSession", back_populates="exam_events")
     
     __table_args__ = (
-        Index("idx_exam_events_exam_session_id", "exam_session_id"),
+        # Per-session timelines and counts: WHERE exam_session_id ORDER BY created_at
+        Index(
+            "idx_exam_events_session_created",
+            "exam_session_id", "created_at",
+            postgresql_include=["event_type"],
+        ),
         Index("idx_exam_events_event_type", "event_type"),
         Index("idx_exam_events_created_at", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+class ExamSessionEventCounter(Base):
+    """Running per-session tally of exam events by type, maintained on insert"""
+    __tablename__ = "exam_session_event_counters"
+    
+    exam_session_id = Column(UUID(as_uuid=True), ForeignKey("exam_sessions.id"), primary_key=True)
+    event_type = Column(SQLEnum(EventType), primary_key=True)
+    exam_id = Column(UUID(as_uuid=True), ForeignKey("exams.id"), nullable=False)
+    count = Column(Integer, default=0, nullable=False)
+    first_at = Column(DateTime(timezone=False), nullable=False)
+    last_at = Column(DateTime(timezone=False), nullable=False)
+    
+    # Relationships
+    exam_session = relationship("ExamSession", back_populates="event_counters")
+    
+    __table_args__ = (
+        # Whole-exam proctoring summary: WHERE exam_id
+        Index("idx_exam_session_event_counters_exam_id", "exam_id"),
+    )
+
+class CodeDraft(Base):
+    """Autosaved code for one question in an exam session: latest content plus delta history"""
+    __tablename__ = "code_drafts"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    exam_session_id = Column(UUID(as_uuid=True), ForeignKey("exam_sessions.id", ondelete="CASCADE"), nullable=False)
+    question_id = Column(UUID(as_uuid=True), ForeignKey("questions.id", ondelete="CASCADE"), nullable=False)
+    language = Column(String(50))
+    content = Column(Text, default="", nullable=False)
+    version = Column(Integer, default=0, nullable=False)
+    # Snapshot at base_version; replaying `history` on it yields `content`
+    base_content = Column(Text, default="", nullable=False)
+    base_version = Column(Integer, default=0, nullable=False)
+    history = Column(JSONB, default=list, nullable=False)
+    created_at = Column(DateTime(timezone=False), default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=False), default=func.now(), onupdate=func.now(), nullable=False)
+    
+    # Relationships
+    exam_session = relationship("ExamSession", back_populates="code_drafts")
+    
+    __table_args__ = (
+        UniqueConstraint("exam_session_id", "question_id", name="uq_code_draft_session_question"),
+    )
+
+class ExamPaper(Base):
+    """
+    Pre-serialized question paper for one student in one exam (gzip-compressed JSON).
+    payload is cleared when the student's assignments or their questions change and
+    rebuilt on next read; version increases on every rebuild.
+    """
+    __tablename__ = "exam_papers"
+    
+    exam_id = Column(UUID(as_uuid=True), ForeignKey("exams.id", ondelete="CASCADE"), primary_key=True)
+    student_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, default=1, nullable=False)
+    payload = Column(LargeBinary)
+    materialized_at = Column(DateTime(timezone=False), default=func.now(), nullable=False)
+
+class ExamQuestionScore(Base):
+    """Best result of one student on one question of an exam, recomputed whenever their results change"""
+    __tablename__ = "exam_question_scores"
+    
+    exam_id = Column(UUID(as_uuid=True), ForeignKey("exams.id", ondelete="CASCADE"), primary_key=True)
+    student_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    question_id = Column(UUID(as_uuid=True), ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True)
+    best_score = Column(Integer, default=0, nullable=False)
+    max_score = Column(Integer, default=0, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_accepted_at = Column(DateTime(timezone=False))
+    updated_at = Column(DateTime(timezone=False), default=func.now(), onupdate=func.now(), nullable=False)
+
+class ExamScore(Base):
+    """Per-student exam totals over exam_question_scores; the leaderboard reads only this table"""
+    __tablename__ = "exam_scores"
+    
+    exam_id = Column(UUID(as_uuid=True), ForeignKey("exams.id", ondelete="CASCADE"), primary_key=True)
+    student_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    total_score = Column(Integer, default=0, nullable=False)
+    max_total_score = Column(Integer, default=0, nullable=False)
+    questions_attempted = Column(Integer, default=0, nullable=False)
+    questions_accepted = Column(Integer, default=0, nullable=False)
+    last_accepted_at = Column(DateTime(timezone=False))
+    updated_at = Column(DateTime(timezone=False), default=func.now(), onupdate=func.now(), nullable=False)
+    
+    __table_args__ = (
+        # Leaderboard pages: WHERE exam_id ORDER BY total_score DESC, last_accepted_at, student_id
+        Index("idx_exam_scores_rank", exam_id, total_score.desc(), last_accepted_at, student_id),
     )
 
 # Audit Model
@@ -531,7 +632,8 @@ class AuditLog(Base):
     new_values = Column(JSONB, default=dict)
     ip_address = Column(INET)
     user_agent = Column(String(500))
-    created_at = Column(DateTime(timezone=False), default=func.now(), nullable=False)
+    # Part of the primary key: the table is range-partitioned by month on created_at
+    created_at = Column(DateTime(timezone=False), default=func.now(), primary_key=True)
     extra_data = Column(JSONB, default=dict)
     
     # Relationships
@@ -542,4 +644,5 @@ class AuditLog(Base):
         Index("idx_audit_logs_action", "action"),
         Index("idx_audit_logs_resource_type", "resource_type"),
         Index("idx_audit_logs_created_at", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
\ No newline at end of file
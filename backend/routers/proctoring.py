@@ -0,0 +1,81 @@
+import asyncio
+import logging
+from uuid import UUID
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+from starlette.concurrency import run_in_threadpool
+
+from backend import crud, models
+from backend.auth import jwt_utils
+from backend.database import SessionLocal
+from backend.services.proctoring_stream import proctoring_broker
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Idle connections get a ping this often so proxies keep them open
+PING_INTERVAL_SECONDS = 25
+# A client that has not sent its auth message by then is disconnected
+AUTH_TIMEOUT_SECONDS = 10
+
+
+def _authorized_user(token: str):
+    """Resolve an access token to an active teacher/admin, or None"""
+    try:
+        payload = jwt_utils.decode_token(token)
+    except Exception:
+        return None
+    if payload.get("type") != "access" or not payload.get("sub"):
+        return None
+    db = SessionLocal()
+    try:
+        user = crud.get_user_by_id(db, payload["sub"])
+    finally:
+        db.close()
+    if not user or not user.is_active:
+        return None
+    if user.role not in (models.UserRole.ADMIN, models.UserRole.TEACHER):
+        return None
+    return user
+
+
+async def _authenticate(websocket: WebSocket):
+    """Read the first message, {"type": "auth", "token": "<access token>"}, and resolve it like _authorized_user"""
+    try:
+        message = await asyncio.wait_for(websocket.receive_json(), timeout=AUTH_TIMEOUT_SECONDS)
+    except Exception:
+        # Timeout, disconnect, or a frame that is not JSON text
+        return None
+    if not isinstance(message, dict) or message.get("type") != "auth" or not isinstance(message.get("token"), str):
+        return None
+    return await run_in_threadpool(_authorized_user, message["token"])
+
+
+@router.websocket("/exams/{exam_id}/proctoring/ws")
+async def proctoring_stream(websocket: WebSocket, exam_id: UUID):
+    """
+    Live feed of exam events and session status changes for one exam.
+    Browsers cannot set headers on a WebSocket, and a token in the URL would end up
+    in access logs, so the client sends {"type": "auth", "token": "<access token>"}
+    as its first message and gets {"type": "authenticated"} back before the feed starts.
+    """
+    await websocket.accept()
+    if await _authenticate(websocket) is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.send_json({"type": "authenticated"})
+    async with proctoring_broker.subscribe(exam_id) as messages:
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(messages.get(), timeout=PING_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    message = {"type": "ping"}
+                await websocket.send_json(message)
+        except WebSocketDisconnect:
+            pass
+        except Exception as e:
+            # The client usually vanished mid-send; nothing to clean up beyond unsubscribing
+            logger.debug(f"Proctoring stream for exam {exam_id} closed: {e}")
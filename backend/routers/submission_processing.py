@@ -1,31 +1,33 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
 from typing import List, Dict, Any
+from uuid import UUID
 import uuid
-import aiohttp
+from sqlalchemy.orm import Session
 from ..services.submission_processor import submission_processor
-import os
+from backend import crud
+from backend.database import get_db
 
 router = APIRouter()
 
 @router.post("/exams/{exam_id}/process-submissions")
-async def process_submissions(
-    exam_id: str,
-    background_tasks: BackgroundTasks
+def process_submissions(
+    exam_id: UUID,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
 ):
     """Start processing submissions for an exam"""
     try:
-        # Fetch submissions for the exam
-        async with aiohttp.ClientSession() as session:
-            host_ip = os.getenv("VITE_HOST_IP")
-            async with session.get(
-                f"http://{host_ip}:8000/exams/{exam_id}/submissions?skip=0&limit=1000"
-            ) as response:
-                if response.status != 200:
-                    raise HTTPException(
-                        status_code=400, 
-                        detail="Failed to fetch submissions"
-                    )
-                submissions = await response.json()
+        # Only the latest attempt per (student, question) is graded; rows are
+        # streamed from the DB and reduced to the fields the processor needs
+        submissions = [
+            {
+                "id": str(submission.id),
+                "question_id": str(submission.question_id),
+                "source_code": submission.source_code,
+                "language": submission.language,
+            }
+            for submission in crud.iter_submissions_by_exam_id(db, exam_id=exam_id, latest_only=True)
+        ]
         
         if not submissions:
             raise HTTPException(
@@ -39,7 +41,7 @@ async def process_submissions(
         # Start background processing
         background_tasks.add_task(
             submission_processor.process_submissions_batch,
-            exam_id,
+            str(exam_id),
             submissions,
             job_id
         )
@@ -50,6 +52,8 @@ async def process_submissions(
             "total_submissions": len(submissions)
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -4,8 +4,8 @@ Generated from SQLAlchemy models
 """
 
 from pydantic import BaseModel, validator, Field
-from typing import Optional, Dict, Any, List
-from datetime import datetime
+from typing import Optional, Dict, Any, List, Literal
+from datetime import datetime, timezone
 from uuid import UUID, uuid4
 from .models import (
     UserRole, Difficulty, ExamType, ExamStatus, RegistrationStatus, 
@@ -394,6 +394,47 @@ class ExamSession(ExamSessionBase):
     class Config:
         orm_mode = True
 
+class ExamSessionStarted(ExamSession):
+    # Only returned to the student who created the session; it authenticates heartbeats
+    session_token: UUID
+
+class ExamSessionHeartbeat(BaseModel):
+    session_token: UUID
+
+# CodeDraft schemas
+class DraftOp(BaseModel):
+    at: int = Field(..., ge=0)
+    delete: int = Field(0, ge=0)
+    insert: str = ""
+
+class CodeDraftSave(BaseModel):
+    """Either the full `content`, or `ops` to apply to the draft at `base_version`"""
+    language: Optional[str] = None
+    content: Optional[str] = None
+    base_version: Optional[int] = None
+    ops: Optional[List[DraftOp]] = None
+
+    @validator("ops", always=True)
+    def content_or_ops(cls, v, values):
+        if (v is None) == (values.get("content") is None):
+            raise ValueError("Send exactly one of content or ops")
+        if v is not None and values.get("base_version") is None:
+            raise ValueError("base_version is required with ops")
+        return v
+
+class CodeDraftSaved(BaseModel):
+    question_id: UUID
+    version: int
+    updated_at: datetime
+
+    class Config:
+        orm_mode = True
+
+class CodeDraft(CodeDraftSaved):
+    exam_session_id: UUID
+    language: Optional[str] = None
+    content: str
+
 # Submission schemas
 class SubmissionBase(BaseModel):
     source_code: str
@@ -511,6 +552,104 @@ class ExamEvent(ExamEventBase):
     class Config:
         orm_mode = True
 
+class ExamEventBatchItem(ExamEventBase):
+    id: UUID  # generated by the client so retried batches are idempotent
+    occurred_at: datetime  # client clock; stored as created_at, clamped to the server's now
+
+    @validator("occurred_at")
+    def to_naive_utc(cls, v):
+        if v.tzinfo is not None:
+            v = v.astimezone(timezone.utc).replace(tzinfo=None)
+        return v
+
+class ExamEventBatch(BaseModel):
+    events: List[ExamEventBatchItem] = Field(..., min_items=1, max_items=500)
+
+class ExamEventBatchResult(BaseModel):
+    accepted: int
+    duplicates: int
+    rejected: List[UUID] = []
+
+# Proctoring summary schemas
+class ExamEventCounter(BaseModel):
+    event_type: EventType
+    count: int
+    first_at: datetime
+    last_at: datetime
+
+    class Config:
+        orm_mode = True
+
+class SessionProctoringSummary(BaseModel):
+    exam_session_id: UUID
+    student_id: UUID
+    total_events: int
+    counters: List[ExamEventCounter] = []
+
+# Leaderboard schemas
+class QuestionScore(BaseModel):
+    question_id: UUID
+    best_score: int
+    max_score: int
+    attempts: int
+    last_accepted_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    student_id: UUID
+    student_number: Optional[str] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    total_score: int
+    max_total_score: int
+    questions_attempted: int
+    questions_accepted: int
+    last_accepted_at: Optional[datetime] = None
+    questions: List[QuestionScore] = []
+
+class LeaderboardPage(BaseModel):
+    exam_id: UUID
+    entries: List[LeaderboardEntry] = []
+    next_cursor: Optional[str] = None
+
+# Question analytics schemas
+class ScoreHistogramBucket(BaseModel):
+    lower: float
+    upper: float
+    students: int
+
+class TestCaseAnalytics(BaseModel):
+    test_case_id: str
+    runs: int
+    failures: int
+    failure_rate: float
+    median_time: Optional[float] = None
+
+class QuestionAnalytics(BaseModel):
+    question_id: UUID
+    title: Optional[str] = None
+    difficulty: Optional[Difficulty] = None
+    assigned_students: int = 0
+    students_attempted: int = 0
+    students_solved: int = 0
+    submissions: int = 0
+    evaluated_results: int = 0
+    accepted_results: int = 0
+    pass_rate: Optional[float] = None
+    average_score_ratio: Optional[float] = None
+    median_execution_time: Optional[float] = None
+    median_memory_used: Optional[float] = None
+    score_histogram: List[ScoreHistogramBucket] = []
+    test_cases: List[TestCaseAnalytics] = []
+
+class ExamQuestionAnalytics(BaseModel):
+    exam_id: UUID
+    computed_at: datetime
+    questions: List[QuestionAnalytics] = []
+
 # AuditLog schemas
 class AuditLogBase(BaseModel):
     action: str
@@ -553,6 +692,34 @@ class StudentExamQuestionAssignment(BaseModel):
 
 class BulkStudentExamQuestionCreate(BaseModel):
     assignments: List[StudentExamQuestionAssignment]
+    # "skip" keeps existing (exam, student, question) assignments, "update" overwrites order and points
+    on_conflict: Literal["skip", "update"] = "skip"
+
+class BulkStudentExamQuestionResult(BaseModel):
+    inserted: int
+    updated: int
+    skipped: int
+    assignments: List[StudentExamQuestion] = []
+
+# Schemas for server-side assignment generation
+class AssignmentPoolSpec(BaseModel):
+    category_id: Optional[UUID] = None
+    difficulty: Optional[Difficulty] = None
+    count: int = Field(..., ge=1)
+    points: Optional[int] = None  # defaults to the exam question's points, else max_score
+
+class GenerateAssignmentsRequest(BaseModel):
+    pools: List[AssignmentPoolSpec] = Field(..., min_items=1)
+    student_ids: Optional[List[UUID]] = None  # defaults to every active registration
+    seed: Optional[int] = None
+    replace_existing: bool = False
+
+class GenerateAssignmentsResult(BaseModel):
+    exam_id: UUID
+    seed: int
+    students_assigned: int
+    students_skipped: int
+    assignments_created: int
 
 # Schema for student exam questions with question details
 class StudentExamQuestionWithQuestion(StudentExamQuestionBase):
@@ -567,6 +734,30 @@ class StudentExamQuestionWithQuestion(StudentExamQuestionBase):
     class Config:
         orm_mode = True
 
+# Schemas for the exam start bundle
+class QuestionWithSamples(Question):
+    test_cases: List[QuestionTestCase] = []  # sample, non-hidden cases only
+
+class StudentExamQuestionWithSamples(StudentExamQuestionBase):
+    id: UUID
+    question_id: UUID
+    question: QuestionWithSamples
+
+    class Config:
+        orm_mode = True
+
+class ExamPaperContent(BaseModel):
+    exam_id: UUID
+    student_id: UUID
+    questions: List[StudentExamQuestionWithSamples] = []
+
+class ExamBootstrap(BaseModel):
+    user: User
+    exam: Exam
+    registration: Optional[ExamRegistration] = None
+    session: Optional[ExamSession] = None
+    questions: List[StudentExamQuestionWithSamples] = []
+
 # Schema for student exam questions with student profile
 class StudentExamQuestionWithStudent(StudentExamQuestionBase):
     id: UUID
@@ -0,0 +1,86 @@
+"""
+Server-side question assignment
+
+Each pool selects candidate questions by category and/or difficulty and asks for
+`count` of them per student, so every student gets the same difficulty mix.
+Draws are seeded per (seed, student), which makes a generation reproducible and
+independent of student order. A question is never drawn twice for one student,
+even when pools overlap.
+"""
+import random
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID
+
+from backend.models import Difficulty
+
+
+class AssignmentError(ValueError):
+    """The requested pools cannot be satisfied by the available questions"""
+
+
+@dataclass(frozen=True)
+class Candidate:
+    question_id: UUID
+    category_id: UUID
+    difficulty: Difficulty
+    points: int
+
+
+@dataclass(frozen=True)
+class Pool:
+    count: int
+    category_id: Optional[UUID] = None
+    difficulty: Optional[Difficulty] = None
+    points: Optional[int] = None
+
+    def matches(self, candidate: Candidate) -> bool:
+        return (
+            (self.category_id is None or candidate.category_id == self.category_id)
+            and (self.difficulty is None or candidate.difficulty == self.difficulty)
+        )
+
+
+def generate_assignments(
+    exam_id: UUID,
+    student_ids: Sequence[UUID],
+    pools: Sequence[Pool],
+    candidates: Sequence[Candidate],
+    seed: int,
+    shuffle: bool,
+) -> List[Dict[str, Any]]:
+    """student_exam_questions rows for every student; raises AssignmentError if a pool is too small"""
+    # Stable candidate order so the same seed always yields the same papers
+    ordered = sorted(candidates, key=lambda c: str(c.question_id))
+    pool_members = []
+    for index, pool in enumerate(pools):
+        members = [c for c in ordered if pool.matches(c)]
+        if len(members) < pool.count:
+            raise AssignmentError(
+                f"Pool {index + 1} needs {pool.count} questions but only {len(members)} match"
+            )
+        pool_members.append(members)
+
+    rows = []
+    for student_id in student_ids:
+        rng = random.Random(f"{seed}:{student_id}")
+        chosen = set()
+        picks = []
+        for pool, members in zip(pools, pool_members):
+            available = [c for c in members if c.question_id not in chosen]
+            if len(available) < pool.count:
+                raise AssignmentError("Overlapping pools do not leave enough distinct questions")
+            for candidate in rng.sample(available, pool.count):
+                chosen.add(candidate.question_id)
+                picks.append((candidate, pool.points if pool.points is not None else candidate.points))
+        if shuffle:
+            rng.shuffle(picks)
+        for order, (candidate, points) in enumerate(picks, start=1):
+            rows.append({
+                "exam_id": exam_id,
+                "student_id": student_id,
+                "question_id": candidate.question_id,
+                "question_order": order,
+                "points": points,
+            })
+    return rows
@@ -0,0 +1,176 @@
+"""
+gzip / brotli response compression
+
+Pure ASGI middleware, so streamed responses (result exports) are compressed chunk
+by chunk instead of buffered. A response is left alone when it is smaller than
+`minimum_size`, its content type is not textual, it already has a Content-Encoding
+(the pre-gzipped /exams/{id}/paper), it is a range or HEAD response, or it carries
+Cache-Control: no-transform. Strong ETags are weakened on compressed responses;
+If-None-Match comparisons elsewhere are weak, so revalidation keeps working.
+
+brotli is used when the client prefers or equally accepts it and the brotli
+package is installed; otherwise gzip.
+"""
+import zlib
+from typing import Optional, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_CONTENT_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def choose_encoding(accept_encoding: str, brotli_available: bool = brotli is not None) -> Optional[str]:
+    """Best of "br" / "gzip" acceptable to the client, honouring q-values; None if neither"""
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if coding:
+            weights[coding] = q
+    wildcard = weights.get("*", 0.0)
+    candidates = [("br", 2), ("gzip", 1)] if brotli_available else [("gzip", 1)]
+    best, best_key = None, (0.0, 0)
+    for coding, preference in candidates:
+        q = weights.get(coding, wildcard)
+        if q > 0 and (q, preference) > best_key:
+            best, best_key = coding, (q, preference)
+    return best
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=brotli_quality)
+            self._gzip = None
+        else:
+            self._br = None
+            self._gzip = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        """Compressed bytes for `data`, flushed so the client can decode them right away"""
+        if self._br is not None:
+            return self._br.process(data) + self._br.flush()
+        return self._gzip.compress(data) + self._gzip.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self._br is not None:
+            return self._br.process(data) + self._br.finish()
+        return self._gzip.compress(data) + self._gzip.flush()
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        content_types: Sequence[str] = DEFAULT_CONTENT_TYPES,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.content_types = tuple(content_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(self, send, encoding)
+        await self.app(scope, receive, responder.send)
+
+    def compressible(self, status: int, headers: Headers) -> bool:
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return (
+            200 <= status < 300 and status != 204
+            and "content-encoding" not in headers
+            and "content-range" not in headers
+            and "no-transform" not in headers.get("cache-control", "").lower()
+            and any(content_type.startswith(allowed) for allowed in self.content_types)
+        )
+
+
+class _CompressingResponder:
+    def __init__(self, middleware: CompressionMiddleware, send: Send, encoding: str):
+        self.middleware = middleware
+        self._send = send
+        self.encoding = encoding
+        self.start: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+        if self.passthrough:
+            await self._send(message)
+            return
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            headers = MutableHeaders(raw=self.start["headers"])
+            eligible = self.middleware.compressible(self.start["status"], headers)
+            if eligible:
+                vary = headers.get("vary")
+                if not vary:
+                    headers["Vary"] = "Accept-Encoding"
+                elif "accept-encoding" not in vary.lower():
+                    headers["Vary"] = f"{vary}, Accept-Encoding"
+            if not eligible or (not more_body and len(body) < self.middleware.minimum_size):
+                self.passthrough = True
+                await self._send(self.start)
+                await self._send(message)
+                return
+
+            self.compressor = _Compressor(self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality)
+            headers["Content-Encoding"] = self.encoding
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+            if more_body:
+                # Streamed: length unknown up front
+                del headers["Content-Length"]
+            else:
+                body = self.compressor.finish(body)
+                headers["Content-Length"] = str(len(body))
+                await self._send(self.start)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+            await self._send(self.start)
+
+        if more_body:
+            data = self.compressor.chunk(body)
+            if data:
+                await self._send({"type": "http.response.body", "body": data, "more_body": True})
+        else:
+            await self._send({"type": "http.response.body", "body": self.compressor.finish(body)})
@@ -0,0 +1,89 @@
+"""
+Conditional GET for resource endpoints
+
+Detail routes derive a weak ETag and Last-Modified from the row's (id, updated_at),
+plus any other timestamp the route passes for columns written without bumping
+updated_at (an exam session's last_activity_at). List routes derive an ETag only,
+from max(updated_at), count(*) and the sum of the rows' xmin over the listed rows
+plus the page parameters. A request whose If-None-Match (or, without one, If-Modified-Since)
+still matches gets an empty 304 before the ORM objects are serialized; otherwise
+the validators are added to the normal response.
+
+    db_user = crud.get_user(db, id=user_id)
+    ...
+    conditional.check_entity(request, response, db_user)
+    return db_user
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.orm import Session
+
+from backend.services.response_cache import etag_matches
+
+
+def weak_etag(*parts: Any) -> str:
+    digest = hashlib.sha1(":".join(str(part) for part in parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def _http_date(value: datetime) -> str:
+    # updated_at columns are naive UTC
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def _not_modified_since(if_modified_since: Optional[str], last_modified: datetime) -> bool:
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+
+
+def evaluate(request: Request, response: Response, etag: str, last_modified: Optional[datetime]) -> None:
+    """Raise a 304 if the client's copy is current, else attach ETag/Last-Modified to `response`"""
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = _http_date(last_modified)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        not_modified = etag_matches(if_none_match, etag)
+    else:
+        not_modified = last_modified is not None and _not_modified_since(request.headers.get("if-modified-since"), last_modified)
+    if not_modified:
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+
+
+def check_entity(request: Request, response: Response, obj: Any, *also_modified: Optional[datetime]) -> None:
+    """Validators for a single row from its table, id, updated_at and any `also_modified` timestamps"""
+    stamps = [obj.updated_at, *also_modified]
+    etag = weak_etag(obj.__tablename__, obj.id, *(stamp.isoformat() if stamp else "" for stamp in stamps))
+    evaluate(request, response, etag, max((stamp for stamp in stamps if stamp), default=None))
+
+
+def check_collection(request: Request, response: Response, db: Session, model: Any, *criteria: Any) -> None:
+    """
+    ETag for a list of `model` rows matching `criteria`, from one aggregate query.
+    max(updated_at) and count(*) alone miss changes: updated_at is the writing
+    transaction's start time, so a long transaction can commit an update stamped
+    earlier than the current max, and a delete plus an insert keeps the count.
+    Every insert or update gives its row a new xmin (the writing transaction id),
+    so their sum acts as a change counter. No Last-Modified is sent, because a
+    timestamp cannot represent such changes for If-Modified-Since.
+    The path and query string (filters, skip, limit) are part of the tag.
+    """
+    xmin = literal_column(f"{model.__tablename__}.xmin::text::bigint")
+    latest, total, changes = db.execute(
+        select(func.max(model.updated_at), func.count(), func.sum(xmin)).select_from(model).where(*criteria)
+    ).one()
+    etag = weak_etag(request.url.path, request.url.query, latest.isoformat() if latest else "", total, changes)
+    evaluate(request, response, etag, None)
@@ -0,0 +1,141 @@
+"""
+Code draft deltas and history compaction
+
+A draft row keeps the latest content, a base snapshot, and the list of deltas
+that lead from the base to the latest version. Each delta is a list of splice ops
+{"at": offset, "delete": n, "insert": text} applied in order.
+Compaction folds old deltas into the base so each row keeps only the most recent
+`keep` deltas.
+"""
+import difflib
+import logging
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from backend import models
+
+logger = logging.getLogger(__name__)
+
+
+class DraftConflict(Exception):
+    """The client's base_version is not the stored version"""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"Draft is at version {current_version}")
+        self.current_version = current_version
+
+
+def apply_ops(content: str, ops: Sequence[Dict[str, Any]]) -> str:
+    """Apply splice ops in order; raises ValueError if an op falls outside the text"""
+    for op in ops:
+        at, delete, insert = op["at"], op.get("delete", 0), op.get("insert", "")
+        if at < 0 or delete < 0 or at + delete > len(content):
+            raise ValueError(f"Op at {at} deleting {delete} is outside a text of length {len(content)}")
+        content = content[:at] + insert + content[at + delete:]
+    return content
+
+
+# Above this many changed characters a save is stored as one replace op, a full
+# snapshot of the changed span, instead of being diffed
+DIFF_MAX_CHARS = 200_000
+
+
+def _common_affixes(old: str, new: str) -> Tuple[int, int]:
+    """Lengths of the longest common prefix and of the longest common suffix after it"""
+    # Binary search over slice comparisons keeps the scan in C
+    lo, hi = 0, min(len(old), len(new))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old[:mid] == new[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    prefix = lo
+    lo, hi = 0, min(len(old), len(new)) - prefix
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old[len(old) - mid:] == new[len(new) - mid:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return prefix, lo
+
+
+def _offsets(lines: List[str]) -> List[int]:
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line))
+    return offsets
+
+
+def diff_ops(old: str, new: str) -> List[Dict[str, Any]]:
+    """
+    Splice ops turning `old` into `new`. The common prefix and suffix are stripped
+    and the rest is diffed by lines, so the cost follows the size of the edit
+    rather than of the file.
+    """
+    if old == new:
+        return []
+    prefix, suffix = _common_affixes(old, new)
+    old_mid, new_mid = old[prefix:len(old) - suffix], new[prefix:len(new) - suffix]
+    if not old_mid or not new_mid or len(old_mid) + len(new_mid) > DIFF_MAX_CHARS:
+        return [{"at": prefix, "delete": len(old_mid), "insert": new_mid}]
+
+    old_lines, new_lines = old_mid.splitlines(keepends=True), new_mid.splitlines(keepends=True)
+    old_at, new_at = _offsets(old_lines), _offsets(new_lines)
+    ops = []
+    shift = prefix
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, old_lines, new_lines).get_opcodes():
+        if tag == "equal":
+            continue
+        deleted = old_at[i2] - old_at[i1]
+        inserted = new_mid[new_at[j1]:new_at[j2]]
+        ops.append({"at": old_at[i1] + shift, "delete": deleted, "insert": inserted})
+        shift += len(inserted) - deleted
+    return ops
+
+
+def compact_history(
+    base_content: str, base_version: int, history: List[Dict[str, Any]], keep: int
+) -> Tuple[str, int, List[Dict[str, Any]]]:
+    """Fold all but the last `keep` deltas into the base snapshot"""
+    if len(history) <= keep:
+        return base_content, base_version, history
+    folded, kept = history[: len(history) - keep], history[len(history) - keep:]
+    for delta in folded:
+        base_content = apply_ops(base_content, delta["ops"])
+        base_version = delta["version"]
+    return base_content, base_version, kept
+
+
+def compact_drafts(session_factory: Callable[[], Session], keep: int, batch_size: int = 500) -> int:
+    """Maintenance job: compact drafts whose history has grown past twice `keep`"""
+    compacted = 0
+    db = session_factory()
+    try:
+        while True:
+            drafts = (
+                db.query(models.CodeDraft)
+                .filter(func.jsonb_array_length(models.CodeDraft.history) > keep * 2)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            if not drafts:
+                break
+            for draft in drafts:
+                try:
+                    draft.base_content, draft.base_version, draft.history = compact_history(
+                        draft.base_content, draft.base_version, list(draft.history), keep
+                    )
+                except (KeyError, ValueError) as e:
+                    # History no longer replays; restart it from the latest content
+                    logger.error(f"Resetting history of code draft {draft.id}: {e}")
+                    draft.base_content, draft.base_version, draft.history = draft.content, draft.version, []
+            db.commit()
+            compacted += len(drafts)
+    finally:
+        db.close()
+    return compacted
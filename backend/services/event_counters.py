@@ -0,0 +1,66 @@
+"""
+Incremental per-session proctoring counters
+
+Every path that inserts exam_events rows (crud.create_exam_event, the batch
+endpoint and the write-behind flush) calls record_exam_events() in the same
+transaction, so exam_session_event_counters always matches the event table and
+the proctoring summary never has to aggregate raw events.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, Tuple
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from backend import models
+
+
+def record_exam_events(db: Session, rows: Iterable[Dict[str, Any]]) -> None:
+    """Add inserted exam_events rows (dicts with exam_session_id, event_type, created_at) to the counters"""
+    totals: Dict[Tuple[UUID, models.EventType], Dict[str, Any]] = {}
+    for row in rows:
+        key = (row["exam_session_id"], row["event_type"])
+        created_at: datetime = row["created_at"]
+        total = totals.get(key)
+        if total is None:
+            totals[key] = {"count": 1, "first_at": created_at, "last_at": created_at}
+        else:
+            total["count"] += 1
+            total["first_at"] = min(total["first_at"], created_at)
+            total["last_at"] = max(total["last_at"], created_at)
+    if not totals:
+        return
+
+    session_ids = {session_id for session_id, _ in totals}
+    exam_ids = dict(db.execute(
+        select(models.ExamSession.id, models.ExamSession.exam_id)
+        .where(models.ExamSession.id.in_(session_ids))
+    ).all())
+
+    values = [
+        {
+            "exam_session_id": session_id,
+            "event_type": event_type,
+            "exam_id": exam_ids[session_id],
+            **total,
+        }
+        # Sorted so concurrent writers lock counter rows in the same order
+        for (session_id, event_type), total in sorted(totals.items(), key=lambda item: (str(item[0][0]), item[0][1].value))
+        if session_id in exam_ids
+    ]
+    if not values:
+        return
+
+    table = models.ExamSessionEventCounter.__table__
+    stmt = pg_insert(table).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.exam_session_id, table.c.event_type],
+        set_={
+            "count": table.c.count + stmt.excluded.count,
+            "first_at": func.least(table.c.first_at, stmt.excluded.first_at),
+            "last_at": func.greatest(table.c.last_at, stmt.excluded.last_at),
+        },
+    )
+    db.execute(stmt)
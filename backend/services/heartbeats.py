@@ -0,0 +1,40 @@
+"""
+Per-process coalescing of exam session heartbeats
+
+Clients ping every second or so; only the first ping per session in each
+`interval` window reaches the database. The conditional UPDATE in
+crud.touch_exam_session applies the same window across processes.
+"""
+import threading
+import time
+from typing import Dict
+from uuid import UUID
+
+
+class HeartbeatCoalescer:
+    def __init__(self, interval: float, max_entries: int = 50000):
+        self.interval = interval
+        self.max_entries = max_entries
+        self._last_write: Dict[UUID, float] = {}
+        self._lock = threading.Lock()
+
+    def should_write(self, session_token: UUID) -> bool:
+        """True if this session has not been written within the interval (and reserves the write)"""
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_write.get(session_token)
+            if last is not None and now - last < self.interval:
+                return False
+            self._last_write[session_token] = now
+            if len(self._last_write) > self.max_entries:
+                self._prune(now)
+            return True
+
+    def forget(self, session_token: UUID) -> None:
+        with self._lock:
+            self._last_write.pop(session_token, None)
+
+    def _prune(self, now: float) -> None:
+        expired = [token for token, last in self._last_write.items() if now - last >= self.interval]
+        for token in expired:
+            del self._last_write[token]
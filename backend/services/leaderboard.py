@@ -0,0 +1,138 @@
+"""
+Incremental exam scoring
+
+exam_question_scores keeps each student's best score per question and exam_scores
+their exam totals. Every write to submission_results calls refresh_scores() in the
+same transaction, which recomputes only the affected (exam, student) rows: one
+student's attempts on one question, then one student's question rows. Writers for
+the same student are serialized with an advisory lock so a recompute never misses
+a result committed concurrently.
+
+Leaderboard pages are keyset-paginated over idx_exam_scores_rank, and the cursor
+carries the rank of the last row, so any page costs O(page size).
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import and_, delete, func, insert, or_, select, tuple_
+from sqlalchemy.orm import Session
+
+from backend import models
+
+ScoreKey = Tuple[UUID, UUID, UUID]  # (exam_id, student_id, question_id)
+
+
+def refresh_scores(db: Session, keys: Iterable[ScoreKey]) -> None:
+    """Recompute exam_question_scores for `keys` and exam_scores for their (exam, student) pairs"""
+    keys = sorted(set(keys), key=lambda key: tuple(str(part) for part in key))
+    if not keys:
+        return
+    students = sorted({(exam_id, student_id) for exam_id, student_id, _ in keys}, key=lambda pair: (str(pair[0]), str(pair[1])))
+    for exam_id, student_id in students:
+        db.execute(select(func.pg_advisory_xact_lock(
+            func.hashtextextended(f"exam-scores:{exam_id}:{student_id}", 0)
+        )))
+
+    Submission, Result = models.Submission, models.SubmissionResult
+    QuestionScore = models.ExamQuestionScore
+    question_keys = tuple_(QuestionScore.exam_id, QuestionScore.student_id, QuestionScore.question_id)
+    db.execute(delete(QuestionScore).where(question_keys.in_(keys)))
+    per_question = (
+        select(
+            Submission.exam_id,
+            Submission.student_id,
+            Submission.question_id,
+            func.coalesce(func.max(Result.score), 0),
+            func.coalesce(func.max(Result.max_score), 0),
+            func.count(func.distinct(Submission.id)),
+            func.max(Result.evaluated_at).filter(Result.status == models.ExecutionStatus.ACCEPTED),
+            func.now(),
+        )
+        .outerjoin(Result, Result.submission_id == Submission.id)
+        .where(tuple_(Submission.exam_id, Submission.student_id, Submission.question_id).in_(keys))
+        .group_by(Submission.exam_id, Submission.student_id, Submission.question_id)
+    )
+    db.execute(insert(QuestionScore).from_select(
+        ["exam_id", "student_id", "question_id", "best_score", "max_score",
+         "attempts", "last_accepted_at", "updated_at"],
+        per_question,
+    ))
+
+    ExamScore = models.ExamScore
+    db.execute(delete(ExamScore).where(tuple_(ExamScore.exam_id, ExamScore.student_id).in_(students)))
+    totals = (
+        select(
+            QuestionScore.exam_id,
+            QuestionScore.student_id,
+            func.sum(QuestionScore.best_score),
+            func.sum(QuestionScore.max_score),
+            func.count(),
+            func.count(QuestionScore.last_accepted_at),
+            func.max(QuestionScore.last_accepted_at),
+            func.now(),
+        )
+        .where(tuple_(QuestionScore.exam_id, QuestionScore.student_id).in_(students))
+        .group_by(QuestionScore.exam_id, QuestionScore.student_id)
+    )
+    db.execute(insert(ExamScore).from_select(
+        ["exam_id", "student_id", "total_score", "max_total_score", "questions_attempted",
+         "questions_accepted", "last_accepted_at", "updated_at"],
+        totals,
+    ))
+
+
+def keys_for_submissions(db: Session, submission_ids: Iterable[UUID]) -> List[ScoreKey]:
+    Submission = models.Submission
+    return [
+        tuple(row) for row in db.execute(
+            select(Submission.exam_id, Submission.student_id, Submission.question_id)
+            .where(Submission.id.in_(set(submission_ids)))
+        )
+    ]
+
+
+# Leaderboard cursors: the sort key of the last row on the page plus its rank
+
+def encode_cursor(score: models.ExamScore, rank: int) -> str:
+    payload = [
+        score.total_score,
+        score.last_accepted_at.isoformat() if score.last_accepted_at else None,
+        str(score.student_id),
+        rank,
+    ]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[int, Optional[datetime], UUID, int]:
+    """(total_score, last_accepted_at, student_id, rank); raises ValueError on a malformed cursor"""
+    try:
+        total_score, last_accepted_at, student_id, rank = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return (
+            int(total_score),
+            datetime.fromisoformat(last_accepted_at) if last_accepted_at else None,
+            UUID(student_id),
+            int(rank),
+        )
+    except (TypeError, ValueError, json.JSONDecodeError) as e:
+        raise ValueError(f"Invalid leaderboard cursor: {e}")
+
+
+def after_cursor(total_score: int, last_accepted_at: Optional[datetime], student_id: UUID):
+    """Rows ranked after the cursor in ORDER BY total_score DESC, last_accepted_at ASC NULLS LAST, student_id"""
+    ExamScore = models.ExamScore
+    if last_accepted_at is None:
+        same_score_after = and_(ExamScore.last_accepted_at.is_(None), ExamScore.student_id > student_id)
+    else:
+        same_score_after = or_(
+            ExamScore.last_accepted_at > last_accepted_at,
+            ExamScore.last_accepted_at.is_(None),
+            and_(ExamScore.last_accepted_at == last_accepted_at, ExamScore.student_id > student_id),
+        )
+    return and_(
+        # Redundant bound that lets the index scan start at the cursor's score
+        ExamScore.total_score <= total_score,
+        or_(ExamScore.total_score < total_score, and_(ExamScore.total_score == total_score, same_score_after)),
+    )
@@ -0,0 +1,46 @@
+"""
+Periodic background maintenance (partition rollover, housekeeping jobs)
+
+Jobs are plain callables registered at startup and run on a daemon thread every
+`interval` seconds. A failing job is logged and does not stop the others.
+"""
+import logging
+import threading
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class MaintenanceWorker:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.jobs: List[Tuple[str, Callable[[], None]]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, name: str, job: Callable[[], None]) -> None:
+        self.jobs.append((name, job))
+
+    def run_once(self) -> None:
+        for name, job in self.jobs:
+            try:
+                job()
+            except Exception as e:
+                logger.error(f"Maintenance job '{name}' failed: {e}")
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
@@ -0,0 +1,127 @@
+"""
+Monthly range partitions for the append-only event tables
+
+exam_events, submission_events and audit_logs are partitioned by created_at
+(see migration 0003). Each month lives in its own partition named
+<table>_pYYYY_MM, plus a <table>_default catch-all. Maintenance keeps
+partitions created a few months ahead and drops the ones past retention, so
+purging old history is a DROP TABLE instead of a large DELETE.
+
+Postgres refuses to create a month partition while the default partition holds
+rows in its range (rows written before maintenance caught up, or with clock
+skewed timestamps). create_month_partition then detaches the default, creates
+the month, moves those rows into it and re-attaches the default, all in the
+caller's transaction.
+"""
+import logging
+import re
+from datetime import date, datetime
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = ("exam_events", "submission_events", "audit_logs")
+
+# Serializes maintenance across workers/containers sharing the database
+_ADVISORY_LOCK_KEY = 703_300_001
+
+_PARTITION_RE = re.compile(r"^(?P<table>\w+)_p(?P<year>\d{4})_(?P<month>\d{2})$")
+
+
+def month_start(value: datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + (value.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month.year:04d}_{month.month:02d}"
+
+
+def create_month_partition(conn: Connection, table: str, month: date) -> None:
+    name = partition_name(table, month)
+    if conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None:
+        return
+    start, end = month.isoformat(), add_months(month, 1).isoformat()
+    create = text(
+        f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM ('{start}') TO ('{end}')"
+    )
+    default = f"{table}_default"
+    stranded = False
+    if conn.execute(text("SELECT to_regclass(:name)"), {"name": default}).scalar() is not None:
+        stranded = conn.execute(text(
+            f"SELECT EXISTS (SELECT 1 FROM {default} WHERE created_at >= :start AND created_at < :end)"
+        ), {"start": start, "end": end}).scalar()
+    if not stranded:
+        conn.execute(create)
+        return
+
+    in_range = f"created_at >= '{start}' AND created_at < '{end}'"
+    conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {default}"))
+    conn.execute(create)
+    moved = conn.execute(text(f"INSERT INTO {name} SELECT * FROM {default} WHERE {in_range}")).rowcount
+    conn.execute(text(f"DELETE FROM {default} WHERE {in_range}"))
+    conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT"))
+    logger.info("Moved %s rows from %s into new partition %s", moved, default, name)
+
+
+def create_default_partition(conn: Connection, table: str) -> None:
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"))
+
+
+def ensure_partitions(conn: Connection, table: str, start: date, months_ahead: int) -> None:
+    """Create monthly partitions from `start` through `months_ahead` months past the current month"""
+    last = add_months(month_start(datetime.utcnow()), months_ahead)
+    month = month_start(start)
+    while month <= last:
+        create_month_partition(conn, table, month)
+        month = add_months(month, 1)
+
+
+def list_month_partitions(conn: Connection, table: str) -> List[date]:
+    rows = conn.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = :table"
+    ), {"table": table}).scalars()
+    months = []
+    for name in rows:
+        match = _PARTITION_RE.match(name)
+        if match and match.group("table") == table:
+            months.append(date(int(match.group("year")), int(match.group("month")), 1))
+    return sorted(months)
+
+
+def drop_expired_partitions(conn: Connection, table: str, retention_months: int) -> List[str]:
+    """Drop monthly partitions that end before the retention cutoff; returns dropped names"""
+    if retention_months <= 0:
+        return []
+    cutoff = add_months(month_start(datetime.utcnow()), -retention_months)
+    dropped = []
+    for month in list_month_partitions(conn, table):
+        if add_months(month, 1) <= cutoff:
+            name = partition_name(table, month)
+            conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            dropped.append(name)
+    return dropped
+
+
+def run_partition_maintenance(engine: Engine, months_ahead: int, retention_months: int) -> None:
+    """Maintain each table in its own transaction, so one failing table does not hold back the others"""
+    for table in PARTITIONED_TABLES:
+        try:
+            with engine.begin() as conn:
+                conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+                ensure_partitions(conn, table, month_start(datetime.utcnow()), months_ahead)
+                dropped = drop_expired_partitions(conn, table, retention_months)
+            if dropped:
+                logger.info("Dropped expired partitions: %s", ", ".join(dropped))
+        except Exception as e:
+            logger.error(f"Partition maintenance of {table} failed, retrying on the next run: {e}")
@@ -0,0 +1,205 @@
+"""
+Live proctoring stream: fan-out of exam events and session status changes
+
+Invigilator WebSockets subscribe per exam and receive JSON messages as they
+are ingested. The "memory" backend delivers within this process only. The
+"postgres" backend sends every message through NOTIFY and each worker LISTENs,
+so subscribers on any worker see events ingested by any other worker.
+publish() is thread-safe and never blocks the caller on the database.
+"""
+import asyncio
+import json
+import logging
+import queue
+import select
+import threading
+from collections import OrderedDict, defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Set
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from backend import models
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "proctoring_stream"
+# NOTIFY payloads must stay under 8000 bytes; event_data is dropped above this
+MAX_PAYLOAD_BYTES = 7000
+SUBSCRIBER_QUEUE_SIZE = 1000
+SESSION_CACHE_SIZE = 10000
+
+
+def exam_event_message(exam_id: UUID, event: Any) -> Dict[str, Any]:
+    return {
+        "type": "exam_event",
+        "exam_id": str(exam_id),
+        "exam_session_id": str(event.exam_session_id),
+        "event_id": str(event.id),
+        "event_type": event.event_type.value,
+        "event_data": event.event_data or {},
+        "created_at": event.created_at.isoformat() if event.created_at else None,
+    }
+
+
+def session_status_message(session: models.ExamSession) -> Dict[str, Any]:
+    return {
+        "type": "session_status",
+        "exam_id": str(session.exam_id),
+        "exam_session_id": str(session.id),
+        "student_id": str(session.student_id),
+        "status": session.status.value if session.status else None,
+    }
+
+
+class ProctoringBroker:
+    def __init__(self):
+        self.backend = "memory"
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Guards _loop: publishers and the listener schedule onto it from other threads
+        self._loop_lock = threading.Lock()
+        self._engine: Optional[Engine] = None
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._session_exams: "OrderedDict[UUID, UUID]" = OrderedDict()
+        self._session_lock = threading.Lock()
+        self._outbox: "queue.Queue[str]" = queue.Queue(maxsize=10000)
+        self._stop = threading.Event()
+        self._threads = []
+
+    @property
+    def active(self) -> bool:
+        return self._loop is not None
+
+    def start(self, loop: asyncio.AbstractEventLoop, backend: str = "memory", engine: Optional[Engine] = None) -> None:
+        with self._loop_lock:
+            self._loop = loop
+        self.backend = backend
+        self._engine = engine
+        if backend == "postgres":
+            self._stop.clear()
+            for target, name in ((self._listen, "proctoring-listen"), (self._notify, "proctoring-notify")):
+                thread = threading.Thread(target=target, name=name, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self) -> None:
+        """Stop the listener and notifier threads, then stop delivering to the loop"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+        # A thread that outlived the join, or a commit hook still publishing,
+        # finds no loop in _schedule and its message is dropped
+        with self._loop_lock:
+            self._loop = None
+
+    def _schedule(self, message: Dict[str, Any]) -> None:
+        """Hand a message to _deliver on the event loop; safe from any thread, a no-op once stopped"""
+        with self._loop_lock:
+            if self._loop is None:
+                return
+            try:
+                self._loop.call_soon_threadsafe(self._deliver, message)
+            except RuntimeError:
+                # The loop closed during shutdown
+                pass
+
+    def exam_id_for_session(self, db: Session, exam_session_id: UUID) -> Optional[UUID]:
+        """exam_id of a session, cached since a session never moves between exams"""
+        with self._session_lock:
+            exam_id = self._session_exams.get(exam_session_id)
+            if exam_id is not None:
+                self._session_exams.move_to_end(exam_session_id)
+                return exam_id
+        exam_id = db.query(models.ExamSession.exam_id).filter(models.ExamSession.id == exam_session_id).scalar()
+        if exam_id is not None:
+            with self._session_lock:
+                self._session_exams[exam_session_id] = exam_id
+                if len(self._session_exams) > SESSION_CACHE_SIZE:
+                    self._session_exams.popitem(last=False)
+        return exam_id
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        if not self.active:
+            return
+        if self.backend == "postgres":
+            payload = json.dumps(message, default=str)
+            if len(payload.encode()) > MAX_PAYLOAD_BYTES:
+                payload = json.dumps({**message, "event_data": None, "truncated": True}, default=str)
+            try:
+                self._outbox.put_nowait(payload)
+            except queue.Full:
+                logger.warning("Proctoring stream outbox full, dropping message")
+        else:
+            self._schedule(message)
+
+    @asynccontextmanager
+    async def subscribe(self, exam_id: UUID) -> AsyncIterator[asyncio.Queue]:
+        key = str(exam_id)
+        subscriber: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers[key].add(subscriber)
+        try:
+            yield subscriber
+        finally:
+            self._subscribers[key].discard(subscriber)
+            if not self._subscribers[key]:
+                del self._subscribers[key]
+
+    def _deliver(self, message: Dict[str, Any]) -> None:
+        # Runs on the event loop thread
+        for subscriber in self._subscribers.get(message.get("exam_id"), ()):
+            try:
+                subscriber.put_nowait(message)
+            except asyncio.QueueFull:
+                # A stalled dashboard must not hold up everyone else
+                pass
+
+    def _notify(self) -> None:
+        while not self._stop.is_set():
+            try:
+                payloads = [self._outbox.get(timeout=1)]
+            except queue.Empty:
+                continue
+            while len(payloads) < 500:
+                try:
+                    payloads.append(self._outbox.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with self._engine.begin() as conn:
+                    conn.execute(
+                        text("SELECT pg_notify(:channel, :payload)"),
+                        [{"channel": CHANNEL, "payload": payload} for payload in payloads],
+                    )
+            except Exception as e:
+                logger.error(f"Failed to NOTIFY {len(payloads)} proctoring messages: {e}")
+
+    def _listen(self) -> None:
+        while not self._stop.is_set():
+            raw = None
+            try:
+                raw = self._engine.raw_connection()
+                conn = raw.driver_connection
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CHANNEL}")
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notification = conn.notifies.pop(0)
+                        self._schedule(json.loads(notification.payload))
+            except Exception as e:
+                logger.error(f"Proctoring stream listener failed, reconnecting: {e}")
+                self._stop.wait(5)
+            finally:
+                if raw is not None:
+                    # autocommit/LISTEN state must not leak back into the pool
+                    raw.invalidate()
+
+
+proctoring_broker = ProctoringBroker()
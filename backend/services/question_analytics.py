@@ -0,0 +1,251 @@
+"""
+Per-question analytics for an exam, computed in SQL
+
+Pass rates, runtime and memory medians, score histograms and per-test-case failure
+rates are aggregated by Postgres (percentile_cont, width_bucket, jsonb_array_elements
+over submission_results.test_results) rather than over raw result pages.
+
+Results are cached per exam against a freshness stamp: count and latest updated_at
+of the exam's exam_scores (refreshed by every submission_results write, see
+services/leaderboard.py), submissions and student_exam_questions. Any insert or
+delete changes a count and any update moves a timestamp, so the next read
+recomputes in every worker without cross-process messages. updated_at is the
+writing transaction's start time, so a long transaction can commit behind the
+stamp; crud therefore also calls analytics_cache.invalidate(exam_id) after
+committing, which covers the worker that made the change at once and others
+within the TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Hashable, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import Float, and_, case, cast, func, literal_column, select, true
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session
+
+from backend import models
+
+HISTOGRAM_BUCKETS = 10
+
+# Statuses that mean the judge has not produced a verdict yet
+UNEVALUATED = (models.ExecutionStatus.PENDING, models.ExecutionStatus.RUNNING)
+
+
+class AnalyticsCache:
+    """Small LRU of computed payloads, each valid only for the stamp it was computed at"""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 15 * 60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[Hashable, float, Any]]" = OrderedDict()
+        self._generations: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+    def generation(self, key: Hashable) -> int:
+        """Part of the stamp: taken before computing, so a computation that raced invalidate() is never served"""
+        with self._lock:
+            return self._generations.get(key, 0)
+
+    def invalidate(self, *keys: Hashable) -> None:
+        with self._lock:
+            for key in keys:
+                self._generations[key] = self._generations.get(key, 0) + 1
+                self._entries.pop(key, None)
+
+    def get(self, key: Hashable, stamp: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry_stamp, stored_at, value = entry
+            if entry_stamp != stamp or time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, stamp: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (stamp, time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+analytics_cache = AnalyticsCache()
+
+
+def freshness_stamp(db: Session, exam_id: UUID) -> Tuple[Any, ...]:
+    """Changes whenever a result, submission or question assignment of the exam is written or removed"""
+    def latest_and_count(model):
+        return (
+            select(func.max(model.updated_at)).where(model.exam_id == exam_id).scalar_subquery(),
+            select(func.count()).select_from(model).where(model.exam_id == exam_id).scalar_subquery(),
+        )
+
+    return tuple(db.execute(select(
+        *latest_and_count(models.ExamScore),
+        *latest_and_count(models.Submission),
+        *latest_and_count(models.StudentExamQuestion),
+    )).one())
+
+
+def _question_rows(db: Session, exam_id: UUID) -> Dict[UUID, Dict[str, Any]]:
+    Submission, Result = models.Submission, models.SubmissionResult
+    evaluated = Result.status.notin_(UNEVALUATED)
+    accepted = Result.status == models.ExecutionStatus.ACCEPTED
+    stats = (
+        select(
+            Submission.question_id,
+            func.count(func.distinct(Submission.student_id)).label("students_attempted"),
+            func.count(func.distinct(Submission.id)).label("submissions"),
+            func.count(Result.id).filter(evaluated).label("evaluated_results"),
+            func.count(Result.id).filter(accepted).label("accepted_results"),
+            func.count(func.distinct(Submission.student_id)).filter(accepted).label("students_solved"),
+            func.avg(cast(Result.score, Float) / cast(func.nullif(Result.max_score, 0), Float)).filter(evaluated).label("average_score_ratio"),
+            # percentile_cont skips NULLs, so CASE stands in for FILTER (which WITHIN GROUP rejects)
+            func.percentile_cont(0.5).within_group(case((evaluated, Result.execution_time))).label("median_execution_time"),
+            func.percentile_cont(0.5).within_group(case((evaluated, Result.memory_used))).label("median_memory_used"),
+        )
+        .outerjoin(Result, Result.submission_id == Submission.id)
+        .where(Submission.exam_id == exam_id)
+        .group_by(Submission.question_id)
+    )
+    rows = {row.question_id: dict(row._mapping) for row in db.execute(stats)}
+
+    assigned = (
+        select(
+            models.StudentExamQuestion.question_id,
+            func.count(func.distinct(models.StudentExamQuestion.student_id)).label("assigned_students"),
+        )
+        .where(models.StudentExamQuestion.exam_id == exam_id)
+        .group_by(models.StudentExamQuestion.question_id)
+    )
+    for question_id, assigned_students in db.execute(assigned):
+        rows.setdefault(question_id, {"question_id": question_id})["assigned_students"] = assigned_students
+    return rows
+
+
+def _score_histograms(db: Session, exam_id: UUID) -> Dict[UUID, list]:
+    """Distribution of each student's best score ratio per question, in equal-width buckets over [0, 1]"""
+    QuestionScore = models.ExamQuestionScore
+    ratio = cast(QuestionScore.best_score, Float) / cast(QuestionScore.max_score, Float)
+    # width_bucket puts a perfect score in bucket N + 1; fold it into the top bucket
+    bucket = func.least(func.width_bucket(ratio, 0.0, 1.0, HISTOGRAM_BUCKETS), HISTOGRAM_BUCKETS).label("bucket")
+    stmt = (
+        select(QuestionScore.question_id, bucket, func.count().label("students"))
+        .where(QuestionScore.exam_id == exam_id, QuestionScore.max_score > 0)
+        .group_by(QuestionScore.question_id, bucket)
+    )
+    histograms: Dict[UUID, list] = {}
+    for question_id, index, students in db.execute(stmt):
+        counts = histograms.setdefault(question_id, [0] * HISTOGRAM_BUCKETS)
+        counts[max(index, 1) - 1] += students
+    return {
+        question_id: [
+            {
+                "lower": i / HISTOGRAM_BUCKETS,
+                "upper": (i + 1) / HISTOGRAM_BUCKETS,
+                "students": count,
+            }
+            for i, count in enumerate(counts)
+        ]
+        for question_id, counts in histograms.items()
+    }
+
+
+def _test_case_rows(db: Session, exam_id: UUID) -> Dict[UUID, list]:
+    """Runs, failures and median time per test case, unpacked from test_results->'details'"""
+    Submission, Result = models.Submission, models.SubmissionResult
+    details = Result.test_results["details"]
+    detail = (
+        func.jsonb_array_elements(
+            case((func.jsonb_typeof(details) == "array", details), else_=cast(literal_column("'[]'"), JSONB))
+        )
+        .table_valued("value")
+        .lateral("detail")
+    )
+    test_case_id = detail.c.value.op("->>")("test_case_id")
+    passed = detail.c.value.op("->>")("passed")
+    raw_time = detail.c.value.op("->>")("time")
+    time_seconds = case((raw_time.op("~")(r"^[0-9]+(\.[0-9]+)?$"), cast(raw_time, Float)))
+    stmt = (
+        select(
+            Submission.question_id,
+            test_case_id.label("test_case_id"),
+            func.count().label("runs"),
+            func.count().filter(passed.is_distinct_from("true")).label("failures"),
+            func.percentile_cont(0.5).within_group(time_seconds).label("median_time"),
+        )
+        .select_from(Result)
+        .join(Submission, Submission.id == Result.submission_id)
+        .join(detail, true())
+        .where(and_(Submission.exam_id == exam_id, Result.status.notin_(UNEVALUATED), test_case_id.isnot(None)))
+        .group_by(Submission.question_id, test_case_id)
+    )
+    test_cases: Dict[UUID, list] = {}
+    for row in db.execute(stmt):
+        test_cases.setdefault(row.question_id, []).append({
+            "test_case_id": row.test_case_id,
+            "runs": row.runs,
+            "failures": row.failures,
+            "failure_rate": row.failures / row.runs if row.runs else 0.0,
+            "median_time": row.median_time,
+        })
+    for rows in test_cases.values():
+        rows.sort(key=lambda row: row["failure_rate"], reverse=True)
+    return test_cases
+
+
+def compute_question_analytics(db: Session, exam_id: UUID) -> Dict[str, Any]:
+    rows = _question_rows(db, exam_id)
+    histograms = _score_histograms(db, exam_id)
+    test_cases = _test_case_rows(db, exam_id)
+    questions = {
+        question.id: question
+        for question in db.query(models.Question).filter(models.Question.id.in_(list(rows)))
+    } if rows else {}
+
+    analytics = []
+    for question_id, row in rows.items():
+        question = questions.get(question_id)
+        evaluated_results = row.get("evaluated_results") or 0
+        accepted_results = row.get("accepted_results") or 0
+        analytics.append({
+            "question_id": question_id,
+            "title": question.title if question else None,
+            "difficulty": question.difficulty if question else None,
+            "assigned_students": row.get("assigned_students", 0),
+            "students_attempted": row.get("students_attempted", 0),
+            "students_solved": row.get("students_solved", 0),
+            "submissions": row.get("submissions", 0),
+            "evaluated_results": evaluated_results,
+            "accepted_results": accepted_results,
+            "pass_rate": accepted_results / evaluated_results if evaluated_results else None,
+            "average_score_ratio": row.get("average_score_ratio"),
+            "median_execution_time": row.get("median_execution_time"),
+            "median_memory_used": row.get("median_memory_used"),
+            "score_histogram": histograms.get(question_id, []),
+            "test_cases": test_cases.get(question_id, []),
+        })
+    # Hardest questions first
+    analytics.sort(key=lambda q: (q["pass_rate"] is None, q["pass_rate"] or 0.0))
+    return {"exam_id": exam_id, "computed_at": datetime.utcnow(), "questions": analytics}
+
+
+def get_question_analytics(db: Session, exam_id: UUID) -> Dict[str, Any]:
+    """Cached analytics, recomputed once the exam's results, submissions or assignments have changed"""
+    stamp = (analytics_cache.generation(exam_id), *freshness_stamp(db, exam_id))
+    cached = analytics_cache.get(exam_id, stamp)
+    if cached is not None:
+        return cached
+    analytics = compute_question_analytics(db, exam_id)
+    analytics_cache.put(exam_id, stamp, analytics)
+    return analytics
@@ -0,0 +1,206 @@
+"""
+Response cache for read-mostly catalog endpoints
+
+Routes wrap their loader in response_cache.respond(request, namespace, build). The
+serialized body is stored under the route path, its query string and the current
+generation of the namespace; crud bumps the generation after committing a change
+(response_cache.invalidate("questions")), which orphans every cached entry of that
+namespace at once. Orphans age out through the TTL and LRU limits.
+
+Every cached body carries an ETag (hash of the body), so a client revalidating with
+If-None-Match gets an empty 304 without the body being rebuilt or re-sent.
+
+The default backend is an in-process dict: invalidation then reaches only the worker
+that made the change, and other workers serve stale entries for at most the TTL.
+The redis backend shares entries and generations across workers; it needs the
+`redis` package and falls back to the database whenever Redis is unreachable.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, Union
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+logger = logging.getLogger(__name__)
+
+Entry = Tuple[str, bytes]  # (etag, body)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison; weak and strong forms of a tag match each other"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith("W/") else tag) == opaque:
+            return True
+    return False
+
+
+class MemoryBackend:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Entry]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def generations(self, namespaces: Sequence[str]) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self._generations.get(namespace, 0) for namespace in namespaces)
+
+    def bump(self, namespaces: Sequence[str]) -> None:
+        with self._lock:
+            for namespace in namespaces:
+                self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    def get(self, key: str) -> Optional[Entry]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, entry = item
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: Entry, ttl: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisBackend:
+    PREFIX = "response-cache:"
+
+    def __init__(self, url: str):
+        import redis  # optional dependency, only needed for this backend
+        self._redis = redis.Redis.from_url(url, socket_timeout=0.2, socket_connect_timeout=0.2)
+
+    def generations(self, namespaces: Sequence[str]) -> Tuple[int, ...]:
+        values = self._redis.mget([f"{self.PREFIX}gen:{namespace}" for namespace in namespaces])
+        return tuple(int(value or 0) for value in values)
+
+    def bump(self, namespaces: Sequence[str]) -> None:
+        pipe = self._redis.pipeline()
+        for namespace in namespaces:
+            pipe.incr(f"{self.PREFIX}gen:{namespace}")
+        pipe.execute()
+
+    def get(self, key: str) -> Optional[Entry]:
+        value = self._redis.get(self.PREFIX + key)
+        if value is None:
+            return None
+        etag, _, body = value.partition(b"\n")
+        return etag.decode(), body
+
+    def set(self, key: str, entry: Entry, ttl: int) -> None:
+        etag, body = entry
+        self._redis.set(self.PREFIX + key, etag.encode() + b"\n" + body, ex=ttl)
+
+    def clear(self) -> None:
+        for key in self._redis.scan_iter(f"{self.PREFIX}*"):
+            self._redis.delete(key)
+
+
+class ResponseCache:
+    def __init__(self):
+        self.enabled = True
+        self.ttl = 60
+        self.backend: Union[MemoryBackend, RedisBackend] = MemoryBackend(max_entries=2048)
+
+    def configure(self, backend: str = "memory", ttl: int = 60, max_entries: int = 2048, redis_url: Optional[str] = None) -> None:
+        """backend is "memory", "redis" or "off"; an unusable redis setup falls back to memory"""
+        self.enabled = backend != "off"
+        self.ttl = ttl
+        self.backend = MemoryBackend(max_entries=max_entries)
+        if backend == "redis":
+            try:
+                self.backend = RedisBackend(redis_url)
+            except Exception as e:
+                logger.error(f"Response cache falling back to memory, redis backend unavailable: {e}")
+
+    def invalidate(self, *namespaces: str) -> None:
+        """Drop every cached response of these namespaces; call after the change is committed"""
+        try:
+            self.backend.bump(namespaces)
+        except Exception as e:
+            logger.error(f"Response cache invalidation of {namespaces} failed: {e}")
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def _key(self, request: Request, namespaces: Sequence[str]) -> str:
+        generations = self.backend.generations(namespaces)
+        query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+        tag = ",".join(f"{namespace}:{generation}" for namespace, generation in zip(namespaces, generations))
+        return f"{tag}|{request.url.path}?{query}"
+
+    def respond(
+        self,
+        request: Request,
+        namespaces: Union[str, Sequence[str]],
+        build: Callable[[], Any],
+        ttl: Optional[int] = None,
+    ) -> Response:
+        """
+        Cached JSON response for this request. `build` runs only on a miss and returns
+        the already-validated payload (pydantic models or plain data); exceptions it
+        raises, such as a 404, propagate and nothing is cached.
+        """
+        if isinstance(namespaces, str):
+            namespaces = (namespaces,)
+        if not self.enabled:
+            return self._response(request, *self._serialize(build()), hit=None)
+
+        key = None
+        try:
+            # The key is taken before building, so a change committed meanwhile
+            # leaves this body under the old generation where no one will read it
+            key = self._key(request, namespaces)
+            entry = self.backend.get(key)
+        except Exception as e:
+            logger.error(f"Response cache lookup failed: {e}")
+            entry = None
+        if entry is not None:
+            return self._response(request, *entry, hit=True)
+
+        entry = self._serialize(build())
+        if key is not None:
+            try:
+                self.backend.set(key, entry, ttl or self.ttl)
+            except Exception as e:
+                logger.error(f"Response cache store failed: {e}")
+        return self._response(request, *entry, hit=False)
+
+    @staticmethod
+    def _serialize(payload: Any) -> Entry:
+        body = json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode()
+        return f'"{hashlib.sha1(body).hexdigest()}"', body
+
+    @staticmethod
+    def _response(request: Request, etag: str, body: bytes, hit: Optional[bool]) -> Response:
+        headers = {"ETag": etag}
+        if hit is not None:
+            headers["X-Cache"] = "HIT" if hit else "MISS"
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+response_cache = ResponseCache()
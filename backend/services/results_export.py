@@ -0,0 +1,238 @@
+"""
+Streaming export of exam results
+
+Rows come from a server-side cursor (yield_per) over submissions joined to their
+results, questions and student profiles, and are encoded chunk by chunk, so memory
+stays flat however many rows the exam has. CSV and JSONL can additionally be gzipped
+on the fly; parquet uses its own column compression and needs pyarrow (in
+requirements.txt; without it the format answers 501).
+"""
+import csv
+import enum
+import io
+import json
+import zlib
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend import models
+
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+COLUMNS = [
+    "submission_id",
+    "student_user_id",
+    "student_number",
+    "first_name",
+    "last_name",
+    "email",
+    "question_id",
+    "question_title",
+    "attempt_number",
+    "language",
+    "submission_status",
+    "submitted_at",
+    "result_id",
+    "result_status",
+    "score",
+    "max_score",
+    "execution_time",
+    "memory_used",
+    "evaluated_at",
+]
+
+ROWS_PER_CHUNK = 1000
+
+
+class ExportUnavailable(Exception):
+    """The requested export format cannot be produced on this server"""
+
+
+def export_statement(exam_id: UUID):
+    """One row per (submission, result); submissions without a result yet keep NULL result columns"""
+    Submission, Result = models.Submission, models.SubmissionResult
+    return (
+        select(
+            Submission.id.label("submission_id"),
+            Submission.student_id.label("student_user_id"),
+            models.StudentProfile.student_id.label("student_number"),
+            models.StudentProfile.first_name,
+            models.StudentProfile.last_name,
+            models.User.email,
+            Submission.question_id,
+            models.Question.title.label("question_title"),
+            Submission.attempt_number,
+            Submission.language,
+            Submission.status.label("submission_status"),
+            Submission.submitted_at,
+            Result.id.label("result_id"),
+            Result.status.label("result_status"),
+            Result.score,
+            Result.max_score,
+            Result.execution_time,
+            Result.memory_used,
+            Result.evaluated_at,
+        )
+        .join(models.Question, models.Question.id == Submission.question_id)
+        .join(models.User, models.User.id == Submission.student_id)
+        .outerjoin(models.StudentProfile, models.StudentProfile.user_id == Submission.student_id)
+        .outerjoin(Result, Result.submission_id == Submission.id)
+        .where(Submission.exam_id == exam_id)
+        .order_by(Submission.student_id, Submission.question_id, Submission.submitted_at, Result.evaluated_at)
+        .execution_options(yield_per=ROWS_PER_CHUNK)
+    )
+
+
+def iter_rows(session_factory: Callable[[], Session], exam_id: UUID) -> Iterator[Dict[str, Any]]:
+    """Stream export rows on a session of its own, closed once the stream ends or is abandoned"""
+    db = session_factory()
+    try:
+        for row in db.execute(export_statement(exam_id)):
+            yield dict(row._mapping)
+    finally:
+        db.close()
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def _chunks(rows: Iterable[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= ROWS_PER_CHUNK:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def encode_csv(rows: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for chunk in _chunks(rows):
+        for row in chunk:
+            writer.writerow(["" if row[c] is None else _plain(row[c]) for c in COLUMNS])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    # Header-only export for an exam with no submissions
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def encode_jsonl(rows: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    for chunk in _chunks(rows):
+        lines = [json.dumps({c: _plain(row[c]) for c in COLUMNS}) for row in chunk]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last take()"""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ExportUnavailable("Parquet export requires the pyarrow package")
+    return pyarrow, pyarrow.parquet
+
+
+def encode_parquet(rows: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """One parquet row group per chunk, flushed to the client as soon as it is written"""
+    pa, pq = _pyarrow()
+
+    schema = pa.schema([
+        ("submission_id", pa.string()),
+        ("student_user_id", pa.string()),
+        ("student_number", pa.string()),
+        ("first_name", pa.string()),
+        ("last_name", pa.string()),
+        ("email", pa.string()),
+        ("question_id", pa.string()),
+        ("question_title", pa.string()),
+        ("attempt_number", pa.int32()),
+        ("language", pa.string()),
+        ("submission_status", pa.string()),
+        ("submitted_at", pa.timestamp("us")),
+        ("result_id", pa.string()),
+        ("result_status", pa.string()),
+        ("score", pa.int32()),
+        ("max_score", pa.int32()),
+        ("execution_time", pa.float64()),
+        ("memory_used", pa.int64()),
+        ("evaluated_at", pa.timestamp("us")),
+    ])
+    timestamps = {"submitted_at", "evaluated_at"}
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        for chunk in _chunks(rows):
+            columns = {
+                c: [row[c] if c in timestamps else _plain(row[c]) for row in chunk] for c in COLUMNS
+            }
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
+
+
+def gzip_stream(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+ENCODERS = {"csv": encode_csv, "jsonl": encode_jsonl, "parquet": encode_parquet}
+
+
+def stream_export(
+    session_factory: Callable[[], Session], exam_id: UUID, fmt: str, compress: bool = False
+) -> Iterator[bytes]:
+    """Encoded export body; raises ExportUnavailable before any row is read if the format cannot be produced"""
+    if fmt == "parquet":
+        _pyarrow()
+    body = ENCODERS[fmt](iter_rows(session_factory, exam_id))
+    if compress and fmt != "parquet":
+        body = gzip_stream(body)
+    return body
@@ -0,0 +1,63 @@
+"""
+Sparse fieldsets: `?fields=id,title,difficulty`
+
+A route declares `fields: Optional[List[str]] = Depends(fields_param(schemas.Question))`;
+the dependency validates the comma list against the schema and answers 400 for
+unknown names. crud narrows the SELECT with load_only(), so the large Text/JSONB
+columns a caller did not ask for are never read, and the route returns
+fast_json.rows_to_dicts(rows, schema, fields) instead of the full response_model.
+Without `fields` the route behaves exactly as before.
+
+`id` is always returned. The SQL projection additionally keeps `updated_at` so
+conditional GET validators do not trigger a lazy load of the row.
+"""
+from typing import Any, List, Optional, Sequence, Type
+
+from fastapi import HTTPException, Query, status
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+
+ALWAYS_LOADED = ("id", "updated_at")
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[List[str]]:
+    """Requested field names in order, `id` first; None when `fields` is absent or empty"""
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    if not names:
+        return None
+    unknown = sorted(set(names) - set(schema.__fields__))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(schema.__fields__)}",
+        )
+    if "id" in schema.__fields__:
+        names.insert(0, "id")
+    return list(dict.fromkeys(names))
+
+
+def fields_param(schema: Type[BaseModel]):
+    """Dependency parsing the `fields` query parameter against `schema`"""
+    description = f"Comma-separated subset of: {', '.join(schema.__fields__)}"
+
+    def dependency(fields: Optional[str] = Query(None, description=description)) -> Optional[List[str]]:
+        return parse_fields(fields, schema)
+
+    return dependency
+
+
+def load_only_option(model: Any, names: Sequence[str]):
+    """load_only() over the column attributes of `model` among `names` (plus id/updated_at)"""
+    columns = inspect(model).column_attrs.keys()
+    wanted = dict.fromkeys([*ALWAYS_LOADED, *names])
+    return load_only(*(getattr(model, name) for name in wanted if name in columns))
+
+
+def narrow(query, model: Any, names: Optional[Sequence[str]]):
+    """`query` restricted to the requested columns; unchanged when names is None"""
+    if names is None:
+        return query
+    return query.options(load_only_option(model, names))
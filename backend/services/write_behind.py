@@ -0,0 +1,221 @@
+"""
+Write-behind buffer for append-only telemetry rows (exam and submission events)
+
+Request handlers hand rows to `write_behind.submit()` and return immediately; a
+background thread inserts them in multi-row batches when `batch_rows` rows are
+queued or `flush_interval` seconds have passed. The queue is bounded: when it is
+full the caller waits up to `put_timeout` seconds and then writes its row
+synchronously, so memory stays capped and bursts slow down instead of failing.
+While the buffer is not running, submit() writes synchronously; synchronous
+writes raise to the caller like any other insert.
+
+Callers validate foreign keys before submitting, so a queued row is expected to
+insert. A batch that fails on a connection error is retried on the following
+flushes, up to `max_attempts` times; rows that still cannot be written, or that
+the database rejects outright, are appended as JSON lines to `dead_letter_path`
+for replay instead of being dropped. Remaining rows are flushed on stop(). Rows
+still queued when the process is killed outright are lost, which is why the
+buffer is off unless WRITE_BEHIND_ENABLED is set.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.orm import Session
+
+from backend.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+# (model, row, attempts so far)
+_Item = Tuple[Type, Dict[str, Any], int]
+
+
+def _is_transient(error: Exception) -> bool:
+    """Connection-level failures worth retrying, as opposed to rows the database rejects"""
+    if isinstance(error, (OperationalError, InterfaceError)):
+        return True
+    return isinstance(error, DBAPIError) and error.connection_invalidated
+
+
+class WriteBehindBuffer:
+    def __init__(self, session_factory: Callable[[], Session]):
+        self.session_factory = session_factory
+        self.batch_rows = 500
+        self.flush_interval = 1.0
+        self.put_timeout = 0.05
+        self.max_attempts = 5
+        self.dead_letter_path = "logs/write_behind_dead_letter.jsonl"
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._hooks: Dict[Type, List[Callable[[Session, List[Dict[str, Any]]], None]]] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def on_insert(self, model: Type, hook: Callable[[Session, List[Dict[str, Any]]], None]) -> None:
+        """Run `hook(db, rows)` in the same transaction as every insert of `model` rows"""
+        self._hooks.setdefault(model, []).append(hook)
+
+    def start(
+        self,
+        max_rows: int,
+        batch_rows: int,
+        flush_interval: float,
+        put_timeout: float,
+        max_attempts: int = 5,
+        dead_letter_path: Optional[str] = None,
+    ) -> None:
+        if self.running:
+            return
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.max_attempts = max_attempts
+        if dead_letter_path:
+            self.dead_letter_path = dead_letter_path
+        self._queue = queue.Queue(maxsize=max_rows)
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 30) -> None:
+        """Flush everything queued so far and stop the flush thread"""
+        if not self.running:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def submit(self, model: Type, values: Dict[str, Any]) -> Any:
+        """Queue a row for `model` and return a transient instance carrying its id and created_at"""
+        row = dict(values)
+        row.setdefault("id", uuid.uuid4())
+        row.setdefault("created_at", datetime.utcnow())
+        if not self.running:
+            self._write_now(model, row)
+        else:
+            try:
+                self._queue.put((model, row, 0), timeout=self.put_timeout)
+            except queue.Full:
+                logger.warning("Write-behind queue full, writing %s row synchronously", model.__tablename__)
+                self._write_now(model, row)
+        return model(**row)
+
+    def _write_now(self, model: Type, row: Dict[str, Any]) -> None:
+        db = self.session_factory()
+        try:
+            self._insert(db, model, [row])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        stopping = False
+        retry: List[_Item] = []
+        while not stopping:
+            batch: List[_Item] = retry
+            retry = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            if stopping:
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not _STOP:
+                        batch.append(item)
+            if batch:
+                retry = self._write(batch)
+        if retry:
+            self._dead_letter(retry, "not written before shutdown")
+
+    def _write(self, batch: List[_Item]) -> List[_Item]:
+        """Insert `batch`; returns the rows to retry on the next flush"""
+        by_model: Dict[Type, List[_Item]] = {}
+        for item in batch:
+            by_model.setdefault(item[0], []).append(item)
+
+        retry: List[_Item] = []
+        for model, items in by_model.items():
+            db = self.session_factory()
+            try:
+                self._insert(db, model, [row for _, row, _ in items])
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                if _is_transient(e):
+                    logger.warning(f"Bulk insert of {len(items)} {model.__tablename__} rows failed, will retry: {e}")
+                    retry.extend(self._next_attempt(items, e))
+                    continue
+                # One bad row (e.g. a dangling foreign key) must not hold back the rest of the batch
+                logger.error(f"Bulk insert of {len(items)} {model.__tablename__} rows failed: {e}")
+                for item in items:
+                    try:
+                        self._insert(db, model, [item[1]])
+                        db.commit()
+                    except Exception as row_error:
+                        db.rollback()
+                        if _is_transient(row_error):
+                            retry.extend(self._next_attempt([item], row_error))
+                        else:
+                            self._dead_letter([item], str(row_error))
+            finally:
+                db.close()
+        return retry
+
+    def _next_attempt(self, items: List[_Item], error: Exception) -> List[_Item]:
+        """Items with their attempt count bumped; those out of attempts go to the dead-letter file"""
+        again = [(model, row, attempts + 1) for model, row, attempts in items]
+        exhausted = [item for item in again if item[2] >= self.max_attempts]
+        if exhausted:
+            self._dead_letter(exhausted, f"gave up after {self.max_attempts} attempts: {error}")
+        return [item for item in again if item[2] < self.max_attempts]
+
+    def _dead_letter(self, items: List[_Item], reason: str) -> None:
+        """Append rows that could not be inserted to the dead-letter file, one JSON object per line"""
+        try:
+            directory = os.path.dirname(self.dead_letter_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                for model, row, _ in items:
+                    f.write(json.dumps({"table": model.__tablename__, "reason": reason, "row": row}, default=str) + "\n")
+            logger.error(f"Dead-lettered {len(items)} rows to {self.dead_letter_path}: {reason}")
+        except OSError as e:
+            # Last resort: the rows stay recoverable from the log
+            for model, row, _ in items:
+                logger.error(f"Dropped {model.__tablename__} row ({reason}; dead-letter write failed: {e}): {row}")
+
+    def _insert(self, db: Session, model: Type, rows: List[Dict[str, Any]]) -> None:
+        db.execute(insert(model), rows)
+        for hook in self._hooks.get(model, []):
+            hook(db, rows)
+
+
+write_behind = WriteBehindBuffer(SessionLocal)
@@ -1,6 +1,6 @@
 # backend/settings.py
 from pydantic import BaseSettings
-from typing import List
+from typing import List, Optional
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Online Exam System"
@@ -23,6 +23,60 @@ class Settings(BaseSettings):
     COOKIE_SECURE: bool = False  # set to True in production (HTTPS)
     CORS_ORIGINS: List[str] = ["*"]  # adjust to your Vite origin
 
+    # Background maintenance
+    MAINTENANCE_INTERVAL_SECONDS: int = 6 * 60 * 60
+
+    # Monthly partitions of exam_events / submission_events / audit_logs
+    PARTITION_MONTHS_AHEAD: int = 3
+    EVENT_RETENTION_MONTHS: int = 0  # 0 keeps every partition
+
+    # Batched proctoring events: accepted client timestamp window
+    EVENT_BATCH_MAX_AGE_SECONDS: int = 6 * 60 * 60
+    EVENT_BATCH_MAX_CLOCK_SKEW_SECONDS: int = 5 * 60
+
+    # Write-behind buffer for exam/submission event inserts. Off by default: rows
+    # still queued when a worker is killed are lost
+    WRITE_BEHIND_ENABLED: bool = False
+    WRITE_BEHIND_MAX_ROWS: int = 10000
+    WRITE_BEHIND_BATCH_ROWS: int = 500
+    WRITE_BEHIND_FLUSH_INTERVAL_SECONDS: float = 1.0
+    WRITE_BEHIND_PUT_TIMEOUT_SECONDS: float = 0.05
+    WRITE_BEHIND_MAX_ATTEMPTS: int = 5
+    WRITE_BEHIND_DEAD_LETTER_PATH: str = "logs/write_behind_dead_letter.jsonl"
+
+    # Live proctoring stream: "memory" (single worker) or "postgres" (LISTEN/NOTIFY across workers)
+    PROCTORING_STREAM_BACKEND: str = "memory"
+
+    # Exam session heartbeats write last_activity_at at most this often per session
+    HEARTBEAT_MIN_INTERVAL_SECONDS: int = 15
+
+    # Code drafts keep this many deltas after background compaction
+    DRAFT_HISTORY_KEEP: int = 20
+
+    # Catalog response cache: "memory" (per worker), "redis" (shared) or "off"
+    RESPONSE_CACHE_BACKEND: str = "memory"
+    RESPONSE_CACHE_TTL_SECONDS: int = 60
+    RESPONSE_CACHE_MAX_ENTRIES: int = 2048
+    RESPONSE_CACHE_REDIS_URL: Optional[str] = None  # e.g. redis://:password@redis:6379/1
+
+    # Response compression: bodies below the threshold or of other types go out as-is
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_CONTENT_TYPES: List[str] = [
+        "application/json",
+        "application/x-ndjson",
+        "application/javascript",
+        "application/xml",
+        "image/svg+xml",
+        "text/",
+    ]
+
+    # get_current_user caches verified access-token claims (by jti) and users (by id)
+    # per worker; 0 disables. Changes made through another worker show up within the TTL
+    AUTH_CACHE_TTL_SECONDS: int = 30
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
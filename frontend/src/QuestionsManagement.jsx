@@ -39,6 +39,10 @@ import {
 const host_ip = import.meta.env.VITE_HOST_IP;
 const API_BASE_URL = `http://${host_ip}:8000`;
 
+// Columns the question grid renders, sorts and filters on; the full question
+// (problem statement, starter code, ...) is fetched only when editing
+const QUESTION_GRID_FIELDS = 'id,title,description,category_id,difficulty,max_score,is_active,extra_data,created_at';
+
 // Utility function for API calls
 const apiCall = async (endpoint, options = {}) => {
   try {
@@ -171,7 +175,7 @@ export default function QuestionsManagement() {
   const loadQuestions = async () => {
     setLoading(true);
     try {
-      const data = await apiCall('/questions/?skip=0&limit=10000');
+      const data = await apiCall(`/questions/?skip=0&limit=10000&fields=${QUESTION_GRID_FIELDS}`);
 
       if (Array.isArray(data)) {
         // Sort questions: LeetCode questions by question_id, then new questions at top
@@ -384,7 +388,14 @@ export default function QuestionsManagement() {
   };
 
   // Edit handlers
-  const handleEditQuestion = (question) => {
+  const handleEditQuestion = async (listedQuestion) => {
+    let question;
+    try {
+      question = await apiCall(`/questions/${listedQuestion.id}`);
+    } catch (error) {
+      alert('Failed to load the question for editing.');
+      return;
+    }
     setEditingQuestion(question);
     setQuestionForm({
       title: question.title || '',
@@ -172,6 +172,13 @@ def clean():
     run("docker compose down -v --remove-orphans")
     console.print("✅ [green]Project fully cleaned[/green]")
 
+@cli.command()
+def migrate():
+    """Apply database schema migrations"""
+    console.print("🗃️ [cyan]Applying database migrations...[/cyan]")
+    run("docker compose exec backend python -m backend.migrate")
+    console.print("✅ [green]Database schema is up to date![/green]")
+
 @cli.command()
 def urls():
     """Show all service URLs"""
@@ -265,6 +272,7 @@ def show_menu():
     table.add_row("8", "urls", "🌐 Show all service URLs")
     table.add_row("9", "backup-db", "💾 Backup the database")
     table.add_row("10", "restore-db", "♻️ Restore the database")
+    table.add_row("11", "migrate", "🗃️ Apply database migrations")
     table.add_row("0", "exit", "👋 Exit the manager")
     table.add_row("-1", "factory-reset", "☠️ BUILD EVERYTHING FROM SCRATCH")
 
@@ -283,6 +291,7 @@ def show_menu():
         "8": urls,
         "9": backup_db,
         "10": restore_db,
+        "11": migrate,
         "0": lambda: console.print("👋 [cyan]Goodbye![/cyan]"),
     }
 